@@ -0,0 +1,108 @@
+"""
+Throughput and latency benchmark for the multi-camera CameraPool.
+
+Tracks the same video as 1, 2, 4, ... simultaneous feeds, each in its own
+worker process, and reports the aggregate frame rate across feeds plus the
+capture-to-release latency of every feed. Frames are released as soon as
+the controller gets them, so the numbers show what the workers sustain.
+Aggregate throughput should grow with the number of feeds until every
+core is busy. Without --video, a synthetic clip is written to a temporary file.
+
+Usage:
+    python benchmarks/bench_camera_pool.py [--video session.mp4] [--feeds 1,2,4] [--frames 300]
+        [--resolution 640x480] [--output result.json]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import cv2
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+from utils.camera_pool import CameraPool
+
+from bench_pipeline import git_commit, parse_resolution, synthetic_frames
+
+
+def write_synthetic_video(path, width, height, frames, fps=30.0):
+    """Write a clip of smooth random frames for the workers to decode."""
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), fps, (width, height))
+    clip = synthetic_frames(width, height)
+    for i in range(frames):
+        writer.write(clip[i % len(clip)])
+    writer.release()
+
+
+def run_feeds(video, feeds, tracker_factory=None):
+    """
+    Track `feeds` copies of a video in parallel until all of them end.
+
+    Args:
+        video (str): Video file every feed decodes
+        feeds (int): Number of feeds, and worker processes
+        tracker_factory (callable): Passed to CameraPool, None uses HandTracker
+
+    Returns:
+        dict: Aggregate frame rate and the per-feed CameraPool stats
+    """
+    # Files are read as fast as they decode, not paced at their frame rate
+    pool = CameraPool([video] * feeds, draw=False, tracker_factory=tracker_factory,
+                      source_params={"realtime": False})
+    pool.start()
+    frames = 0
+    start = time.monotonic()
+    try:
+        while pool.running():
+            frame = pool.get()
+            if frame is not None:
+                pool.release(frame)
+                frames += 1
+        elapsed = time.monotonic() - start
+    finally:
+        pool.stop()
+    return {
+        "frames": frames,
+        "aggregate_fps": frames / elapsed if elapsed > 0 else 0.0,
+        "feeds": pool.get_stats(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--video", help="video file to track instead of a synthetic clip")
+    parser.add_argument("--feeds", default="1,2,4", help="comma-separated feed counts to run")
+    parser.add_argument("--frames", type=int, default=300, help="length of the synthetic clip")
+    parser.add_argument("--resolution", default="640x480", help="WxH of the synthetic clip")
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        video = args.video
+        if video is None:
+            width, height = parse_resolution(args.resolution)
+            video = os.path.join(directory, "synthetic.avi")
+            write_synthetic_video(video, width, height, args.frames)
+
+        report = {
+            "commit": git_commit(),
+            "source": args.video or "synthetic",
+            "cpus": os.cpu_count(),
+            "runs": {},
+        }
+        for count in (int(text) for text in args.feeds.split(",")):
+            report["runs"][count] = run_feeds(video, count)
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
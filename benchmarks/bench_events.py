@@ -0,0 +1,207 @@
+"""
+Delivery latency benchmark for the gesture event server.
+
+Publishes a synthetic event stream (cursor moves at --rate Hz with a click
+every --click-every moves) to an EventServer and measures, for a client on
+the Unix socket and one on the WebSocket, the time from EventBus.publish to
+the event being decoded by the client (both on the time.monotonic() clock).
+A third client connects but never reads. Since its cursor moves merge while
+it is stuck, steady-state traffic takes long to fill its socket buffers,
+so a flood phase then publishes clicks (which never merge) as fast as
+possible until the server disconnects it for being more than --max-pending
+events behind, showing that publish() stays cheap meanwhile. p50/p99/max
+latencies in microseconds and the cost of publish() itself are printed as
+JSON.
+
+Usage:
+    python benchmarks/bench_events.py [--seconds 5] [--rate 240] [--click-every 10]
+        [--max-pending 256] [--flood-seconds 10] [--output result.json]
+"""
+import argparse
+import asyncio
+import base64
+import json
+import os
+import socket
+import struct
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+from utils.event_server import EventServer, read_unix_events
+from utils.events import EventBus, GestureEvent, decode_events
+
+from bench_pipeline import git_commit
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def read_websocket_events(port):
+    """Minimal WebSocket client yielding the server's events."""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    key = base64.b64encode(os.urandom(16)).decode()
+    writer.write((f"GET / HTTP/1.1\r\nHost: 127.0.0.1:{port}\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                  f"Sec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n").encode())
+    await reader.readuntil(b"\r\n\r\n")
+    try:
+        while True:
+            try:
+                first, second = await reader.readexactly(2)
+            except asyncio.IncompleteReadError:
+                return
+            length = second & 0x7F
+            if length == 126:
+                length, = struct.unpack("!H", await reader.readexactly(2))
+            elif length == 127:
+                length, = struct.unpack("!Q", await reader.readexactly(8))
+            payload = await reader.readexactly(length)
+            if first & 0x0F == 0x2:
+                for event in decode_events(payload):
+                    yield event
+    finally:
+        writer.close()
+
+
+async def collect(events, ready, done, latencies, counts):
+    """Record the delivery latency of every event until `done` is set."""
+    ready.set()
+    try:
+        async for event in events:
+            latencies.append(time.monotonic() - event.timestamp)
+            counts[event.kind] = counts.get(event.kind, 0) + 1
+            if done.is_set():
+                return
+    finally:
+        await events.aclose()
+
+
+def summarize(samples):
+    values = np.asarray(samples) * 1e6
+    return {"p50_us": float(np.percentile(values, 50)), "p99_us": float(np.percentile(values, 99)),
+            "max_us": float(values.max())}
+
+
+def flood(bus, server, seconds):
+    """Publish clicks back to back until a client is dropped; return the publish costs and time taken."""
+    costs = []
+    clients = server.get_stats()["clients"]
+    start = time.monotonic()
+    while time.monotonic() - start < seconds and server.get_stats()["clients"] >= clients:
+        before = time.monotonic()
+        bus.publish(GestureEvent("click", before))
+        costs.append(time.monotonic() - before)
+        if len(costs) % 256 == 0:
+            # Let the server thread run on machines with few cores
+            time.sleep(0.001)
+    return costs, time.monotonic() - start
+
+
+def publish(bus, args, stop):
+    """Publish the synthetic stream from this thread and return the cost of each publish call."""
+    costs = []
+    interval = 1.0 / args.rate
+    next_time = time.monotonic()
+    i = 0
+    while not stop.is_set():
+        now = time.monotonic()
+        if now < next_time:
+            time.sleep(next_time - now)
+        next_time += interval
+        start = time.monotonic()
+        bus.publish(GestureEvent("cursor", start, x=i % 1920, y=i % 1080))
+        if i % args.click_every == 0:
+            bus.publish(GestureEvent("click", time.monotonic()))
+        costs.append(time.monotonic() - start)
+        i += 1
+    return costs
+
+
+async def run(args, path, port):
+    bus = EventBus()
+    server = EventServer(bus, unix_path=path, port=port, max_pending=args.max_pending)
+    server.start()
+    try:
+        # A client that connects and never reads
+        stalled = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        stalled.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+        stalled.connect(path)
+
+        done = asyncio.Event()
+        results = {}
+        tasks = []
+        for name, events in (("unix", read_unix_events(path)), ("websocket", read_websocket_events(port))):
+            latencies, counts = [], {}
+            results[name] = (latencies, counts)
+            ready = asyncio.Event()
+            tasks.append(asyncio.ensure_future(collect(events, ready, done, latencies, counts)))
+            await ready.wait()
+        # Let the connections register before publishing
+        await asyncio.sleep(0.2)
+
+        stop = threading.Event()
+        loop = asyncio.get_running_loop()
+        publisher = loop.run_in_executor(None, publish, bus, args, stop)
+        await asyncio.sleep(args.seconds)
+        stop.set()
+        costs = await publisher
+        published = bus.published
+        done.set()
+        bus.publish(GestureEvent("cursor", time.monotonic()))
+        await asyncio.wait(tasks, timeout=1.0)
+        # Wait for the server to notice the reading clients leave, only the stalled one stays
+        while server.get_stats()["clients"] > 1:
+            await asyncio.sleep(0.01)
+        stalled_stats = server.get_stats()["sent"][0]
+        flood_costs, flood_time = await loop.run_in_executor(None, flood, bus, server, args.flood_seconds)
+        disconnected = server.get_stats()["clients"] == 0
+        stalled.close()
+    finally:
+        server.stop()
+
+    report = {
+        "published": published,
+        "publish": summarize(costs),
+        "stalled_client": stalled_stats,
+        "flood": dict(summarize(flood_costs), published=len(flood_costs), seconds=flood_time,
+                      stalled_client_disconnected=disconnected),
+    }
+    for name, (latencies, counts) in results.items():
+        report[name] = dict(summarize(latencies), received=counts)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=5.0, help="how long to publish")
+    parser.add_argument("--rate", type=float, default=240.0, help="cursor events per second")
+    parser.add_argument("--click-every", type=int, default=10, help="cursor events per click event")
+    parser.add_argument("--max-pending", type=int, default=256,
+                        help="unsent events after which the server drops a client")
+    parser.add_argument("--flood-seconds", type=float, default=10.0,
+                        help="longest to flood the stalled client before giving up")
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        report = asyncio.run(run(args, os.path.join(directory, "events.sock"), free_port()))
+    report = dict({"commit": git_commit(), "rate": args.rate, "seconds": args.seconds}, **report)
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Latency/jitter benchmark for the cursor filters.
+
+Replays a cursor trace through every filter in utils/filters.py and reports,
+per filter:
+
+    lag_ms     delay of the filtered path behind the reference path
+    jitter_px  RMS frame-to-frame movement of the filtered path while the
+               reference path is still
+    error_px   mean distance to the ground truth (synthetic traces only)
+    cost_us    time per sample
+
+Without --trace, a synthetic trace is generated: point-to-point moves with
+pauses, plus Gaussian sensor noise, so the ground truth is known. With
+--trace, the index fingertip of a recorded landmark log (an .npz file with
+`timestamps` and `landmarks` arrays) is replayed and the raw input is used
+as the lag reference.
+
+Usage:
+    python benchmarks/bench_filters.py [--trace session.npz] [--scale 3.0]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.filters import CURSOR_FILTERS, create_filter
+
+
+def synthetic_trace(seconds=20, fps=60, noise_px=3.0, seed=0):
+    """
+    Generate minimum-jerk moves between random screen targets with pauses.
+
+    Returns:
+        tuple: (timestamps, noisy (N, 2) positions, true (N, 2) positions)
+    """
+    rng = np.random.default_rng(seed)
+    timestamps = np.arange(int(seconds * fps)) / fps
+    truth = np.zeros((len(timestamps), 2))
+    position = np.array([960.0, 540.0])
+    i = 0
+    while i < len(timestamps):
+        hold = int(rng.uniform(0.2, 0.8) * fps)
+        truth[i:i + hold] = position
+        i += hold
+
+        target = rng.uniform((100, 100), (1820, 980))
+        steps = int(rng.uniform(0.15, 0.6) * fps)
+        s = np.linspace(0, 1, steps)[:, None]
+        profile = 10 * s**3 - 15 * s**4 + 6 * s**5
+        truth[i:i + steps] = (position + (target - position) * profile)[:len(truth) - i]
+        position = target
+        i += steps
+
+    noisy = truth + rng.normal(0, noise_px, truth.shape)
+    return timestamps, noisy, truth
+
+
+def recorded_trace(path, scale):
+    """Load the index fingertip path from a recorded landmark log."""
+    log = np.load(path)
+    timestamps = log["timestamps"] - log["timestamps"][0]
+    positions = log["landmarks"][:, 8, :2].astype(np.float64) * scale
+    return timestamps, positions, None
+
+
+def estimate_lag(output, reference, max_lag=30):
+    """Return the shift (in samples) that best aligns output with reference."""
+    errors = [
+        np.mean(np.abs(output[lag:] - reference[:len(reference) - lag]))
+        for lag in range(max_lag + 1)
+    ]
+    return int(np.argmin(errors))
+
+
+def still_mask(reference, threshold_px=1.0, window=9):
+    """Return a mask of samples where the (smoothed) reference path is still."""
+    kernel = np.ones(window) / window
+    smoothed = np.column_stack([np.convolve(reference[:, i], kernel, mode="same") for i in range(2)])
+    speed = np.linalg.norm(np.diff(smoothed, axis=0), axis=1)
+    return speed < threshold_px
+
+
+def jitter(path, mask):
+    """RMS frame-to-frame movement of a path over the masked samples."""
+    steps = np.linalg.norm(np.diff(path, axis=0), axis=1)[mask]
+    return float(np.sqrt(np.mean(steps**2))) if len(steps) else 0.0
+
+
+def evaluate(cursor_filter, timestamps, positions, truth):
+    """Run one filter over the trace and compute its metrics."""
+    output = np.zeros_like(positions)
+    start = time.perf_counter()
+    for i, (t, (x, y)) in enumerate(zip(timestamps, positions)):
+        output[i] = cursor_filter.filter(x, y, t)
+    cost_us = (time.perf_counter() - start) / len(timestamps) * 1e6
+
+    reference = truth if truth is not None else positions
+    frame_ms = float(np.median(np.diff(timestamps))) * 1000.0
+    result = {
+        "lag_ms": estimate_lag(output, reference) * frame_ms,
+        "jitter_px": jitter(output, still_mask(reference)),
+        "cost_us": cost_us,
+    }
+    if truth is not None:
+        result["error_px"] = float(np.mean(np.linalg.norm(output - truth, axis=1)))
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--trace", help="recorded landmark log (.npz) to replay")
+    parser.add_argument("--scale", type=float, default=1.0,
+                        help="factor from trace pixels to screen pixels")
+    args = parser.parse_args()
+
+    if args.trace:
+        timestamps, positions, truth = recorded_trace(args.trace, args.scale)
+    else:
+        timestamps, positions, truth = synthetic_trace()
+
+    raw_jitter = jitter(positions, still_mask(truth if truth is not None else positions))
+    print(f"samples: {len(timestamps)}  raw jitter: {raw_jitter:.2f} px")
+    print(f"{'filter':<16}{'lag_ms':>8}{'jitter_px':>11}{'error_px':>10}{'cost_us':>9}")
+    for name in CURSOR_FILTERS:
+        result = evaluate(create_filter(name), timestamps, positions, truth)
+        error = f"{result['error_px']:10.2f}" if "error_px" in result else f"{'-':>10}"
+        print(f"{name:<16}{result['lag_ms']:8.1f}{result['jitter_px']:11.2f}{error}{result['cost_us']:9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+Per-frame memory allocation benchmark for the capture path.
+
+Measures with tracemalloc how much memory each capture variant allocates
+per frame (the traced peak during the frame, above what was allocated
+before it), up to the RGB image handed to the hand tracking model:
+
+    copying        cap.read(), cv2.flip and cv2.cvtColor each return a new frame
+    pooled_flip    VirtualMouse.capture_frame: decode into a reused buffer and
+                   flip into a FramePool buffer; RGB into a ScratchBuffer
+    pooled_mirror  VirtualMouse.capture_frame with flip_frames=False: decode
+                   straight into a FramePool buffer, no flip (landmarks are
+                   mirrored instead); RGB into a ScratchBuffer
+
+Only allocations made through Python and NumPy are traced (OpenCV returns
+NumPy arrays, so every new frame shows up); the video decoder's own buffers
+do not. Timings come from a separate pass without tracemalloc. The
+regression check that pooled capture and tracking do not allocate lives in
+tests/test_frame_alloc.py.
+
+Usage:
+    python benchmarks/bench_frame_alloc.py [--video session.mp4] [--frames 200]
+        [--resolution 640x480]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+from main import VirtualMouse
+from utils.frame_pool import ScratchBuffer
+from utils.frame_source import VideoFileSource
+from utils.recorder import InputRecorder
+
+from bench_camera_pool import write_synthetic_video
+from bench_pipeline import git_commit, parse_resolution
+
+VARIANTS = ["copying", "pooled_flip", "pooled_mirror"]
+
+
+def make_step(variant, video):
+    """
+    Return a function that captures one frame the way `variant` does, and a cleanup function.
+
+    Every step ends with the RGB image the tracker would feed to the model,
+    and gives its frame back the way the main loop does after rendering.
+    """
+    if variant == "copying":
+        cap = cv2.VideoCapture(video)
+
+        def step():
+            _, img = cap.read()
+            img = cv2.flip(img, 1)
+            return cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+
+        return step, cap.release
+
+    app = VirtualMouse(source=None, input_backend=InputRecorder(), async_input=False,
+                       flip_frames=variant == "pooled_flip")
+    app.frame_source = VideoFileSource(video)
+    scratch = ScratchBuffer()
+
+    def step():
+        _, img = app.capture_frame()
+        rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB, dst=scratch.view(img.shape))
+        app.frame_pool.release(img)
+        return rgb
+
+    return step, app.frame_source.release
+
+
+def measure(variant, video, frames, warmup=5):
+    """
+    Run one capture variant and return its per-frame allocations and latency.
+
+    Returns:
+        dict: Mean and max traced peak bytes per frame, mean and p95 latency in ms
+    """
+    step, close = make_step(variant, video)
+    for _ in range(warmup):
+        step()
+    timings = []
+    for _ in range(frames):
+        start = time.perf_counter()
+        step()
+        timings.append(time.perf_counter() - start)
+    close()
+
+    step, close = make_step(variant, video)
+    for _ in range(warmup):
+        step()
+    allocated = []
+    tracemalloc.start()
+    try:
+        for _ in range(frames):
+            before = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            step()
+            allocated.append(tracemalloc.get_traced_memory()[1] - before)
+    finally:
+        tracemalloc.stop()
+        close()
+
+    timings = np.array(timings) * 1000.0
+    return {
+        "peak_bytes_per_frame": float(np.mean(allocated)),
+        "max_peak_bytes": int(np.max(allocated)),
+        "mean_ms": float(timings.mean()),
+        "p95_ms": float(np.percentile(timings, 95)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--video", help="video file to capture from instead of a synthetic clip")
+    parser.add_argument("--frames", type=int, default=200, help="measured frames per variant")
+    parser.add_argument("--resolution", default="640x480", help="WxH of the synthetic clip")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        video = args.video
+        if video is None:
+            width, height = parse_resolution(args.resolution)
+            video = os.path.join(directory, "synthetic.avi")
+            # Long enough that no variant reads past the end
+            write_synthetic_video(video, width, height, 2 * (args.frames + 10))
+        report = {
+            "commit": git_commit(),
+            "source": args.video or "synthetic",
+            "frames": args.frames,
+            "variants": {variant: measure(variant, video, args.frames) for variant in VARIANTS},
+        }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+"""
+Micro-benchmark for the per-frame gesture stage.
+
+Compares the original list-of-tuples path, where every predicate pulls out
+single points and does scalar NumPy math, with the current path that
+computes one HandFeatures vector per frame and evaluates the declarative
+gesture rules against it in a single pass.
+
+By default frames are stamped with the wall clock, which runs far faster
+than a camera, so the hand history never spans a motion window and only the
+pose rules are measured. --fps stamps them at a camera rate instead, adding
+the least-squares motion fits (swipes, flicks, circles) that run once the
+history covers their window; the legacy predicates have no equivalent, so
+that cost is the price of time-based rather than frame-to-frame motion.
+
+Usage:
+    python benchmarks/bench_gestures.py [--frames 20000] [--repeat 5] [--fps 30]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.gesture_utils import GestureDetector, default_gesture_rules
+
+
+def make_landmark_stream(frames, width=640, height=480, seed=0):
+    """Generate a random-walk stream of (21, 3) landmark arrays in pixels."""
+    rng = np.random.default_rng(seed)
+    base = rng.uniform((0.3 * width, 0.3 * height, -20), (0.7 * width, 0.7 * height, 20), (21, 3))
+    drift = np.cumsum(rng.normal(0, 3, (frames, 1, 3)), axis=0)
+    jitter = rng.normal(0, 15, (frames, 21, 3))
+    return (base + drift + jitter).astype(np.float32)
+
+
+class LegacyGestureDetector:
+    """Reference copy of the original list-of-tuples gesture predicates."""
+
+    def __init__(self):
+        self.cooldown = 0
+        self.last_volume_change = self.last_screenshot = 0
+        self.last_tab_switch = self.last_mic_toggle = 0
+
+    def calculate_distance(self, point1, point2):
+        return np.sqrt((point1[0] - point2[0])**2 + (point1[1] - point2[1])**2)
+
+    def calculate_angle(self, point1, point2, point3):
+        a, b, c = np.array(point1), np.array(point2), np.array(point3)
+        ba, bc = a - b, c - b
+        # Coincident points (e.g. a fingertip on the wrist) have no angle, as in GestureDetector.calculate_angle
+        norm = np.linalg.norm(ba) * np.linalg.norm(bc)
+        if norm == 0:
+            return 0.0
+        cosine_angle = max(-1.0, min(1.0, np.dot(ba, bc) / norm))
+        return np.degrees(np.arccos(cosine_angle))
+
+    def is_click_gesture(self, lm):
+        if len(lm) < 21:
+            return False
+        return self.calculate_distance(lm[4], lm[8]) < 30
+
+    def is_right_click_gesture(self, lm):
+        if len(lm) < 21:
+            return False
+        return (self.calculate_distance(lm[4], lm[8]) < 40 and self.calculate_distance(lm[4], lm[12]) < 40
+                and self.calculate_distance(lm[8], lm[12]) < 40)
+
+    def is_volume_gesture(self, lm):
+        if len(lm) < 21:
+            return 0
+        current_time = time.time()
+        if current_time - self.last_volume_change < self.cooldown:
+            return 0
+        if lm[4][1] < lm[2][1]:
+            self.last_volume_change = current_time
+            return 1
+        elif lm[4][1] > lm[2][1]:
+            self.last_volume_change = current_time
+            return -1
+        return 0
+
+    def is_screenshot_gesture(self, lm):
+        if len(lm) < 21:
+            return False
+        current_time = time.time()
+        if current_time - self.last_screenshot < self.cooldown:
+            return False
+        if 75 <= self.calculate_angle(lm[4], lm[0], lm[8]) <= 105:
+            self.last_screenshot = current_time
+            return True
+        return False
+
+    def is_tab_switch_gesture(self, lm, prev):
+        if len(lm) < 21 or len(prev) < 21:
+            return 0
+        current_time = time.time()
+        if current_time - self.last_tab_switch < self.cooldown:
+            return 0
+        movement = (lm[8][0] + lm[12][0]) / 2 - (prev[8][0] + prev[12][0]) / 2
+        if abs(movement) > 50:
+            self.last_tab_switch = current_time
+            return 1 if movement > 0 else -1
+        return 0
+
+    def is_mic_toggle_gesture(self, lm):
+        if len(lm) < 21:
+            return False
+        current_time = time.time()
+        if current_time - self.last_mic_toggle < self.cooldown:
+            return False
+        if self.calculate_distance(lm[4], lm[8]) < 20:
+            self.last_mic_toggle = current_time
+            return True
+        return False
+
+    def is_scroll_gesture(self, lm, prev):
+        if len(lm) < 21 or len(prev) < 21:
+            return 0
+        movement = (prev[8][1] + prev[12][1]) / 2 - (lm[8][1] + lm[12][1]) / 2
+        if abs(movement) > 30 and lm[8][1] < lm[5][1] and lm[12][1] < lm[9][1]:
+            return 1 if movement > 0 else -1
+        return 0
+
+    def is_heart_emoji_gesture(self, lm):
+        if not lm:
+            return False
+        return np.sqrt((lm[4][0] - lm[8][0])**2 + (lm[4][1] - lm[8][1])**2) < 40
+
+    def is_smile_emoji_gesture(self, lm):
+        if not lm:
+            return False
+        return lm[8][1] < lm[5][1] and lm[12][1] < lm[9][1]
+
+    def is_thumbs_up_emoji_gesture(self, lm):
+        if not lm:
+            return False
+        return lm[4][1] < lm[2][1] and abs(lm[4][0] - lm[2][0]) < 20
+
+    def is_rock_emoji_gesture(self, lm):
+        if not lm:
+            return False
+        return lm[8][1] < lm[5][1] and lm[20][1] < lm[17][1]
+
+    def is_victory_emoji_gesture(self, lm):
+        if not lm:
+            return False
+        distance = np.sqrt((lm[8][0] - lm[12][0])**2 + (lm[8][1] - lm[12][1])**2)
+        return lm[8][1] < lm[5][1] and lm[12][1] < lm[9][1] and distance > 50
+
+
+def legacy_gesture_stage(detector, landmarks, prev_landmarks):
+    """Evaluate every predicate the original main loop called per frame."""
+    lm, prev = landmarks, prev_landmarks
+    return [
+        detector.is_click_gesture(lm),
+        detector.is_right_click_gesture(lm),
+        detector.is_volume_gesture(lm),
+        detector.is_screenshot_gesture(lm),
+        detector.is_tab_switch_gesture(lm, prev),
+        detector.is_mic_toggle_gesture(lm),
+        detector.is_scroll_gesture(lm, prev),
+        detector.is_heart_emoji_gesture(lm),
+        detector.is_smile_emoji_gesture(lm),
+        detector.is_thumbs_up_emoji_gesture(lm),
+        detector.is_rock_emoji_gesture(lm),
+        detector.is_victory_emoji_gesture(lm),
+    ]
+
+
+def rule_engine_stage(detector, landmarks, timestamp=None):
+    """Compute the shared feature vector once and evaluate every rule in one pass."""
+    features = detector.update_features(landmarks, timestamp)
+    return detector.evaluate_gestures(features, timestamp)
+
+
+def time_per_frame(func, frames, repeat):
+    """Return the best-of-`repeat` cost of `func` in microseconds per frame."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for i in range(1, len(frames)):
+            func(i)
+        best = min(best, time.perf_counter() - start)
+    return best / (len(frames) - 1) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--frames", type=int, default=20000, help="number of frames to evaluate")
+    parser.add_argument("--repeat", type=int, default=5, help="timing runs; the fastest is reported")
+    parser.add_argument("--fps", type=float, help="stamp frames at this camera rate instead of the wall clock")
+    args = parser.parse_args()
+
+    stream = make_landmark_stream(args.frames)
+    tuples = [[(int(x), int(y)) for x, y, _ in frame] for frame in stream]
+    legacy = LegacyGestureDetector()
+    # Zero cooldowns so every frame measures the predicates, not the cooldown early-outs
+    detector = GestureDetector(rules=default_gesture_rules(cooldown=0, emoji_cooldown=0), screen_size=(1920, 1080))
+
+    legacy_us = time_per_frame(lambda i: legacy_gesture_stage(legacy, tuples[i], tuples[i - 1]), stream, args.repeat)
+    if args.fps:
+        # Keep the clock increasing across runs so the history never goes backwards
+        clock = iter(np.arange(args.repeat * args.frames) / args.fps)
+        engine_us = time_per_frame(lambda i: rule_engine_stage(detector, stream[i], next(clock)), stream, args.repeat)
+    else:
+        engine_us = time_per_frame(lambda i: rule_engine_stage(detector, stream[i]), stream, args.repeat)
+
+    print(f"frames:      {args.frames}")
+    print(f"legacy:      {legacy_us:8.2f} us/frame")
+    print(f"rule engine: {engine_us:8.2f} us/frame")
+    print(f"speedup:     {legacy_us / engine_us:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""
+CPU and wake-up latency benchmark for the idle (low-power) mode.
+
+Runs VirtualMouse's capture and tracking pipeline on a paced synthetic
+source with no hand in view, the situation idle mode is for, and reports:
+
+    active     process CPU use (all threads, as a share of one core) and
+               frame rate with idle mode disabled: every frame is tracked
+    idle       the same once idle mode has kicked in: the source is slowed
+               to --idle-fps and frames only get the motion check
+    wake       for each trial, the scene starts moving while idle; the time
+               until the monitor wakes up and the number of idle frames
+               checked until then (1 means the first frame showing the motion
+               woke it; a frame captured just before the motion can add one)
+
+Input goes to an InputRecorder, so no mouse or keyboard events are sent.
+
+Usage:
+    python benchmarks/bench_idle.py [--seconds 5] [--idle-after 30] [--idle-fps 5]
+        [--fps 30] [--resolution 640x480] [--trials 5] [--output result.json]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+from main import VirtualMouse
+from utils.pipeline import FramePipeline
+from utils.recorder import InputRecorder
+
+from bench_pipeline import git_commit, parse_resolution
+
+
+class PipelineRunner:
+    def __init__(self, app):
+        """
+        Run an app's capture and inference stages, consuming results like the main loop minus the display.
+
+        Args:
+            app (VirtualMouse): App with a frame source and tracker
+        """
+        self.app = app
+        self.pipeline = FramePipeline(app.capture_frame, app.detect_hands,
+                                      on_drop=app.release_buffers)
+        self.frames = 0
+
+    def run_until(self, condition, timeout):
+        """
+        Consume results until `condition()` is true or `timeout` seconds pass.
+
+        Returns:
+            bool: Whether the condition was met
+        """
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if condition():
+                return True
+            result = self.pipeline.get()
+            if result is None:
+                continue
+            timestamp, img, hands, _ = result
+            self.app.process_hands(hands, img.shape[1], img.shape[0], timestamp)
+            self.app.release_buffers(result)
+            self.frames += 1
+        return condition()
+
+    def measure(self, seconds):
+        """Consume results for `seconds` and return the CPU use and frame rate over that time."""
+        frames = self.frames
+        cpu = time.process_time()
+        start = time.monotonic()
+        self.run_until(lambda: False, seconds)
+        elapsed = time.monotonic() - start
+        return {
+            "cpu_percent": 100.0 * (time.process_time() - cpu) / elapsed,
+            "fps": (self.frames - frames) / elapsed,
+        }
+
+
+def open_app(args, idle_after):
+    """Create a VirtualMouse on a still, paced synthetic source."""
+    width, height = parse_resolution(args.resolution)
+    app = VirtualMouse(source="synthetic", input_backend=InputRecorder(), async_input=False,
+                       flip_frames=False, idle_after=idle_after, idle_fps=args.idle_fps,
+                       source_params={"width": width, "height": height, "fps": args.fps, "realtime": True})
+    app.frame_source.moving = False
+    return app
+
+
+def run_active(args):
+    """Measure CPU use while every frame is tracked."""
+    app = open_app(args, None)
+    runner = PipelineRunner(app)
+    runner.pipeline.start()
+    try:
+        runner.run_until(lambda: False, 1.0)
+        return runner.measure(args.seconds)
+    finally:
+        runner.pipeline.stop()
+        app.frame_source.release()
+
+
+def run_idle(args):
+    """Measure CPU use once idle, then how quickly motion wakes the monitor up."""
+    app = open_app(args, args.idle_after)
+    idle = app.idle
+    source = app.frame_source
+    runner = PipelineRunner(app)
+    runner.pipeline.start()
+    try:
+        if not runner.run_until(lambda: idle.idle, 30.0):
+            raise RuntimeError("Idle mode never started")
+        # Let the last full-rate frames drain before measuring
+        runner.run_until(lambda: False, 1.0)
+        result = runner.measure(args.seconds)
+
+        latencies = []
+        frames = []
+        for _ in range(args.trials):
+            source.moving = False
+            if not runner.run_until(lambda: idle.idle, 30.0):
+                raise RuntimeError("Idle mode did not resume")
+            # Wait a random part of an idle frame, so motion lands anywhere between two frames
+            runner.run_until(lambda: False, 0.5 + np.random.uniform(0.0, 1.0 / args.idle_fps))
+            checked = idle.idle_frames
+            start = time.monotonic()
+            source.moving = True
+            if not runner.run_until(lambda: not idle.idle, 5.0):
+                raise RuntimeError("Motion did not wake the idle monitor")
+            latencies.append(idle.last_wake - start)
+            frames.append(idle.idle_frames - checked + 1)
+
+        latencies = np.array(latencies) * 1000.0
+        result["wake"] = {
+            "trials": args.trials,
+            "mean_ms": float(latencies.mean()),
+            "max_ms": float(latencies.max()),
+            "idle_frame_ms": 1000.0 / args.idle_fps,
+            "max_frames": int(max(frames)),
+        }
+        result["monitor"] = idle.get_stats()
+        return result
+    finally:
+        runner.pipeline.stop()
+        source.release()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=5.0, help="measured seconds per CPU run")
+    parser.add_argument("--idle-after", type=int, default=30, help="frames without a hand before going idle")
+    parser.add_argument("--idle-fps", type=float, default=5.0, help="frame rate while idle")
+    parser.add_argument("--fps", type=float, default=30.0, help="frame rate of the synthetic source")
+    parser.add_argument("--resolution", default="640x480", help="WxH of the synthetic frames")
+    parser.add_argument("--trials", type=int, default=5, help="wake-up measurements")
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    args = parser.parse_args()
+
+    report = {
+        "commit": git_commit(),
+        "resolution": args.resolution,
+        "fps": args.fps,
+        "idle_fps": args.idle_fps,
+        "active": run_active(args),
+        "idle": run_idle(args),
+    }
+    report["cpu_saved_percent"] = report["active"]["cpu_percent"] - report["idle"]["cpu_percent"]
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
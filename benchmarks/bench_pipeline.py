@@ -0,0 +1,233 @@
+"""
+Headless latency benchmark for the full per-frame pipeline.
+
+Runs frames at several resolutions through every step the main loop performs
+on a frame, timing each one separately:
+
+    capture      read the next frame (video decode, or a copy for synthetic frames)
+    flip         cv2.flip to the selfie view
+    track_draw   HandTracker.find_hands with landmark drawing
+    track        HandTracker.find_hands without drawing
+    gestures     features, rules, cursor smoothing and the action layer
+    emoji        display_emoji alpha blending
+    end_to_end   capture + flip + track_draw + gestures + emoji
+
+Input goes to an InputRecorder, so no mouse or keyboard events are sent. When
+the tracker finds no hand (always the case for synthetic frames), the gesture
+stage is fed landmarks from a recorded log or a synthetic stream instead, so
+it is exercised on every frame. p50/p95/p99 and mean latencies in
+milliseconds are printed as JSON for comparison across commits.
+
+Usage:
+    python benchmarks/bench_pipeline.py [--video session.mp4] [--landmarks session.npz]
+        [--resolutions 320x240,640x480,1280x720] [--frames 300] [--output result.json]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+import cv2
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+from main import VirtualMouse
+from utils.hand_tracker import HandTracker
+from utils.recorder import InputRecorder, LandmarkLog
+
+from bench_gestures import make_landmark_stream
+
+STAGES = ["capture", "flip", "track_draw", "track", "gestures", "emoji", "end_to_end"]
+PERCENTILES = (50, 95, 99)
+
+
+def parse_resolution(text):
+    """Parse 'WxH' into (width, height)."""
+    width, height = text.lower().split("x")
+    return int(width), int(height)
+
+
+def synthetic_frames(width, height, count=8, seed=0):
+    """Return a few smooth random frames to cycle through."""
+    rng = np.random.default_rng(seed)
+    small = rng.integers(0, 256, (count, height // 8 + 1, width // 8 + 1, 3), dtype=np.uint8)
+    return [cv2.resize(frame, (width, height), interpolation=cv2.INTER_LINEAR) for frame in small]
+
+
+class FrameSource:
+    def __init__(self, width, height, video_path=None):
+        """
+        Frames at a fixed resolution, from a video file (looped) or synthetic.
+
+        Args:
+            width (int): Frame width
+            height (int): Frame height
+            video_path (str): Optional video to decode frames from
+        """
+        self.size = (width, height)
+        self.cap = cv2.VideoCapture(video_path) if video_path else None
+        self.frames = None if self.cap else synthetic_frames(width, height)
+        self.index = 0
+
+    def read(self):
+        """Return the next frame as a fresh buffer, like cv2.VideoCapture.read."""
+        if self.cap is None:
+            frame = self.frames[self.index % len(self.frames)].copy()
+            self.index += 1
+            return frame
+
+        success, frame = self.cap.read()
+        if not success:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            success, frame = self.cap.read()
+            if not success:
+                raise RuntimeError("Could not read frames from the video")
+        if (frame.shape[1], frame.shape[0]) != self.size:
+            frame = cv2.resize(frame, self.size, interpolation=cv2.INTER_AREA)
+        return frame
+
+    def close(self):
+        if self.cap is not None:
+            self.cap.release()
+
+
+def summarize(samples):
+    """Return percentile and mean latencies in milliseconds."""
+    values = np.asarray(samples) * 1000.0
+    summary = {f"p{p}": float(np.percentile(values, p)) for p in PERCENTILES}
+    summary["mean"] = float(values.mean())
+    return summary
+
+
+def run_resolution(width, height, args, fallback):
+    """
+    Benchmark every stage at one resolution and return the latency summaries.
+
+    Args:
+        width (int): Frame width
+        height (int): Frame height
+        args: Parsed command line arguments
+        fallback (tuple): (landmarks, frame_size) fed to the gesture stage when no hand is found
+    """
+    app = VirtualMouse(source=None, input_backend=InputRecorder())
+    # Separate trackers so the draw and no-draw runs keep independent ROI and stride state
+    tracker = plain_tracker = None
+    if not args.skip_tracking:
+        tracker = HandTracker(roi_tracking=True)
+        plain_tracker = HandTracker(roi_tracking=True)
+    source = FrameSource(width, height, args.video)
+
+    # Landmark streams are in pixels of the frame they were recorded at
+    fallback_landmarks, (fallback_width, fallback_height) = fallback
+    fallback_scale = np.array([width / fallback_width, height / fallback_height, 1.0], dtype=np.float32)
+
+    timings = {stage: [] for stage in STAGES}
+    detected = 0
+    total = args.warmup + args.frames
+    for i in range(total):
+        timestamp = i / args.fps
+
+        start = time.perf_counter()
+        frame = source.read()
+        t_capture = time.perf_counter()
+        frame = cv2.flip(frame, 1)
+        t_flip = time.perf_counter()
+
+        landmarks = None
+        t_track_draw = t_track = 0.0
+        if tracker is not None:
+            plain = frame.copy()
+            track_start = time.perf_counter()
+            frame, landmarks = tracker.find_hands(frame, draw=True, timestamp=timestamp)
+            t_track_draw = time.perf_counter() - track_start
+
+            track_start = time.perf_counter()
+            plain_tracker.find_hands(plain, draw=False, timestamp=timestamp)
+            t_track = time.perf_counter() - track_start
+
+        if landmarks is not None:
+            detected += i >= args.warmup
+        else:
+            landmarks = fallback_landmarks[i % len(fallback_landmarks)] * fallback_scale
+
+        gesture_start = time.perf_counter()
+        app.process_landmarks(landmarks, width, height, timestamp)
+        t_gestures = time.perf_counter() - gesture_start
+
+        # Keep an emoji on screen so every frame pays for the blend
+        if not app.overlays:
+            app.show_emoji("👍", timestamp)
+        emoji_start = time.perf_counter()
+        app.display_emoji(frame, timestamp)
+        t_emoji = time.perf_counter() - emoji_start
+
+        if i < args.warmup:
+            continue
+        timings["capture"].append(t_capture - start)
+        timings["flip"].append(t_flip - t_capture)
+        timings["track_draw"].append(t_track_draw)
+        timings["track"].append(t_track)
+        timings["gestures"].append(t_gestures)
+        timings["emoji"].append(t_emoji)
+        timings["end_to_end"].append((t_flip - start) + t_track_draw + t_gestures + t_emoji)
+
+    source.close()
+    if tracker is None:
+        del timings["track_draw"], timings["track"]
+    result = {stage: summarize(samples) for stage, samples in timings.items()}
+    result["detected_ratio"] = detected / args.frames
+    return result
+
+
+def git_commit():
+    """Return the current commit hash, or None outside a git checkout."""
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--video", help="video file to take frames from instead of synthetic frames")
+    parser.add_argument("--landmarks", help="landmark log (.npz) to feed the gesture stage when no hand is found")
+    parser.add_argument("--resolutions", default="320x240,640x480,1280x720",
+                        help="comma-separated WxH frame sizes")
+    parser.add_argument("--frames", type=int, default=300, help="measured frames per resolution")
+    parser.add_argument("--warmup", type=int, default=30, help="unmeasured frames per resolution")
+    parser.add_argument("--fps", type=float, default=30.0, help="frame rate used for timestamps")
+    parser.add_argument("--skip-tracking", action="store_true", help="leave out the hand tracker stages")
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    args = parser.parse_args()
+
+    if args.landmarks:
+        log = LandmarkLog(args.landmarks)
+        fallback = (log.landmarks[log.present], log.frame_size)
+    else:
+        fallback = (make_landmark_stream(1000), (640, 480))
+
+    report = {
+        "commit": git_commit(),
+        "frames": args.frames,
+        "source": args.video or "synthetic",
+        "tracking": not args.skip_tracking,
+        "resolutions": {},
+    }
+    for text in args.resolutions.split(","):
+        width, height = parse_resolution(text)
+        report["resolutions"][f"{width}x{height}"] = run_resolution(width, height, args, fallback)
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
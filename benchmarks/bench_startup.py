@@ -0,0 +1,96 @@
+"""
+Startup-time benchmark for emoji asset loading.
+
+Compares, for every emoji in VirtualMouse.emoji_image_paths:
+
+    eager      decode + LANCZOS resize + convert every PNG (the old startup path)
+    cold       AssetManager with an empty disk cache (decode, resize, write .npy)
+    warm       AssetManager with a filled disk cache (memory-map the .npy files)
+    lazy_init  VirtualMouse construction, which no longer touches any asset
+
+Each figure is the best of --repeat runs, in milliseconds.
+
+Usage:
+    python benchmarks/bench_startup.py [--repeat 5] [--size 100]
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+from PIL import Image
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+from main import VirtualMouse
+from utils.assets import AssetManager
+from utils.recorder import InputRecorder
+
+
+def eager_load(paths, size):
+    """Load every image the way __init__ used to, before lazy loading."""
+    images = []
+    for path in paths:
+        img = Image.open(os.path.join(ROOT, path)).convert("RGBA")
+        img = img.resize((size, size), Image.LANCZOS)
+        images.append(np.array(img))
+    return images
+
+
+def manager_load(paths, size, cache_dir):
+    """Load every image through a fresh AssetManager."""
+    assets = AssetManager(ROOT, cache_dir=cache_dir)
+    for path in paths:
+        sprite = assets.get(path, size)
+        sprite.layers()  # Touch the pixels so memory-mapped files are actually read
+    return assets
+
+
+def best_ms(func, repeat, setup=None):
+    """Return the fastest of `repeat` runs of `func` in milliseconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5, help="timing runs; the fastest is reported")
+    parser.add_argument("--size", type=int, default=100, help="emoji size in pixels")
+    args = parser.parse_args()
+
+    app = VirtualMouse(source=None, input_backend=InputRecorder(), asset_cache_dir=False, async_input=False)
+    paths = [path for path in app.emoji_image_paths.values() if os.path.exists(os.path.join(ROOT, path))]
+    cache_dir = tempfile.mkdtemp(prefix="virtual-mouse-assets-")
+    try:
+        def clear_cache():
+            shutil.rmtree(cache_dir, ignore_errors=True)
+
+        results = {
+            "eager": best_ms(lambda: eager_load(paths, args.size), args.repeat),
+            "cold": best_ms(lambda: manager_load(paths, args.size, cache_dir), args.repeat, setup=clear_cache),
+            "warm": best_ms(lambda: manager_load(paths, args.size, cache_dir), args.repeat),
+            "lazy_init": best_ms(
+                lambda: VirtualMouse(source=None, input_backend=InputRecorder(), asset_cache_dir=cache_dir,
+                                     async_input=False),
+                args.repeat),
+        }
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    print(f"assets:    {len(paths)} x {args.size}px")
+    for name, ms in results.items():
+        print(f"{name + ':':<11}{ms:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
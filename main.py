@@ -1,42 +1,186 @@
+import time
+
+# Measured before the heavy imports so the startup timeline includes them
+IMPORT_START = time.monotonic()
+
+import argparse
+import asyncio
 import cv2
+import json
 import numpy as np
-import pyautogui
-import time
+import signal
 import sys
 import os
-import keyboard
-from PIL import Image
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 
 # Add the current directory to the Python path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from utils.hand_tracker import HandTracker
-from utils.gesture_utils import GestureDetector
+from utils.frame_pool import FramePool
+from utils.frame_source import create_frame_source
+from utils.hand_tracker import Hand, HandTracker
+from utils.input_dispatch import INPUT_BACKENDS, InputDispatcher, PyAutoGUIBackend, create_input_backend
+from utils.assets import AssetManager
+from utils.camera_pool import CameraPool
+from utils.event_server import EventServer
+from utils.events import EventBackend, EventBus, GestureEvent
+from utils.classifier import ClassifierEngine, load_classifier
+from utils.gesture_utils import MultiHandGestureDetector
+from utils.idle import IdleMonitor
+from utils.metrics import MetricsRegistry, MetricsServer, TimedInput
+from utils.overlay import OverlayCompositor, Sprite
+from utils.pipeline import FramePipeline
+from utils.preview import PreviewWindow, draw_hand
+from utils.quality import QualityController, build_levels
+from utils.recorder import InputRecorder, LandmarkLog, LandmarkRecorder
+from utils.startup import StartupTimeline
+
+IMPORT_END = time.monotonic()
+
+# How frames are shown: drawn and shown on the main loop, rendered on a
+# rate-capped preview thread, or not at all
+DISPLAY_MODES = ("window", "preview", "headless")
+
+# How to quit, printed at startup by the command line entry point
+KEY_HINT = "Press 'q' to quit, send SIGUSR1 to pause input"
+SIGNAL_HINT = "Send SIGINT or SIGTERM to quit, SIGUSR1 to pause input"
 
 class VirtualMouse:
-    def __init__(self):
-        """Initialize the Virtual Mouse application."""
-        self.cap = cv2.VideoCapture(0)
-        self.hand_tracker = HandTracker()
-        self.gesture_detector = GestureDetector()
-        self.prev_landmarks = []
-        self.frame_reduction = 100  # Frame reduction for better performance
-        self.smoothening = 7  # Smoothening factor for cursor movement
-        
-        # Initialize PyAutoGUI settings
-        pyautogui.FAILSAFE = False  # Disable fail-safe
-        self.screen_width, self.screen_height = pyautogui.size()
-        
-        # Initialize variables for cursor movement
-        self.plocX, self.plocY = 0, 0
-        self.clocX, self.clocY = 0, 0
-        self.prev_time = time.time()
-        
+    def __init__(self, source=0, input_backend=None, recorder=None, metrics=None,
+                 show_hud=True, log_interval=None, asset_cache_dir=None, timeline=None,
+                 async_input=True, max_hands=2, classifier=None, flip_frames=True, source_params=None,
+                 idle_after=30, idle_fps=5.0, display="window", preview_fps=10.0,
+                 quality_budget_ms=None, events=None):
+        """
+        Initialize the Virtual Mouse application.
+
+        Args:
+            source: Camera index, video path, image directory or "synthetic"
+                (see create_frame_source) to track hands in, or None to
+                skip camera and tracker setup (landmark replay)
+            input_backend: Object with the pyautogui input API (see INPUT_BACKENDS);
+                defaults to pyautogui, an InputRecorder runs without a display
+            recorder (LandmarkRecorder): Records landmarks (and frames) while running
+            metrics (MetricsRegistry): Collects per-stage latency histograms and
+                counters when set; None disables instrumentation
+            show_hud (bool): Overlay pipeline stats (and metrics percentiles) on the frame
+            log_interval (float): Seconds between structured metrics log lines, None disables
+            asset_cache_dir (str): Directory for preprocessed emoji arrays, None uses the
+                per-user cache directory; False disables the disk cache
+            timeline (StartupTimeline): Receives the startup phases, a new one is
+                created if omitted
+            async_input (bool): Send input from a dispatcher thread that merges
+                cursor moves and scrolls; False calls the backend directly, which
+                keeps replays deterministic
+            max_hands (int): Number of hands tracked at once; the first one
+                seen moves the cursor, two hands enable two-hand gestures
+            classifier: Trained pose classifier (see load_classifier) that
+                recognises single-hand gestures instead of the geometric rules
+            flip_frames (bool): Mirror camera frames for the selfie-view preview;
+                False leaves the pixels as captured and mirrors the landmark
+                coordinates instead, which is cheaper when nothing is displayed
+            source_params (dict): Keyword arguments for create_frame_source,
+                e.g. the camera resolution, frame rate and pixel format
+            idle_after (int): Frames without a hand before hand tracking pauses
+                and the source slows to `idle_fps` until something moves (see
+                IdleMonitor); None keeps tracking every frame
+            idle_fps (float): Frame rate requested from the source while idle
+            display (str): One of DISPLAY_MODES. "window" draws landmarks, the
+                HUD and emojis on every frame and shows it from the main loop;
+                "preview" hands a snapshot to a PreviewWindow thread at most
+                `preview_fps` times a second; "headless" draws and shows nothing
+            preview_fps (float): Frame rate cap of the "preview" display
+            quality_budget_ms (float): Per-frame latency budget, from a frame
+                reaching the app to its actions and rendering being done; when
+                set, a QualityController steps capture resolution, landmark
+                model, inference stride and rendering rate down and up to
+                keep within it. None keeps the quality fixed
+            events (EventBus): Receives a GestureEvent for every cursor move,
+                button, scroll and fired gesture, stamped with the capture
+                time of its frame (see gesture_events and EventServer)
+
+        Raises:
+            ValueError: If `display` is not one of DISPLAY_MODES
+        """
+        if display not in DISPLAY_MODES:
+            raise ValueError(f"Unknown display {display!r}, expected one of {', '.join(DISPLAY_MODES)}")
+        self.display = display
+        self.preview_fps = preview_fps
+        # Set to leave the main loop, from a signal handler or the preview thread
+        self.stop_event = threading.Event()
+        self.paused = False
+        self.preview = None
+        self.quality_budget_ms = quality_budget_ms
+        self.quality = None
+        self.quality_settings = None
+        # Rendering rate in the "window" display, lowered by the quality controller
+        self.render_interval = 0.0
+        self.last_render = float("-inf")
+        # Time each pooled frame buffer reached the app, by buffer id, for the quality controller
+        self.arrival_times = {}
+        self.timeline = timeline or StartupTimeline()
+        self.frame_source = None
+        self.source_params = source_params or {}
+        self.hand_tracker = None
+        self.max_hands = max_hands
+        self.flip_frames = flip_frames
+        # Frames in flight are pooled buffers, handed back once rendered or dropped
+        self.frame_pool = FramePool()
+        # Landmarks of results in flight likewise, so inference never overwrites ones being read
+        self.landmark_pool = FramePool(dtype=np.float32)
+        self.frame_shape = None
+        self.record_buffer = None
+        self.idle = None
+        if idle_after is not None:
+            self.idle = IdleMonitor(idle_after, idle_fps, set_rate=self.set_source_rate)
+
+        # Opening the camera and loading the model are the slowest startup
+        # steps and do not depend on each other, so they run in the background
+        # while the rest of the setup happens here
+        startup = None
+        if source is not None:
+            startup = ThreadPoolExecutor(max_workers=2, thread_name_prefix="startup")
+            camera = startup.submit(self.timeline.timed, "camera", self.open_source, source)
+            tracker = startup.submit(self.timeline.timed, "model", self.create_tracker, metrics)
+        self.recorder = recorder
+        self.metrics = metrics
+        self.show_hud = show_hud
+        self.log_interval = log_interval
+
+        # Initialize the OS input layer
+        with self.timeline.phase("input"):
+            if input_backend is None:
+                input_backend = PyAutoGUIBackend()
+            self.input_backend = input_backend
+            if metrics is not None:
+                input_backend = TimedInput(input_backend, metrics)
+            self.dispatcher = InputDispatcher(input_backend) if async_input else None
+            self.input = self.dispatcher or input_backend
+            self.events = events
+            # Capture time of the frame whose gestures are being processed
+            self.event_time = 0.0
+            if events is not None:
+                # Published on this thread as the calls are made, then passed on
+                self.input = EventBackend(events, forward=self.input, clock=lambda: self.event_time)
+            self.screen_width, self.screen_height = self.input.size()
+        with self.timeline.phase("gestures"):
+            self.classifier = classifier
+            self.hands_detector = self.create_hands_detector()
+            # Gesture state per camera feed (see run_pool); the feed whose hand
+            # was seen first moves the cursor until that hand is lost
+            self.feed_detectors = {}
+            self.current_feed = None
+            self.cursor_feed = None
+
         # Initialize emoji display variables
         self.current_emoji = None
-        self.emoji_display_time = 0
+        self.emoji_display_time = float("-inf")
         self.emoji_duration = 2.0  # Duration to display emoji in seconds
         self.emoji_size = 100  # Size of emoji in pixels
+        self.emoji_fade = 0.5  # Fade-out time at the end of the display duration
+        self.overlays = OverlayCompositor()
         
         # Map emojis to their image file paths
         self.emoji_image_paths = {
@@ -47,202 +191,903 @@ class VirtualMouse:
             "✌️": "assets/emojis/victory.png"
         }
 
-        # Pre-load emoji images
-        self.emoji_images = {
-            emoji: self.load_emoji_image(path) 
-            for emoji, path in self.emoji_image_paths.items()
+        # Gesture name -> emoji shown when it fires
+        self.gesture_emojis = {
+            "heart": "❤️",
+            "smile": "😊",
+            "thumbs_up": "👍",
+            "rock": "🤘",
+            "victory": "✌️",
+        }
+
+        # Gesture name -> action run when it fires (clicks are handled separately)
+        self.gesture_actions = {
+            "volume_up": lambda: self.handle_volume_control(1),
+            "volume_down": lambda: self.handle_volume_control(-1),
+            "screenshot": self.handle_screenshot,
+            "tab_next": lambda: self.handle_tab_switch(1),
+            "tab_previous": lambda: self.handle_tab_switch(-1),
+            "mic_toggle": self.handle_mic_toggle,
+            "scroll_up": lambda: self.input.scroll(10),
+            "scroll_down": lambda: self.input.scroll(-10),
+            "flick_left": lambda: self.input.hotkey('alt', 'left'),  # Browser back
+            "flick_right": lambda: self.input.hotkey('alt', 'right'),  # Browser forward
+            "zoom_in": lambda: self.input.hotkey('ctrl', '+'),
+            "zoom_out": lambda: self.input.hotkey('ctrl', '-'),
         }
 
+        # Emoji images are loaded on first use, from the preprocessed cache when possible
+        self.assets = AssetManager(os.path.dirname(os.path.abspath(__file__)), cache_dir=asset_cache_dir)
+
+        if startup is not None:
+            self.frame_source = camera.result()
+            self.hand_tracker = tracker.result()
+            startup.shutdown()
+
+    def open_source(self, source):
+        """Open the frame source; a camera starts streaming on its grab thread right away."""
+        return create_frame_source(source, **self.source_params)
+
+    def set_source_rate(self, fps):
+        """Ask the frame source for `fps` frames per second, None for its full rate."""
+        if self.frame_source is not None:
+            self.frame_source.set_rate(fps)
+
+    def create_quality_controller(self):
+        """Build the quality ladder for the current source, model and display (see build_levels)."""
+        stats = self.frame_source.get_stats()
+        levels = build_levels(
+            resolution=(stats.get("width") or 640, stats.get("height") or 480),
+            model_complexity=self.hand_tracker.model_complexity,
+            render_fps=self.preview_fps if self.display == "preview" else None,
+            can_resize=hasattr(self.frame_source, "set_resolution"),
+            renders=self.display != "headless",
+        )
+        self.quality_settings = levels[0]
+        return QualityController(levels, self.apply_quality, budget_ms=self.quality_budget_ms)
+
+    def apply_quality(self, settings):
+        """Switch capture resolution, landmark model, inference stride and rendering rate to a quality level."""
+        if settings["resolution"] != self.quality_settings["resolution"]:
+            self.frame_source.set_resolution(*settings["resolution"])
+        self.hand_tracker.configure(settings["model_complexity"], settings["inference_stride"])
+        render_fps = settings["render_fps"]
+        self.render_interval = 1.0 / render_fps if render_fps else 0.0
+        if self.preview is not None and render_fps:
+            self.preview.set_fps(render_fps)
+        self.quality_settings = settings
+
+    def create_tracker(self, metrics=None):
+        """Load the hand tracking model and run a warm-up inference."""
+        # Infer every frame while inference fits in the budget, otherwise
+        # skip frames and extrapolate landmarks in between
+        hand_tracker = HandTracker(max_hands=self.max_hands, roi_tracking=True, frame_budget_ms=16,
+                                   metrics=metrics, mirror=not self.flip_frames,
+                                   landmark_pool=self.landmark_pool)
+        with self.timeline.phase("warm_up"):
+            hand_tracker.warm_up()
+        return hand_tracker
+
+    def create_hands_detector(self):
+        """Create the gesture state for the hands of one camera."""
+        engine_factory = None
+        if self.classifier is not None:
+            engine_factory = lambda: ClassifierEngine(self.classifier)
+        return MultiHandGestureDetector(screen_size=(self.screen_width, self.screen_height),
+                                        engine_factory=engine_factory)
+
+    def select_feed(self, feed, hands):
+        """
+        Switch the gesture stage to the hands of one camera feed.
+
+        Args:
+            feed (int): Feed index
+            hands (list): Hands found in the feed's current frame
+        """
+        detector = self.feed_detectors.get(feed)
+        if detector is None:
+            detector = self.feed_detectors[feed] = self.create_hands_detector()
+        self.hands_detector = detector
+        self.current_feed = feed
+        if self.cursor_feed is None and hands:
+            self.cursor_feed = feed
+
     def load_emoji_image(self, image_path):
-        """Load and prepare an emoji image."""
-        full_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), image_path)
+        """Load an emoji image, prepared for blending onto BGR frames."""
         try:
-            img = Image.open(full_path).convert("RGBA")
-            img = img.resize((self.emoji_size, self.emoji_size), Image.LANCZOS)
-            return np.array(img)
+            return self.assets.get(image_path, self.emoji_size)
         except FileNotFoundError:
-            print(f"Warning: Emoji image not found at {full_path}. Displaying placeholder.")
+            print(f"Warning: Emoji image not found at {image_path}. Displaying placeholder.")
             # Create a placeholder image (e.g., a red square)
             placeholder = np.zeros((self.emoji_size, self.emoji_size, 4), dtype=np.uint8)
             placeholder[:, :, 2] = 255  # Red color
             placeholder[:, :, 3] = 128  # Semi-transparent
-            return placeholder
         except Exception as e:
-            print(f"Error loading emoji image {full_path}: {e}")
+            print(f"Error loading emoji image {image_path}: {e}")
             placeholder = np.zeros((self.emoji_size, self.emoji_size, 4), dtype=np.uint8)
             placeholder[:, :, 0] = 255  # Blue color
             placeholder[:, :, 3] = 128
-            return placeholder
+        # Remember the placeholder so the warning is printed once
+        sprite = Sprite(placeholder)
+        self.assets.put(image_path, self.emoji_size, sprite)
+        return sprite
 
     def handle_volume_control(self, volume_change):
         """Handle volume control gestures."""
         if volume_change == 1:
-            pyautogui.press('volumeup')
+            self.input.press('volumeup')
         elif volume_change == -1:
-            pyautogui.press('volumedown')
+            self.input.press('volumedown')
 
     def handle_screenshot(self):
         """Handle screenshot gesture."""
-        pyautogui.hotkey('win', 'shift', 's')
+        self.input.hotkey('win', 'shift', 's')
 
     def handle_tab_switch(self, direction):
         """Handle tab switching gestures."""
         if direction == 1:
-            pyautogui.hotkey('ctrl', 'tab')
+            self.input.hotkey('ctrl', 'tab')
         elif direction == -1:
-            pyautogui.hotkey('ctrl', 'shift', 'tab')
+            self.input.hotkey('ctrl', 'shift', 'tab')
 
     def handle_mic_toggle(self):
         """Handle mic toggle gesture."""
-        pyautogui.press('f4')  # Assuming F4 is your mic mute key
-
-    def display_emoji(self, frame, emoji):
-        """Display emoji on the frame."""
-        if emoji and time.time() - self.emoji_display_time < self.emoji_duration:
-            emoji_img_rgba = self.emoji_images.get(emoji)
-            if emoji_img_rgba is None:
-                return
-            
-            # Calculate position to center the emoji on the frame
-            frame_height, frame_width = frame.shape[:2]
-            x_offset = (frame_width - self.emoji_size) // 2
-            y_offset = (frame_height - self.emoji_size) // 2
-            
-            # Extract RGB and Alpha channels
-            emoji_rgb = emoji_img_rgba[:, :, :3]
-            alpha_channel = emoji_img_rgba[:, :, 3] / 255.0  # Normalize alpha to 0-1
-
-            # Ensure the slice is within bounds and has correct dimensions
-            h_slice = slice(y_offset, y_offset + self.emoji_size)
-            w_slice = slice(x_offset, x_offset + self.emoji_size)
-            
-            # Get the region of interest from the frame
-            roi = frame[h_slice, w_slice]
-
-            # Apply alpha blending for transparency
-            for c in range(3):
-                roi[:, :, c] = roi[:, :, c] * (1 - alpha_channel) + emoji_rgb[:, :, c] * alpha_channel
-
-            frame[h_slice, w_slice] = roi
-
-    def run(self):
-        """Main loop for the virtual mouse application."""
-        print("Starting Virtual Mouse...")
-        print("Press 'q' to quit")
-        
-        while True:
-            # Read frame from webcam
-            success, img = self.cap.read()
-            if not success:
+        self.input.press('f4')  # Assuming F4 is your mic mute key
+
+    @property
+    def gesture_detector(self):
+        """GestureDetector of the primary hand, the one moving the cursor."""
+        return self.hands_detector.primary
+
+    def handle_clicks(self, features, timestamp=None, detector=None):
+        """Dispatch click and drag events from a hand's click state machines (the primary's by default)."""
+        if detector is None:
+            detector = self.gesture_detector
+        if self.hands_detector.clicks_suppressed():
+            # Pinching with both hands zooms; cancel any press without clicking
+            click_event = detector.left_click.reset()
+            detector.right_click.reset()
+        else:
+            click_event = detector.update_click_state(features, timestamp)
+        if click_event == "click":
+            self.input.click()
+        elif click_event == "down":
+            self.input.mouseDown()
+        elif click_event == "up":
+            self.input.mouseUp()
+
+        if not self.hands_detector.clicks_suppressed() and \
+                detector.update_right_click_state(features, timestamp) == "click":
+            self.input.rightClick()
+
+    def show_emoji(self, emoji, timestamp):
+        """Start showing an emoji in the centre of the frame, fading out at the end."""
+        path = self.emoji_image_paths.get(emoji)
+        if path is None:
+            return
+        sprite = self.load_emoji_image(path)
+        self.current_emoji = emoji
+        self.emoji_display_time = timestamp
+        self.overlays.add(sprite, timestamp, self.emoji_duration, fade=self.emoji_fade)
+
+    def display_emoji(self, frame, now=None):
+        """Blend every active emoji overlay onto the frame in place."""
+        self.overlays.render(frame, time.monotonic() if now is None else now)
+
+    def capture_frame(self):
+        """
+        Read the next webcam frame into a pooled buffer, mirrored for the
+        selfie view when `flip_frames` is set (capture stage).
+        """
+        if self.metrics is not None:
+            start = time.monotonic()
+        if self.flip_frames:
+            # The source decodes into its own reused buffer; flip straight into the frame's pooled buffer
+            frame = self.frame_source.read()
+            if frame is None:
                 print("Failed to grab frame")
+                return None
+            read = time.monotonic()
+            timestamp, img = frame
+            img = cv2.flip(img, 1, dst=self.frame_pool.acquire(img.shape))
+        else:
+            # Read straight into the pooled buffer; the tracker mirrors the landmarks
+            buffer = self.frame_pool.acquire(self.frame_shape) if self.frame_shape is not None else None
+            frame = self.frame_source.read(image=buffer)
+            if frame is None:
+                self.frame_pool.release(buffer)
+                print("Failed to grab frame")
+                return None
+            read = time.monotonic()
+            timestamp, img = frame
+            if img is not buffer:
+                # First frame or a new resolution: the frame still belongs to the source
+                self.frame_pool.release(buffer)
+                self.frame_shape = img.shape
+                pooled = self.frame_pool.acquire(img.shape)
+                np.copyto(pooled, img)
+                img = pooled
+        if self.metrics is not None:
+            self.metrics.observe("camera", read - start)
+            self.metrics.observe("flip", time.monotonic() - read)
+        if self.quality_budget_ms is not None:
+            self.arrival_times[id(img)] = read
+        return timestamp, img
+
+    def detect_hands(self, frame):
+        """Run hand tracking on a timestamped frame (inference stage)."""
+        timestamp, img = frame
+        # Keep the undecorated frame for the video log before landmarks are drawn
+        raw = None
+        if self.recorder is not None and self.recorder.video_path:
+            if self.record_buffer is None or self.record_buffer.shape != img.shape:
+                self.record_buffer = np.empty_like(img)
+            raw = self.record_buffer
+            np.copyto(raw, img)
+        if self.idle is not None and not self.idle.should_track(img):
+            # Idle and nothing moved: no hand can have appeared, skip the model
+            hands = []
+            buffer = None
+        else:
+            # Landmarks are drawn by the consumer, only on the frames it shows
+            img, hands = self.hand_tracker.find_all_hands(img, draw=False, timestamp=timestamp)
+            buffer = self.hand_tracker.buffer
+            if self.idle is not None:
+                self.idle.observe(hands)
+        if self.recorder is not None:
+            landmarks = hands[0].landmarks if hands else None
+            self.recorder.write(timestamp, landmarks, frame=raw, frame_size=(img.shape[1], img.shape[0]))
+        return timestamp, img, hands, buffer
+
+    def release_buffers(self, item):
+        """Return the pooled frame (and landmark) buffers of a pipeline item once read or dropped."""
+        self.frame_pool.release(item[1])
+        if len(item) > 3:
+            self.hand_tracker.release(item[3])
+
+    def process_landmarks(self, landmarks, frame_width, frame_height, timestamp=None):
+        """Run the gesture stage on one hand's landmarks, or None if no hand was found."""
+        self.process_hands([Hand(landmarks)] if landmarks is not None else [],
+                           frame_width, frame_height, timestamp)
+
+    def process_hands(self, hands, frame_width, frame_height, timestamp=None):
+        """
+        Run the gesture stage on every hand found in one frame.
+
+        The primary hand moves the cursor and clicks; every hand fires its own
+        action and emoji gestures, and the two oldest hands drive the two-hand
+        gestures.
+        """
+        if timestamp is None:
+            timestamp = time.monotonic()
+        self.event_time = timestamp
+        tracked, lost = self.hands_detector.update(hands, timestamp)
+        moves_cursor = self.current_feed == self.cursor_feed
+        for detector in lost:
+            # Losing a hand releases any press or drag in progress
+            # and restarts cursor smoothing from the next position
+            detector.cursor_filter.reset()
+            if moves_cursor:
+                self.handle_clicks(detector.features, timestamp, detector)
+
+        gestures = self.hands_detector.evaluate_two_hand_gestures(timestamp)
+        self.dispatch_gestures(gestures, timestamp, self.hands_detector.two_hand_engine.held)
+        for hand, detector in tracked:
+            self.handle_gestures(hand.landmarks, detector, frame_width, frame_height, timestamp,
+                                 moves_cursor=moves_cursor)
+        if moves_cursor and not hands and self.current_feed is not None:
+            # Hand the cursor to the next feed that sees a hand
+            self.cursor_feed = None
+
+    def handle_gestures(self, landmarks, detector, frame_width, frame_height, timestamp=None, moves_cursor=True):
+        """
+        Turn one hand's landmarks into cursor movement and clicks (primary hand
+        only) and gesture actions.
+
+        Args:
+            moves_cursor (bool): False for feeds that do not own the cursor (see run_pool)
+        """
+        if timestamp is None:
+            timestamp = time.monotonic()
+        features = detector.features
+        primary = moves_cursor and detector is self.gesture_detector
+
+        if primary:
+            # Get index finger tip position
+            index_tip = landmarks[8]  # Index finger tip landmark
+
+            # Map coordinates to screen
+            x, y = detector.map_to_screen_coordinates(
+                index_tip[0], index_tip[1], frame_width, frame_height
+            )
+
+            # Smooth cursor movement
+            x, y = detector.smooth_cursor_movement(x, y, timestamp)
+
+            # Move cursor
+            self.input.moveTo(x, y)
+
+        # Evaluate all gesture rules in one pass, then dispatch the winners
+        gestures = detector.evaluate_gestures(features, timestamp)
+        if primary:
+            self.handle_clicks(features, timestamp, detector)
+        self.dispatch_gestures(gestures, timestamp, detector.engine.held)
+
+    def dispatch_gestures(self, gestures, timestamp, held=()):
+        """
+        Run the actions of fired gestures and show the first emoji once the previous one expired.
+
+        With an event bus, each gesture is published when it starts firing:
+        hold rules (click, right_click, two_hand_pinch) fire on every frame
+        they are held, and those continued firings are not published again.
+
+        Args:
+            gestures (list): Names of the fired gestures
+            timestamp (float): Capture time of the frame
+            held: Fired hold gestures that already fired on the previous
+                frame (GestureEngine.held of the engine that fired them)
+        """
+        if self.events is not None:
+            for gesture in gestures:
+                if gesture not in held:
+                    self.events.publish(GestureEvent("gesture", timestamp, name=gesture))
+        for gesture in gestures:
+            action = self.gesture_actions.get(gesture)
+            if action is not None:
+                action()
+
+        # Show emoji gestures once the previous emoji has expired
+        if timestamp - self.emoji_display_time > self.emoji_duration:
+            for gesture in gestures:
+                emoji = self.gesture_emojis.get(gesture)
+                if emoji is not None:
+                    self.show_emoji(emoji, timestamp)
+                    break
+
+    def draw_hands(self, img, hands):
+        """Draw the skeleton of every hand onto the frame."""
+        for hand in hands:
+            points = hand.landmarks[:, :2].astype(np.int32)
+            if not self.flip_frames:
+                # The tracker mirrored the landmarks but not the frame
+                points[:, 0] = img.shape[1] - points[:, 0]
+            draw_hand(img, points)
+
+    def draw_stats(self, img, stats, tracker_stats, metrics_summary=None, idle_stats=None, quality_stats=None):
+        """Overlay per-stage throughput, queue depths, tracking counters, idle and quality state and latency percentiles on the frame."""
+        for i, line in enumerate(self.stats_lines(stats, tracker_stats, metrics_summary, idle_stats, quality_stats)):
+            cv2.putText(img, line, (10, 30 + i * 25),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
+
+    def stats_lines(self, stats, tracker_stats, metrics_summary=None, idle_stats=None, quality_stats=None):
+        """Return the HUD text lines drawn by draw_stats."""
+        lines = [
+            f"{name}: {stats[name]['fps']:.0f} fps {stats[name]['avg_ms']:.1f} ms"
+            for name in ("capture", "inference", "action")
+        ]
+        queues = stats["queues"]
+        lines.append(
+            f"queues: {queues['frames']['depth']}/{queues['results']['depth']} "
+            f"dropped: {queues['frames']['dropped']}/{queues['results']['dropped']}"
+        )
+        lines.append(
+            f"tracking: stride {tracker_stats['stride']} "
+            f"predicted {tracker_stats['predicted_ratio']:.0%} "
+            f"inference {tracker_stats['inference_ms']:.1f} ms"
+        )
+        if idle_stats is not None:
+            lines.append(
+                f"idle: {'yes' if idle_stats['idle'] else 'no'} "
+                f"skipped {idle_stats['idle_frames']} wakeups {idle_stats['wakeups']}"
+            )
+        if quality_stats is not None:
+            settings = quality_stats["settings"]
+            lines.append(
+                f"quality: {quality_stats['level']}/{quality_stats['levels'] - 1} "
+                f"{settings['resolution'][0]}x{settings['resolution'][1]} "
+                f"model {settings['model_complexity']} stride {settings['inference_stride']}"
+            )
+        if metrics_summary is not None:
+            lines.extend(
+                f"{stage}: p50 {summary['p50_ms']:.1f} p95 {summary['p95_ms']:.1f} ms"
+                for stage, summary in sorted(metrics_summary.items()) if stage not in ("counters", "gauges")
+            )
+        return lines
+
+    def toggle_pause(self, *args):
+        """Stop or resume sending input; the signal handler for SIGUSR1."""
+        self.paused = not self.paused
+        print("Input paused" if self.paused else "Input resumed", flush=True)
+
+    @contextmanager
+    def control_signals(self):
+        """
+        Quit on SIGINT or SIGTERM and pause input on SIGUSR1 while in the block.
+
+        Works without a window, e.g. `kill -USR1 <pid>` on a headless kiosk.
+        Handlers can only be installed from the main thread; elsewhere the
+        block runs without them.
+        """
+        if threading.current_thread() is not threading.main_thread():
+            yield
+            return
+        handlers = {signal.SIGINT: lambda *args: self.stop_event.set(),
+                    signal.SIGTERM: lambda *args: self.stop_event.set()}
+        if hasattr(signal, "SIGUSR1"):
+            handlers[signal.SIGUSR1] = self.toggle_pause
+        previous = {number: signal.signal(number, handler) for number, handler in handlers.items()}
+        try:
+            yield
+        finally:
+            for number, handler in previous.items():
+                signal.signal(number, handler)
+
+    def release_held_click(self):
+        """Let go of a drag, so nothing stays pressed while input is paused or stopped."""
+        if self.gesture_detector.left_click.reset() == "up":
+            self.input.mouseUp()
+
+    def run(self, show_timeline=False):
+        """
+        Main loop for the virtual mouse application.
+
+        Capture and hand tracking run on worker threads joined by
+        latest-frame-wins queues; gesture actions run here on the main
+        thread, so a slow stage drops stale frames instead of adding latency.
+        Frames are shown according to `display`: drawn and shown here
+        ("window"), handed to a rate-capped PreviewWindow thread
+        ("preview"), or not at all ("headless"). SIGINT and SIGTERM quit and
+        SIGUSR1 pauses input in every mode (see control_signals).
+
+        Args:
+            show_timeline (bool): Print the startup timeline once the cursor first
+                moves (or on exit if no hand was ever seen)
+        """
+        preview = None
+        if self.display == "preview":
+            preview = PreviewWindow(self.preview_fps, mirror=not self.flip_frames, on_quit=self.stop_event.set)
+            preview.start()
+        self.preview = preview
+        if self.quality_budget_ms is not None:
+            self.quality = self.create_quality_controller()
+        self.pipeline = FramePipeline(self.capture_frame, self.detect_hands,
+                                      on_drop=self.release_buffers)
+        self.pipeline.start()
+        metrics = self.metrics
+        last_log = time.monotonic()
+        timeline_pending = show_timeline
+
+        try:
+            with self.control_signals():
+                while self.pipeline.running() and not self.stop_event.is_set():
+                    result = self.pipeline.get()
+                    if result is None:
+                        continue
+
+                    start = time.monotonic()
+                    timestamp, img, hands, _ = result
+                    arrival = self.arrival_times.pop(id(img), timestamp)
+
+                    # Get the frame dimensions
+                    frame_height, frame_width, _ = img.shape
+
+                    if self.paused:
+                        self.release_held_click()
+                    else:
+                        self.process_hands(hands, frame_width, frame_height, timestamp)
+                    if timeline_pending:
+                        self.timeline.mark("first_frame")
+                        if hands:
+                            self.timeline.mark("first_cursor")
+                            print(self.timeline.report())
+                            timeline_pending = False
+                    rendering = time.monotonic()
+                    if metrics is not None:
+                        metrics.observe("gestures", rendering - start)
+
+                    key = None
+                    if self.display == "window" and rendering - self.last_render >= self.render_interval:
+                        self.last_render = rendering
+                        self.draw_hands(img, hands)
+
+                        # Display emoji if active
+                        self.display_emoji(img)
+
+                        # Display per-stage throughput
+                        if self.show_hud:
+                            self.draw_stats(img, self.pipeline.get_stats(), self.hand_tracker.get_stats(),
+                                            metrics.summary() if metrics is not None else None,
+                                            self.idle.get_stats() if self.idle is not None else None,
+                                            self.quality.get_stats() if self.quality is not None else None)
+
+                        # Display the frame
+                        cv2.imshow("Virtual Mouse", img)
+                        key = cv2.waitKey(1) & 0xFF
+                    elif self.display != "window":
+                        # Nothing renders the emoji overlays here, so expire them
+                        self.overlays.prune(rendering)
+                        if preview is not None and preview.due(rendering):
+                            lines = ()
+                            if self.show_hud:
+                                lines = self.stats_lines(self.pipeline.get_stats(), self.hand_tracker.get_stats(),
+                                                         metrics.summary() if metrics is not None else None,
+                                                         self.idle.get_stats() if self.idle is not None else None,
+                                                         self.quality.get_stats() if self.quality is not None else None)
+                            preview.submit(img, hands, rendering, self.overlays.overlays, lines)
+                    self.release_buffers(result)
+                    end = time.monotonic()
+                    self.pipeline.consumer_stats.record(end - start)
+                    if self.quality is not None:
+                        self.quality.observe(end - arrival)
+
+                    if metrics is not None:
+                        metrics.observe("render", end - rendering)
+                        # Capture to display, including time spent waiting in the queues
+                        metrics.observe("frame_latency", end - timestamp)
+                        metrics.inc("frames")
+                        if not hands:
+                            metrics.inc("frames_without_hand")
+                        metrics.set_counter("capture_frames_dropped", self.pipeline.frame_queue.dropped)
+                        metrics.set_counter("results_dropped", self.pipeline.result_queue.dropped)
+                        if self.idle is not None:
+                            metrics.set_counter("idle_frames", self.idle.idle_frames)
+                            metrics.set_counter("idle_wakeups", self.idle.wakeups)
+                        if self.quality is not None:
+                            metrics.set_gauge("quality_level", self.quality.level)
+                        if self.log_interval is not None and end - last_log >= self.log_interval:
+                            print(metrics.log_line(), flush=True)
+                            last_log = end
+
+                    # Break loop on 'q' press
+                    if key == ord('q'):
+                        break
+        finally:
+            if timeline_pending:
+                print(self.timeline.report())
+            # Clean up
+            self.release_held_click()
+            if self.dispatcher is not None:
+                self.dispatcher.close()
+            self.pipeline.stop()
+            if preview is not None:
+                preview.stop()
+            self.frame_source.release()
+            if self.recorder is not None:
+                self.recorder.close()
+            if self.display == "window":
+                cv2.destroyAllWindows()
+
+    def run_pool(self, pool, stats_interval=5.0):
+        """
+        Main loop for several camera feeds tracked by a CameraPool.
+
+        Every feed keeps its own gesture state and preview window, but all
+        of them drive this one input controller. The feed that first sees a
+        hand moves the cursor until that hand is lost. Preview windows are
+        only shown with the "window" display; any other display runs
+        headless. Signals work as in `run`.
+
+        Args:
+            pool (CameraPool): Started pool of camera workers
+            stats_interval (float): Seconds between per-feed latency reports
+                printed as JSON, None disables them
+        """
+        show = self.display == "window"
+        last_report = time.monotonic()
+        try:
+            with self.control_signals():
+                while pool.running() and not self.stop_event.is_set():
+                    frame = pool.get()
+                    if frame is None:
+                        continue
+
+                    img = frame.image
+                    frame_height, frame_width = img.shape[:2]
+                    self.select_feed(frame.feed, frame.hands)
+                    if self.paused:
+                        self.release_held_click()
+                    else:
+                        self.process_hands(frame.hands, frame_width, frame_height, frame.timestamp)
+                    key = None
+                    if show:
+                        self.display_emoji(img)
+                        if self.show_hud:
+                            stats = pool.get_stats()[frame.feed]
+                            cv2.putText(img, f"feed {frame.feed}: {stats['fps']:.0f} fps "
+                                             f"latency p50 {stats['latency_ms']['p50']:.1f} "
+                                             f"p95 {stats['latency_ms']['p95']:.1f} ms",
+                                        (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
+                        cv2.imshow(f"Virtual Mouse {frame.feed}", img)
+                        key = cv2.waitKey(1) & 0xFF
+                    end = time.monotonic()
+                    if not show:
+                        self.overlays.prune(end)
+                    pool.release(frame, end)
+
+                    if stats_interval is not None and end - last_report >= stats_interval:
+                        print(json.dumps({"feeds": pool.get_stats()}), flush=True)
+                        last_report = end
+                    if key == ord('q'):
+                        break
+        finally:
+            if self.cursor_feed is not None:
+                self.select_feed(self.cursor_feed, [])
+                self.release_held_click()
+            if self.dispatcher is not None:
+                self.dispatcher.close()
+            pool.stop()
+            if show:
+                cv2.destroyAllWindows()
+            print(json.dumps({"feeds": pool.get_stats()}, indent=2))
+
+    def replay_landmarks(self, log):
+        """
+        Feed a recorded landmark log through the gesture stage as fast as possible.
+
+        The recorded timestamps drive cursor smoothing, cooldowns and click
+        timing, so a replay produces the same input events on every run.
+
+        Args:
+            log (LandmarkLog): Recorded landmark stream
+
+        Returns:
+            dict: Frame count, gesture-stage throughput and input call counts
+        """
+        frame_width, frame_height = log.frame_size
+        start = time.perf_counter()
+        for timestamp, landmarks in log:
+            self.process_landmarks(landmarks, frame_width, frame_height, timestamp)
+        elapsed = time.perf_counter() - start
+        return self.replay_summary(len(log), elapsed)
+
+    def replay_video(self):
+        """
+        Run every frame of the source through hand tracking and the gesture
+        stage headless, as fast as possible.
+
+        Open the source with `source_params={"realtime": False}` so frames
+        are timestamped from the frame rate instead of the wall clock, which
+        makes frame skipping and gesture timing reproducible.
+
+        Returns:
+            dict: Frame count, end-to-end and gesture-stage throughput, input call counts
+        """
+        frames = 0
+        gesture_time = 0.0
+        start = time.perf_counter()
+        while True:
+            frame = self.frame_source.read()
+            if frame is None:
                 break
-                
-            # Flip the image horizontally for a later selfie-view display
-            img = cv2.flip(img, 1)
-            
-            # Get the frame dimensions
-            frame_height, frame_width, _ = img.shape
-            
-            # Find hands in the frame
-            img, landmarks = self.hand_tracker.find_hands(img)
-            
-            if landmarks:
-                # Get index finger tip position
-                index_tip = landmarks[8]  # Index finger tip landmark
-                
-                # Map coordinates to screen
-                x, y = self.gesture_detector.map_to_screen_coordinates(
-                    index_tip[0], index_tip[1], frame_width, frame_height
-                )
-                
-                # Smooth cursor movement
-                x, y = self.gesture_detector.smooth_cursor_movement(x, y)
-                
-                # Move cursor
-                pyautogui.moveTo(x, y)
-                
-                # Check for click gesture
-                if self.gesture_detector.is_click_gesture(landmarks):
-                    pyautogui.click()
-                    time.sleep(0.2)  # Prevent multiple clicks
-                
-                # Check for right-click gesture
-                if self.gesture_detector.is_right_click_gesture(landmarks):
-                    pyautogui.rightClick()
-                    time.sleep(0.2)  # Prevent multiple clicks
-                
-                # Check for scroll gesture
-                if self.prev_landmarks:
-                    scroll_direction = self.gesture_detector.is_scroll_gesture(
-                        landmarks, self.prev_landmarks
-                    )
-                    if scroll_direction != 0:
-                        pyautogui.scroll(scroll_direction * 10)
-                
-                # Check for volume control gesture
-                volume_change = self.gesture_detector.is_volume_gesture(landmarks)
-                if volume_change != 0:
-                    self.handle_volume_control(volume_change)
-                
-                # Check for screenshot gesture
-                if self.gesture_detector.is_screenshot_gesture(landmarks):
-                    self.handle_screenshot()
-                
-                # Check for tab switch gesture
-                if self.prev_landmarks:
-                    tab_direction = self.gesture_detector.is_tab_switch_gesture(
-                        landmarks, self.prev_landmarks
-                    )
-                    if tab_direction != 0:
-                        self.handle_tab_switch(tab_direction)
-                
-                # Check for mic toggle gesture
-                if self.gesture_detector.is_mic_toggle_gesture(landmarks):
-                    self.handle_mic_toggle()
-                
-                # Check for emoji gestures
-                current_time = time.time()
-                if current_time - self.emoji_display_time > self.emoji_duration:
-                    if self.gesture_detector.is_heart_emoji_gesture(landmarks):
-                        self.current_emoji = "❤️"
-                        self.emoji_display_time = current_time
-                    elif self.gesture_detector.is_smile_emoji_gesture(landmarks):
-                        self.current_emoji = "😊"
-                        self.emoji_display_time = current_time
-                    elif self.gesture_detector.is_thumbs_up_emoji_gesture(landmarks):
-                        self.current_emoji = "👍"
-                        self.emoji_display_time = current_time
-                    elif self.gesture_detector.is_rock_emoji_gesture(landmarks):
-                        self.current_emoji = "🤘"
-                        self.emoji_display_time = current_time
-                    elif self.gesture_detector.is_victory_emoji_gesture(landmarks):
-                        self.current_emoji = "✌️"
-                        self.emoji_display_time = current_time
-                
-                # Update previous landmarks
-                self.prev_landmarks = landmarks
-            
-            # Display emoji if active
-            self.display_emoji(img, self.current_emoji)
-            
-            # Display FPS
-            cv2.putText(img, f"FPS: {int(1/(time.time() - self.prev_time))}", 
-                       (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
-            
-            # Display the frame
-            cv2.imshow("Virtual Mouse", img)
-            
-            # Update previous time
-            self.prev_time = time.time()
-            
-            # Break loop on 'q' press
-            if cv2.waitKey(1) & 0xFF == ord('q'):
-                break
-        
-        # Clean up
-        self.cap.release()
-        cv2.destroyAllWindows()
+            timestamp, img = frame
+            frames += 1
+            img, hands = self.hand_tracker.find_all_hands(img, draw=False, timestamp=timestamp)
+
+            frame_height, frame_width = img.shape[:2]
+            gesture_start = time.perf_counter()
+            self.process_hands(hands, frame_width, frame_height, timestamp)
+            gesture_time += time.perf_counter() - gesture_start
+            self.hand_tracker.release(self.hand_tracker.buffer)
+        elapsed = time.perf_counter() - start
+        self.frame_source.release()
+
+        summary = self.replay_summary(frames, gesture_time)
+        summary["total_fps"] = frames / elapsed if elapsed > 0 else 0.0
+        summary["tracking"] = self.hand_tracker.get_stats()
+        return summary
+
+    def replay_summary(self, frames, gesture_time):
+        """Build the replay report from the frame count and time spent in the gesture stage."""
+        summary = {
+            "frames": frames,
+            "gesture_fps": frames / gesture_time if gesture_time > 0 else 0.0,
+            "gesture_us": gesture_time / frames * 1e6 if frames else 0.0,
+        }
+        if self.dispatcher is not None:
+            self.dispatcher.flush()
+        if isinstance(self.input_backend, InputRecorder):
+            summary["input"] = dict(sorted(self.input_backend.calls.items()))
+        return summary
+
+
+def _event_app(source, bus, params):
+    """Create a VirtualMouse that only publishes events, and the thread that runs it."""
+    params.setdefault("input_backend", InputRecorder())
+    params.setdefault("async_input", False)
+    params.setdefault("display", "headless")
+    params.setdefault("flip_frames", False)
+    app = VirtualMouse(source=source, events=bus, **params)
+
+    def run():
+        try:
+            app.run()
+        finally:
+            # Ends the consumer's iteration once it has the last events
+            bus.close()
+
+    return app, threading.Thread(target=run, name="gestures", daemon=True)
+
+
+def gesture_events(source=0, **params):
+    """
+    Track hands in a frame source and yield the resulting GestureEvent objects.
+
+    The tracking and gesture loop runs headless on a background thread and
+    sends no OS input unless an `input_backend` is given. Iteration ends
+    when the source does; closing the generator stops tracking.
+
+    Example:
+        for event in gesture_events("synthetic"):
+            print(event)
+
+    Args:
+        source: Frame source (see create_frame_source)
+        **params: Further VirtualMouse arguments
+
+    Yields:
+        GestureEvent
+    """
+    bus = EventBus()
+    events = bus.subscribe()
+    app, thread = _event_app(source, bus, params)
+    thread.start()
+    try:
+        yield from events
+    finally:
+        app.stop_event.set()
+        thread.join(timeout=2.0)
+
+
+async def gesture_events_async(source=0, **params):
+    """
+    Async generator version of gesture_events, for use from an asyncio loop.
+
+    Example:
+        async for event in gesture_events_async(0):
+            await queue.put(event)
+    """
+    bus = EventBus()
+    events = bus.subscribe_async()
+    app, thread = _event_app(source, bus, params)
+    thread.start()
+    try:
+        async for event in events:
+            yield event
+    finally:
+        app.stop_event.set()
+        await asyncio.get_running_loop().run_in_executor(None, thread.join, 2.0)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Control the mouse with hand gestures.")
+    parser.add_argument("--camera", default="0", metavar="SOURCE",
+                        help="webcam index, video file, image directory or 'synthetic'")
+    parser.add_argument("--cameras", nargs="+", metavar="SOURCE",
+                        help="track several webcam indices or video files, one worker process each")
+    parser.add_argument("--resolution", default="640x480", metavar="WxH",
+                        help="camera (and synthetic) frame size to request")
+    parser.add_argument("--fps", type=float, default=30.0, help="camera frame rate to request")
+    parser.add_argument("--fourcc", default="MJPG",
+                        help="camera pixel format to request, e.g. MJPG or YUYV; empty keeps the driver's")
+    parser.add_argument("--input", choices=sorted(INPUT_BACKENDS) + ["none"], default="pyautogui",
+                        help="how mouse and keyboard events are sent to the OS; 'none' sends nothing "
+                             "(e.g. when only --events-socket or --events-port consumers need them)")
+    parser.add_argument("--screen-size", default="1920x1080", metavar="WxH",
+                        help="screen size for the uinput and none backends")
+    parser.add_argument("--events-socket", metavar="PATH",
+                        help="publish cursor, button, scroll and gesture events on a Unix socket")
+    parser.add_argument("--events-port", type=int, metavar="PORT",
+                        help="publish the same events over WebSocket at ws://127.0.0.1:PORT")
+    parser.add_argument("--events-tick", type=float, default=0.0, metavar="SECONDS",
+                        help="send each event client at most one batch every SECONDS, merging more "
+                             "cursor moves per batch; 0 sends as soon as events arrive")
+    parser.add_argument("--record", metavar="PATH", help="write timestamped landmarks to an .npz log")
+    parser.add_argument("--record-video", metavar="PATH", help="also write the raw frames to a video file")
+    parser.add_argument("--replay", metavar="PATH",
+                        help="replay an .npz landmark log or a video headless and print a JSON summary")
+    parser.add_argument("--metrics", action="store_true",
+                        help="collect per-stage latency histograms and show percentiles on the HUD")
+    parser.add_argument("--metrics-port", type=int, metavar="PORT",
+                        help="serve metrics in Prometheus text format at http://127.0.0.1:PORT/metrics")
+    parser.add_argument("--metrics-log", type=float, metavar="SECONDS",
+                        help="print a JSON metrics log line every SECONDS")
+    parser.add_argument("--max-hands", type=int, default=2, metavar="N",
+                        help="number of hands to track; two enable zoom, rotate and heart gestures")
+    parser.add_argument("--gesture-model", metavar="PATH",
+                        help="recognise gestures with a classifier trained by train_classifier.py")
+    parser.add_argument("--idle-after", type=int, default=30, metavar="N",
+                        help="pause hand tracking after N frames without a hand until motion is seen (0 disables)")
+    parser.add_argument("--idle-fps", type=float, default=5.0,
+                        help="frame rate to capture at while idle")
+    parser.add_argument("--display", choices=DISPLAY_MODES, default="window",
+                        help="draw and show every frame, show a rate-capped preview rendered on its own "
+                             "thread, or run headless without drawing anything")
+    parser.add_argument("--preview-fps", type=float, default=10.0,
+                        help="frame rate cap of --display preview")
+    parser.add_argument("--latency-budget", type=float, metavar="MS",
+                        help="step resolution, landmark model, inference stride and preview rate down (and back up) "
+                             "to keep per-frame latency under MS")
+    parser.add_argument("--no-hud", action="store_true", help="do not draw stats on the preview")
+    parser.add_argument("--startup-timeline", action="store_true",
+                        help="print how long each startup phase took, up to the first cursor movement")
+    args = parser.parse_args()
+    if args.cameras and args.display == "preview":
+        parser.error("--display preview is not supported with --cameras, use window or headless")
+    return args
+
 
 if __name__ == "__main__":
-    virtual_mouse = VirtualMouse()
-    virtual_mouse.run() 
\ No newline at end of file
+    args = parse_args()
+    classifier = load_classifier(args.gesture_model) if args.gesture_model else None
+    width, height = args.resolution.lower().split("x")
+    source_params = {"width": int(width), "height": int(height), "fps": args.fps, "fourcc": args.fourcc or None}
+    if args.replay:
+        # Replays never touch the real mouse or keyboard
+        if args.replay.endswith(".npz"):
+            virtual_mouse = VirtualMouse(source=None, input_backend=InputRecorder(), async_input=False,
+                                         classifier=classifier)
+            summary = virtual_mouse.replay_landmarks(LandmarkLog(args.replay))
+        else:
+            # Frames as fast as they decode, stamped from the frame rate
+            source_params["realtime"] = False
+            virtual_mouse = VirtualMouse(source=args.replay, input_backend=InputRecorder(), async_input=False,
+                                         max_hands=args.max_hands, classifier=classifier,
+                                         source_params=source_params)
+            summary = virtual_mouse.replay_video()
+        print(json.dumps(summary, indent=2))
+    else:
+        recorder = None
+        if args.record or args.record_video:
+            recorder = LandmarkRecorder(args.record or "landmarks.npz", video_path=args.record_video)
+        metrics = None
+        if args.metrics or args.metrics_port is not None or args.metrics_log is not None:
+            metrics = MetricsRegistry()
+        if args.metrics_port is not None:
+            MetricsServer(metrics, port=args.metrics_port).start()
+        params = {}
+        if args.input in ("uinput", "none"):
+            width, height = args.screen_size.lower().split("x")
+            params["screen_size"] = (int(width), int(height))
+        if args.input == "none":
+            input_backend = InputRecorder(**params)
+        else:
+            input_backend = create_input_backend(args.input, **params)
+        events = None
+        if args.events_socket or args.events_port is not None:
+            events = EventBus()
+            event_server = EventServer(events, unix_path=args.events_socket, port=args.events_port,
+                                       tick=args.events_tick)
+            event_server.start()
+        if args.cameras:
+            # Each feed is captured and tracked in its own process; only gestures run here
+            pool = CameraPool(args.cameras, max_hands=args.max_hands,
+                              draw=not args.no_hud and args.display == "window", source_params=source_params)
+            pool.start()
+            virtual_mouse = VirtualMouse(source=None, input_backend=input_backend,
+                                         show_hud=not args.no_hud, max_hands=args.max_hands,
+                                         classifier=classifier, display=args.display, events=events)
+            print(f"Starting Virtual Mouse on {len(pool.sources)} feeds...")
+            # Feeds are only shown in the window display
+            print(KEY_HINT if args.display == "window" else SIGNAL_HINT)
+            virtual_mouse.run_pool(pool)
+        else:
+            timeline = StartupTimeline(origin=IMPORT_START)
+            timeline.add("imports", IMPORT_START, IMPORT_END)
+            virtual_mouse = VirtualMouse(source=args.camera, input_backend=input_backend,
+                                         recorder=recorder, metrics=metrics,
+                                         show_hud=not args.no_hud, log_interval=args.metrics_log,
+                                         timeline=timeline, max_hands=args.max_hands, classifier=classifier,
+                                         source_params=source_params,
+                                         idle_after=args.idle_after or None, idle_fps=args.idle_fps,
+                                         # Only the window and recorded videos need flipped pixels;
+                                         # otherwise the landmarks are mirrored instead
+                                         flip_frames=args.display == "window" or bool(args.record_video),
+                                         display=args.display, preview_fps=args.preview_fps,
+                                         quality_budget_ms=args.latency_budget, events=events)
+            timeline.mark("ready")
+            print("Starting Virtual Mouse...")
+            print(f"Frame source: {json.dumps(virtual_mouse.frame_source.get_stats())}")
+            print(SIGNAL_HINT if args.display == "headless" else KEY_HINT)
+            virtual_mouse.run(show_timeline=args.startup_timeline)
+        if events is not None:
+            event_server.stop() 
\ No newline at end of file
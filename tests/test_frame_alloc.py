@@ -0,0 +1,69 @@
+import sys
+import tracemalloc
+import types
+
+import pytest
+
+from main import VirtualMouse
+from utils.recorder import InputRecorder
+
+# Per-frame bookkeeping (Hand objects, result lists, stats) is allowed; a
+# single 640x480 BGR frame is 900 KiB, so any per-frame copy fails
+MAX_BYTES = 64 * 1024
+
+
+def fake_mediapipe():
+    """A mediapipe module whose Hands model finds the same confident hand in every image."""
+    landmark = [types.SimpleNamespace(x=0.4 + 0.01 * (i % 5), y=0.4 + 0.02 * (i // 5), z=0.0) for i in range(21)]
+    results = types.SimpleNamespace(
+        multi_hand_landmarks=[types.SimpleNamespace(landmark=landmark)],
+        multi_handedness=[types.SimpleNamespace(classification=[types.SimpleNamespace(label="Right", score=0.95)])],
+    )
+
+    class Hands:
+        def __init__(self, **kwargs):
+            pass
+
+        def process(self, image):
+            return results
+
+        def close(self):
+            pass
+
+    hands = types.SimpleNamespace(Hands=Hands, HAND_CONNECTIONS=())
+    return types.SimpleNamespace(solutions=types.SimpleNamespace(hands=hands, drawing_utils=None))
+
+
+@pytest.mark.parametrize("flip_frames", [True, False])
+def test_steady_state_capture_and_tracking_do_not_allocate(monkeypatch, flip_frames):
+    monkeypatch.setitem(sys.modules, "mediapipe", fake_mediapipe())
+    app = VirtualMouse(source="synthetic", input_backend=InputRecorder(), async_input=False, display="headless",
+                       flip_frames=flip_frames, idle_after=None, source_params={"realtime": False})
+
+    def step():
+        item = app.detect_hands(app.capture_frame())
+        app.release_buffers(item)
+        return item
+
+    try:
+        # Fill the pools and settle region tracking first
+        for _ in range(20):
+            step()
+        allocated = []
+        tracemalloc.start()
+        try:
+            # Long enough to cover region frames and the periodic full-frame rescans
+            for _ in range(50):
+                before = tracemalloc.get_traced_memory()[0]
+                tracemalloc.reset_peak()
+                _, _, hands, _ = step()
+                allocated.append(tracemalloc.get_traced_memory()[1] - before)
+                assert len(hands) == 1
+        finally:
+            tracemalloc.stop()
+    finally:
+        app.frame_source.release()
+
+    assert max(allocated) < MAX_BYTES
+    stats = app.hand_tracker.get_stats()
+    assert stats["roi_frames"] > 0 and stats["full_frames"] > 0
@@ -0,0 +1,80 @@
+import types
+
+import numpy as np
+
+from utils.gesture_utils import TWO_HAND_FEATURES, GestureDetector, MultiHandGestureDetector
+
+SWIPES = {"tab_next", "tab_previous", "flick_left", "flick_right", "scroll_up", "scroll_down"}
+
+
+def open_hand(x, y):
+    """Landmarks of an upright open hand, 100 px tall, with the wrist at (x, y)."""
+    landmarks = np.zeros((21, 3), dtype=np.float32)
+    for finger in range(5):
+        for joint in range(4):
+            landmarks[1 + 4 * finger + joint] = (x - 40 + 20 * finger, y - 25 * (joint + 1), 0)
+    landmarks[0] = (x, y, 0)
+    return landmarks
+
+
+def hand(landmarks, track_id):
+    return types.SimpleNamespace(landmarks=landmarks, track_id=track_id)
+
+
+def run(detector, frames, fps=30.0, start=0):
+    """Feed frames (lists of hands) and return every per-hand gesture that fired."""
+    fired = []
+    for i, hands in enumerate(frames, start):
+        now = i / fps
+        tracked, _ = detector.update(hands, now)
+        for _, hand_detector in tracked:
+            fired += hand_detector.evaluate_gestures(hand_detector.features, now)
+    return fired
+
+
+def test_hand_lost_and_back_elsewhere_is_not_a_swipe():
+    detector = MultiHandGestureDetector(screen_size=(1920, 1080))
+    frames = [[hand(open_hand(100, 400), 0)]] * 15 + [[]] * 2 + [[hand(open_hand(550, 400), 0)]] * 15
+    assert SWIPES.isdisjoint(run(detector, frames))
+
+
+def test_reused_detector_starts_a_new_history():
+    detector = MultiHandGestureDetector(screen_size=(1920, 1080))
+    run(detector, [[hand(open_hand(100, 400), 0)]] * 15)
+    # Track 0 disappears; the next new track, far away, gets its detector
+    fired = run(detector, [[]] + [[hand(open_hand(550, 400), 1)]] * 15, start=15)
+    assert SWIPES.isdisjoint(fired)
+
+
+def pinching_hand(x, y):
+    landmarks = open_hand(x, y)
+    landmarks[4] = landmarks[8] + (6, 0, 0)
+    return landmarks
+
+
+def test_two_hand_motion_waits_for_a_whole_window():
+    detector = MultiHandGestureDetector(screen_size=(1920, 1080))
+    fired = []
+    # Both hands pinch and move apart fast enough to zoom from the first frames
+    for i in range(15):
+        now = i / 30.0
+        detector.update([hand(pinching_hand(300 - 10 * i, 400), 0), hand(pinching_hand(600 + 10 * i, 400), 1)], now)
+        fired.append(detector.evaluate_two_hand_gestures(now))
+        features = detector.two_hand_features
+        if now < 0.25:
+            assert TWO_HAND_FEATURES["hands_spread"](features) is None
+            assert TWO_HAND_FEATURES["hands_rotation"](features) is None
+    first = next(i for i, gestures in enumerate(fired) if "zoom_in" in gestures)
+    assert first / 30.0 >= 0.25
+
+
+def test_hold_rules_report_continued_firings_as_held():
+    detector = GestureDetector(screen_size=(1920, 1080))
+    clicks, held = [], []
+    for i, landmarks in enumerate([pinching_hand(300, 400)] * 3 + [open_hand(300, 400), pinching_hand(300, 400)]):
+        features = detector.update_features(landmarks, i / 30.0)
+        clicks.append("click" in detector.evaluate_gestures(features, i / 30.0))
+        held.append(set(detector.engine.held))
+    # The click hold rule fires on every pinched frame, but only its first firing is new
+    assert clicks == [True, True, True, False, True]
+    assert held == [set(), {"click"}, {"click"}, set(), set()]
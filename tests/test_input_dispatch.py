@@ -0,0 +1,60 @@
+import types
+
+from utils.input_dispatch import UinputBackend, XdotoolBackend
+
+
+def make_xdotool(monkeypatch):
+    monkeypatch.setattr("shutil.which", lambda executable: "/usr/bin/xdotool")
+    backend = XdotoolBackend()
+    calls = []
+    backend._run = lambda *args: calls.append(args)
+    return backend, calls
+
+
+def test_xdotool_gesture_hotkeys(monkeypatch):
+    backend, calls = make_xdotool(monkeypatch)
+    backend.hotkey("ctrl", "+")
+    backend.hotkey("ctrl", "-")
+    backend.hotkey("alt", "left")
+    backend.hotkey("alt", "right")
+    backend.hotkey("win", "shift", "s")
+    assert calls == [("key", "ctrl+plus"), ("key", "ctrl+minus"), ("key", "alt+Left"), ("key", "alt+Right"),
+                     ("key", "super+shift+s")]
+
+
+def test_xdotool_keys(monkeypatch):
+    backend, calls = make_xdotool(monkeypatch)
+    backend.press("f4")
+    backend.press("volumeup")
+    assert calls == [("key", "F4"), ("key", "XF86AudioRaiseVolume")]
+
+
+# The evdev codes the backend uses, without needing evdev or /dev/uinput
+ECODES = {"KEY_LEFTCTRL": 29, "KEY_LEFTALT": 56, "KEY_EQUAL": 13, "KEY_MINUS": 12, "KEY_LEFT": 105,
+          "KEY_RIGHT": 106, "KEY_F4": 62}
+
+
+def make_uinput():
+    backend = UinputBackend.__new__(UinputBackend)
+    backend.ecodes = types.SimpleNamespace(ecodes=ECODES, EV_KEY=1)
+    events = []
+    backend._emit = events.extend
+    return backend, events
+
+
+def test_uinput_gesture_hotkeys():
+    backend, events = make_uinput()
+    for keys, codes in [(("ctrl", "+"), (29, 13)), (("ctrl", "-"), (29, 12)),
+                        (("alt", "left"), (56, 105)), (("alt", "right"), (56, 106))]:
+        events.clear()
+        backend.hotkey(*keys)
+        pressed = [code for _, code, value in events if value == 1]
+        released = [code for _, code, value in events if value == 0]
+        assert pressed == list(codes)
+        assert released == list(reversed(codes))
+
+
+def test_uinput_function_key():
+    backend, events = make_uinput()
+    backend.press("f4")
+    assert [(code, value) for _, code, value in events] == [(62, 1), (62, 0)]
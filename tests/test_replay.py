@@ -0,0 +1,52 @@
+import numpy as np
+
+from main import VirtualMouse
+from utils.events import EventBus
+from utils.recorder import InputRecorder, LandmarkLog, LandmarkRecorder
+
+FPS = 30.0
+
+
+def open_hand(x, y):
+    """Landmarks of an upright open hand, 100 px tall, with the wrist at (x, y)."""
+    landmarks = np.zeros((21, 3), dtype=np.float32)
+    for finger in range(5):
+        for joint in range(4):
+            landmarks[1 + 4 * finger + joint] = (x - 40 + 20 * finger, y - 25 * (joint + 1), 0)
+    landmarks[0] = (x, y, 0)
+    return landmarks
+
+
+def pinch(x, y):
+    """An open hand with the thumb tip next to the index fingertip, close enough to click."""
+    landmarks = open_hand(x, y)
+    landmarks[4] = landmarks[8] + (6, 0, 0)
+    return landmarks
+
+
+def record(path, frames):
+    recorder = LandmarkRecorder(str(path))
+    for i, landmarks in enumerate(frames):
+        recorder.write(i / FPS, landmarks, frame_size=(640, 480))
+    recorder.close()
+
+
+def test_replayed_log_gives_the_same_gestures_and_clicks(tmp_path):
+    # Hold an open hand, pinch briefly, let go, lose the hand, then swipe right
+    frames = ([open_hand(300, 300)] * 15 + [pinch(300, 300)] * 4 + [open_hand(300, 300)] * 15 + [None] * 3
+              + [open_hand(200 + 20 * i, 300) for i in range(15)] + [open_hand(500, 300)] * 10)
+    record(tmp_path / "session.npz", frames)
+
+    bus = EventBus()
+    events = bus.subscribe()
+    recorder = InputRecorder()
+    app = VirtualMouse(source=None, input_backend=recorder, async_input=False, asset_cache_dir=False, events=bus)
+    summary = app.replay_landmarks(LandmarkLog(str(tmp_path / "session.npz")))
+    bus.close()
+
+    assert summary["frames"] == len(frames)
+    gestures = [(round(event.timestamp * FPS), event.name) for event in events if event.kind == "gesture"]
+    assert gestures == [(0, "victory"), (15, "click"), (30, "victory"), (45, "tab_next"), (60, "victory")]
+    assert recorder.sequence == ["click", "hotkey:ctrl+tab"]
+    # The cursor follows every frame with a hand
+    assert recorder.calls["moveTo"] == sum(landmarks is not None for landmarks in frames)
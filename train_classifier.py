@@ -0,0 +1,162 @@
+"""
+Train and evaluate the gesture classifier used by `main.py --gesture-model`.
+
+Training data are landmark logs recorded with `main.py --record`, one
+gesture per log, given as LABEL=PATH. Label frames without a gesture
+"none". The last part of every log is held out to report accuracy, so a
+classifier is never scored on frames next to the ones it was trained on.
+
+Usage:
+    python train_classifier.py train click=click.npz none=idle.npz ... [--model mlp] [--output gestures.npz]
+    python train_classifier.py eval gestures.npz click=click2.npz none=idle2.npz ...
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils.classifier import BACKGROUND, CLASSIFIERS, ClassifierEngine, load_classifier, save_classifier
+from utils.gesture_utils import POSE_INDICES, HandFeatures
+from utils.recorder import LandmarkLog
+
+
+def parse_sessions(specs):
+    """Split LABEL=PATH arguments into (label, path) pairs."""
+    sessions = []
+    for spec in specs:
+        label, sep, path = spec.partition("=")
+        if not sep or not label or not path:
+            raise SystemExit(f"Expected LABEL=PATH, got {spec!r}")
+        sessions.append((label, path))
+    return sessions
+
+
+def evaluate(model, sessions, window=5, min_confidence=0.6):
+    """
+    Score a classifier on labelled logs, frame by frame and after smoothing.
+
+    Args:
+        model: Trained classifier
+        sessions (list): (label, landmark log path or list of (21, 3) arrays) pairs
+        window (int): Smoothing window of the ClassifierEngine
+        min_confidence (float): Confidence threshold of the ClassifierEngine
+
+    Returns:
+        dict: Frame and smoothed accuracy, per-label accuracy and per-frame latency
+    """
+    frames = correct = smoothed_correct = 0
+    per_label = {}
+    latencies = []
+    features = HandFeatures()
+    pose = np.zeros(len(POSE_INDICES), dtype=np.float32)
+    for label, stream in sessions:
+        if isinstance(stream, str):
+            stream = [landmarks for _, landmarks in LandmarkLog(stream) if landmarks is not None]
+        # Every gesture fires on entry, so zero cooldown keeps the label tracking each frame
+        engine = ClassifierEngine(model, rules=[], window=window, min_confidence=min_confidence, cooldown=0.0)
+        hits = 0
+        for i, landmarks in enumerate(stream):
+            start = time.perf_counter()
+            features.update(landmarks)
+            engine.evaluate(features, now=float(i))
+            latencies.append(time.perf_counter() - start)
+
+            predicted = model.labels[int(model.predict_proba(features.pose_vector(out=pose)).argmax())]
+            correct += predicted == label
+            smoothed = engine.label if engine.label is not None else BACKGROUND
+            hits += smoothed == label
+        frames += len(stream)
+        smoothed_correct += hits
+        total, label_hits = per_label.get(label, (0, 0))
+        per_label[label] = (total + len(stream), label_hits + hits)
+
+    latencies = np.array(latencies) * 1e6
+    return {
+        "frames": frames,
+        "accuracy": correct / frames if frames else 0.0,
+        "smoothed_accuracy": smoothed_correct / frames if frames else 0.0,
+        "per_label": {label: hits / total if total else 0.0 for label, (total, hits) in sorted(per_label.items())},
+        "latency_us": {
+            "mean": float(latencies.mean()) if frames else 0.0,
+            "p99": float(np.percentile(latencies, 99)) if frames else 0.0,
+        },
+    }
+
+
+def train(args):
+    sessions = parse_sessions(args.sessions)
+    labels = sorted({label for label, _ in sessions})
+    train_x, train_y, held_out = [], [], []
+    for label, path in sessions:
+        landmarks = [lm.copy() for _, lm in LandmarkLog(path) if lm is not None]
+        split = int(len(landmarks) * (1 - args.holdout))
+        features = HandFeatures()
+        poses = [features.update(lm).pose_vector() for lm in landmarks[:split]]
+        train_x.extend(poses)
+        train_y.extend([labels.index(label)] * len(poses))
+        held_out.append((label, landmarks[split:]))
+    if not train_x:
+        raise SystemExit("No frames with a hand in the training logs")
+
+    start = time.perf_counter()
+    if args.model == "mlp":
+        model = CLASSIFIERS["mlp"].train(train_x, train_y, labels, hidden=args.hidden, epochs=args.epochs)
+    else:
+        model = CLASSIFIERS["knn"].train(train_x, train_y, labels, k=args.k)
+    train_seconds = time.perf_counter() - start
+    save_classifier(model, args.output)
+
+    summary = {
+        "model": args.model,
+        "output": args.output,
+        "labels": labels,
+        "train_frames": len(train_x),
+        "train_seconds": train_seconds,
+        "holdout": evaluate(model, held_out, args.window, args.min_confidence),
+    }
+    print(json.dumps(summary, indent=2))
+
+
+def evaluate_command(args):
+    model = load_classifier(args.weights)
+    summary = evaluate(model, parse_sessions(args.sessions), args.window, args.min_confidence)
+    summary["model"] = model.kind
+    print(json.dumps(summary, indent=2))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    train_parser = commands.add_parser("train", help="train a classifier and report held-out accuracy")
+    train_parser.add_argument("sessions", nargs="+", metavar="LABEL=PATH", help="labelled landmark logs")
+    train_parser.add_argument("--model", choices=sorted(CLASSIFIERS), default="mlp", help="classifier type")
+    train_parser.add_argument("--output", default="gestures.npz", help="weights file to write")
+    train_parser.add_argument("--holdout", type=float, default=0.2,
+                              help="fraction at the end of every log kept for evaluation")
+    train_parser.add_argument("--hidden", type=int, default=32, help="MLP hidden layer width")
+    train_parser.add_argument("--epochs", type=int, default=400, help="MLP training steps")
+    train_parser.add_argument("--k", type=int, default=5, help="k-NN neighbour count")
+    train_parser.set_defaults(func=train)
+
+    eval_parser = commands.add_parser("eval", help="report accuracy and latency of a trained classifier")
+    eval_parser.add_argument("weights", help="weights file written by train")
+    eval_parser.add_argument("sessions", nargs="+", metavar="LABEL=PATH", help="labelled landmark logs")
+    eval_parser.set_defaults(func=evaluate_command)
+
+    for command in (train_parser, eval_parser):
+        command.add_argument("--window", type=int, default=5, help="frames the predictions are smoothed over")
+        command.add_argument("--min-confidence", type=float, default=0.6,
+                             help="mean probability a gesture needs after smoothing")
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
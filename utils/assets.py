@@ -0,0 +1,120 @@
+import hashlib
+import os
+from collections import OrderedDict
+
+import numpy as np
+
+from utils.overlay import Sprite
+
+
+def default_cache_dir():
+    """Return the per-user directory for preprocessed assets."""
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "virtual-mouse")
+
+
+class AssetManager:
+    def __init__(self, root, cache_dir=None, max_items=32):
+        """
+        Lazily load image assets as blend-ready sprites.
+
+        Sprites are created on first use and kept in an LRU keyed by
+        (path, size). Preprocessed (resized, premultiplied) pixels are also
+        written to `.npy` files keyed by the source file's mtime and content
+        hash, so later runs memory-map them instead of decoding and resizing
+        the PNG again. Changing the source file changes the key, so stale
+        entries are never read.
+
+        Args:
+            root (str): Directory asset paths are relative to
+            cache_dir (str): Directory for the `.npy` cache, None uses the
+                per-user cache directory; False disables the disk cache
+            max_items (int): Number of sprites kept in memory
+        """
+        self.root = root
+        self.cache_dir = default_cache_dir() if cache_dir is None else cache_dir
+        self.max_items = max_items
+        self.sprites = OrderedDict()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def get(self, path, size):
+        """
+        Return the sprite for an image at a size, loading it if needed.
+
+        Args:
+            path (str): Image path relative to `root`
+            size (int): Width and height to resize the image to
+
+        Returns:
+            Sprite: The blend-ready image
+
+        Raises:
+            FileNotFoundError: If the image does not exist
+        """
+        key = (path, size)
+        sprite = self.sprites.get(key)
+        if sprite is not None:
+            self.sprites.move_to_end(key)
+            self.hits += 1
+            return sprite
+
+        sprite = self._load(os.path.join(self.root, path), size)
+        self.put(path, size, sprite)
+        return sprite
+
+    def put(self, path, size, sprite):
+        """Store a sprite in the in-memory LRU, e.g. a placeholder for a missing asset."""
+        self.sprites[(path, size)] = sprite
+        self.sprites.move_to_end((path, size))
+        while len(self.sprites) > self.max_items:
+            self.sprites.popitem(last=False)
+
+    def _cache_path(self, full_path, size):
+        """Return the cache file for a source image, keyed by its mtime and content hash."""
+        with open(full_path, "rb") as f:
+            digest = hashlib.sha1(f.read())
+        digest.update(str(os.stat(full_path).st_mtime_ns).encode())
+        name = os.path.splitext(os.path.basename(full_path))[0]
+        return os.path.join(self.cache_dir, f"{name}-{size}-{digest.hexdigest()[:16]}.npy")
+
+    def _load(self, full_path, size):
+        """Load a sprite from the disk cache, or decode and preprocess the source image."""
+        cache_path = self._cache_path(full_path, size) if self.cache_dir else None
+        if cache_path is not None and os.path.exists(cache_path):
+            try:
+                sprite = Sprite.from_premultiplied(np.load(cache_path, mmap_mode="r"))
+                self.disk_hits += 1
+                return sprite
+            except (OSError, ValueError):
+                pass  # Corrupt or truncated entry: rebuild it below
+
+        self.misses += 1
+        # PIL is only needed when the cache misses
+        from PIL import Image
+        img = Image.open(full_path).convert("RGBA")
+        img = img.resize((size, size), Image.LANCZOS)
+        # Frames are BGR
+        sprite = Sprite(np.array(img)[:, :, [2, 1, 0, 3]])
+
+        if cache_path is not None:
+            try:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                # Write then rename, so a concurrent reader never sees a partial file
+                tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+                with open(tmp_path, "wb") as f:
+                    np.save(f, sprite.premultiplied())
+                os.replace(tmp_path, cache_path)
+            except OSError as e:
+                print(f"Warning: could not write asset cache {cache_path}: {e}")
+        return sprite
+
+    def get_stats(self):
+        """Return cache counters."""
+        return {
+            "items": len(self.sprites),
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+        }
@@ -0,0 +1,328 @@
+import functools
+import multiprocessing
+import queue
+import sys
+import time
+from multiprocessing import shared_memory
+
+import cv2
+import numpy as np
+
+from utils.frame_source import create_frame_source
+from utils.hand_tracker import HandTracker
+from utils.metrics import Histogram
+from utils.pipeline import StageStats
+
+
+class FeedFrame:
+    def __init__(self, feed, slot, timestamp, image, hands, inference_ms, worker_dropped):
+        """
+        One tracked frame of a camera feed, handed from a worker to the controller.
+
+        `image` is a view into shared memory that the worker reuses once the
+        frame is passed back with CameraPool.release, so it must not be kept
+        (or must be copied) after that.
+
+        Args:
+            feed (int): Index of the feed in CameraPool.sources
+            slot (int): Shared-memory slot holding the image
+            timestamp (float): time.monotonic() capture time, comparable across processes
+            image: (H, W, 3) uint8 BGR frame with landmarks drawn
+            hands (list): Hand objects found in the frame
+            inference_ms (float): Hand tracking time in the worker
+            worker_dropped (int): Frames the worker discarded so far for want of a free slot
+        """
+        self.feed = feed
+        self.slot = slot
+        self.timestamp = timestamp
+        self.image = image
+        self.hands = hands
+        self.inference_ms = inference_ms
+        self.worker_dropped = worker_dropped
+
+
+def _feed_worker(feed, source, memory_name, slot_bytes, free_slots, results, stop_event,
+                 tracker_factory, draw, source_params):
+    """
+    Capture and track one feed in its own process.
+
+    Every frame is flipped or copied straight into a free shared-memory slot,
+    tracked in place there, and announced to the controller with a small
+    message; only the landmarks are pickled. When the controller holds every
+    slot the frame is discarded before inference, so a slow controller
+    never makes a feed fall behind.
+    """
+    memory = shared_memory.SharedMemory(name=memory_name)
+    frame_source = None
+    try:
+        tracker = tracker_factory()
+        tracker.warm_up()
+        try:
+            frame_source = create_frame_source(source, **source_params)
+        except RuntimeError as e:
+            results.put(("error", feed, str(e)))
+            return
+        # Camera frames are mirrored for the selfie view like the single-camera loop; files are not
+        mirror = frame_source.camera
+        results.put(("ready", feed, None))
+
+        dropped = 0
+        while not stop_event.is_set():
+            # Decoded into the source's own buffer, then flipped or copied into a slot
+            frame = frame_source.read()
+            if frame is None:
+                break
+            timestamp, img = frame
+            if not frame_source.camera:
+                # Latency is measured on the monotonic clock, which unpaced file timestamps are not on
+                timestamp = time.monotonic()
+            if img.nbytes > slot_bytes:
+                results.put(("error", feed, f"{img.shape[1]}x{img.shape[0]} frames do not fit the "
+                                            f"{slot_bytes}-byte frame slots"))
+                return
+            try:
+                slot = free_slots.get_nowait()
+            except queue.Empty:
+                dropped += 1
+                continue
+
+            frame = np.ndarray(img.shape, dtype=np.uint8, buffer=memory.buf, offset=slot * slot_bytes)
+            if mirror:
+                cv2.flip(img, 1, dst=frame)
+            else:
+                np.copyto(frame, img)
+            start = time.perf_counter()
+            _, hands = tracker.find_all_hands(frame, draw=draw, timestamp=timestamp)
+            inference_ms = (time.perf_counter() - start) * 1000.0
+            del frame
+            results.put(("frame", feed, (slot, timestamp, img.shape, hands, inference_ms, dropped)))
+        results.put(("end", feed, None))
+    except Exception as e:
+        results.put(("error", feed, f"{type(e).__name__}: {e}"))
+    finally:
+        if frame_source is not None:
+            frame_source.release()
+        try:
+            memory.close()
+        except BufferError:
+            # The tracker still references the last frame; the process exits next anyway
+            pass
+
+
+class CameraPool:
+    def __init__(self, sources, max_hands=2, slots=3, max_frame_size=(1920, 1080), draw=True,
+                 tracker_factory=None, start_method="spawn", source_params=None):
+        """
+        Track several camera feeds in parallel, one worker process per feed.
+
+        Each worker owns its capture device and HandTracker, so tracking
+        scales with the number of cores instead of sharing one GIL. Frames
+        come back through a block of shared memory per feed, split into
+        `slots` frame buffers that are handed back and forth through a queue
+        of free slot numbers, so pixels are never pickled. All feeds report
+        to one results queue read by a single controller with `get`.
+
+        Like LatestQueue, the newest frame of a feed wins: a frame that is
+        superseded before the controller gets to it is released unprocessed.
+
+        Args:
+            sources (list): Camera indices, video files or image directories
+                (see create_frame_source)
+            max_hands (int): Hands tracked per feed
+            slots (int): Frame buffers per feed; three let the worker write one
+                while the controller holds one and one waits
+            max_frame_size (tuple): Largest (width, height) a feed may deliver
+            draw (bool): Draw landmarks onto the frames in the workers
+            tracker_factory (callable): Picklable callable returning a tracker
+                with the HandTracker API, run in each worker; defaults to a
+                HandTracker like the single-camera loop uses
+            start_method (str): multiprocessing start method; "spawn" keeps
+                the workers free of the controller's threads
+            source_params (dict): Keyword arguments for create_frame_source in
+                each worker; files are read paced in real time by default
+        """
+        self.sources = list(sources)
+        self.slots = slots
+        width, height = max_frame_size
+        self.slot_bytes = width * height * 3
+        self.draw = draw
+        self.source_params = source_params or {}
+        if tracker_factory is None:
+            tracker_factory = functools.partial(HandTracker, max_hands=max_hands, roi_tracking=True,
+                                                frame_budget_ms=16)
+        self.tracker_factory = tracker_factory
+        self.context = multiprocessing.get_context(start_method)
+
+        self.memories = []
+        self.free_slots = []
+        self.workers = []
+        self.results = None
+        self.stop_event = None
+        # Newest unprocessed frame per feed
+        self.pending = {}
+        self.finished = set()
+        self.errors = {}
+        self.received = [0] * len(self.sources)
+        self.superseded = [0] * len(self.sources)
+        self.worker_dropped = [0] * len(self.sources)
+        self.inference_ms = [0.0] * len(self.sources)
+        self.stats = [StageStats(f"feed{feed}") for feed in range(len(self.sources))]
+        self.latency = [Histogram() for _ in self.sources]
+
+    def start(self, timeout=30.0):
+        """
+        Start one worker per feed and wait until each has loaded its model.
+
+        Args:
+            timeout (float): Seconds to wait for the workers to get ready
+
+        Raises:
+            RuntimeError: If a worker does not get ready in time
+        """
+        self.stop_event = self.context.Event()
+        self.results = self.context.Queue()
+        for feed, source in enumerate(self.sources):
+            memory = shared_memory.SharedMemory(create=True, size=self.slots * self.slot_bytes)
+            free_slots = self.context.Queue()
+            for slot in range(self.slots):
+                free_slots.put(slot)
+            worker = self.context.Process(
+                target=_feed_worker, name=f"feed{feed}", daemon=True,
+                args=(feed, source, memory.name, self.slot_bytes, free_slots, self.results,
+                      self.stop_event, self.tracker_factory, self.draw, self.source_params))
+            self.memories.append(memory)
+            self.free_slots.append(free_slots)
+            self.workers.append(worker)
+        for worker in self.workers:
+            worker.start()
+
+        ready = set()
+        deadline = time.monotonic() + timeout
+        while len(ready | self.finished) < len(self.sources):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise RuntimeError(f"Camera workers not ready after {timeout} s")
+            try:
+                kind, feed, payload = self.results.get(timeout=remaining)
+            except queue.Empty:
+                continue
+            if kind == "ready":
+                ready.add(feed)
+            else:
+                self._handle(kind, feed, payload)
+
+    def _handle(self, kind, feed, payload):
+        if kind == "frame":
+            slot, timestamp, shape, hands, inference_ms, dropped = payload
+            image = np.ndarray(shape, dtype=np.uint8, buffer=self.memories[feed].buf,
+                               offset=slot * self.slot_bytes)
+            previous = self.pending.get(feed)
+            if previous is not None:
+                self.superseded[feed] += 1
+                self.free_slots[feed].put(previous.slot)
+            self.pending[feed] = FeedFrame(feed, slot, timestamp, image, hands, inference_ms, dropped)
+            self.received[feed] += 1
+            self.worker_dropped[feed] = dropped
+            self.inference_ms[feed] = inference_ms
+        elif kind == "error":
+            self.errors[feed] = payload
+            self.finished.add(feed)
+            print(f"Camera feed {feed} ({self.sources[feed]}): {payload}", file=sys.stderr)
+        elif kind == "end":
+            self.finished.add(feed)
+
+    def get(self, timeout=0.1):
+        """
+        Return the oldest of the newest frames waiting per feed.
+
+        Args:
+            timeout (float): Seconds to wait for a frame, None waits forever
+
+        Returns:
+            FeedFrame, or None if no frame is ready yet; pass it to `release`
+            once done with it
+        """
+        if not self.pending:
+            try:
+                self._handle(*self.results.get(timeout=timeout))
+            except queue.Empty:
+                return None
+        while True:
+            try:
+                self._handle(*self.results.get_nowait())
+            except queue.Empty:
+                break
+        if not self.pending:
+            return None
+        feed = min(self.pending, key=lambda f: self.pending[f].timestamp)
+        return self.pending.pop(feed)
+
+    def release(self, frame, now=None):
+        """
+        Hand a frame's slot back to its worker and record the feed's latency.
+
+        Args:
+            frame (FeedFrame): Frame returned by `get`
+            now (float): time.monotonic() when processing finished, defaults to now
+        """
+        if now is None:
+            now = time.monotonic()
+        frame.image = None
+        self.free_slots[frame.feed].put(frame.slot)
+        latency = now - frame.timestamp
+        self.stats[frame.feed].record(latency)
+        self.latency[frame.feed].observe(latency)
+
+    def running(self):
+        """Return True while a feed is still delivering or a frame is waiting."""
+        return len(self.finished) < len(self.sources) or bool(self.pending)
+
+    def stop(self, timeout=2.0):
+        """Stop the workers and free the shared memory."""
+        if self.stop_event is not None:
+            self.stop_event.set()
+        for worker in self.workers:
+            worker.join(timeout)
+            if worker.is_alive():
+                worker.terminate()
+                worker.join(timeout)
+        self.pending.clear()
+        for memory in self.memories:
+            try:
+                memory.close()
+            except BufferError:
+                # A FeedFrame image still points into the block; unlinking below frees it anyway
+                pass
+            memory.unlink()
+        self.memories = []
+        self.workers = []
+
+    def get_stats(self):
+        """
+        Return throughput, drops and capture-to-release latency per feed.
+
+        Returns:
+            dict: Feed index -> counters; latency percentiles in milliseconds
+        """
+        stats = {}
+        for feed, source in enumerate(self.sources):
+            snapshot = self.stats[feed].snapshot()
+            latency = self.latency[feed]
+            stats[feed] = {
+                "source": str(source),
+                "fps": snapshot["fps"],
+                "frames": snapshot["count"],
+                "received": self.received[feed],
+                "superseded": self.superseded[feed],
+                "worker_dropped": self.worker_dropped[feed],
+                "inference_ms": self.inference_ms[feed],
+                "latency_ms": {
+                    "mean": snapshot["avg_ms"],
+                    "p50": latency.percentile(50) * 1000.0,
+                    "p95": latency.percentile(95) * 1000.0,
+                    "p99": latency.percentile(99) * 1000.0,
+                },
+            }
+            if feed in self.errors:
+                stats[feed]["error"] = self.errors[feed]
+        return stats
@@ -0,0 +1,312 @@
+import time
+
+import numpy as np
+
+from utils.gesture_utils import GestureEngine, POSE_INDICES, default_gesture_rules
+
+# Label of training frames that show no gesture
+BACKGROUND = "none"
+
+# Rule-based gestures that depend on motion, which a per-frame pose classifier cannot see
+MOTION_GESTURES = ("tab_next", "tab_previous", "scroll_up", "scroll_down",
+                   "flick_left", "flick_right", "circle_cw", "circle_ccw")
+
+
+def _softmax(logits):
+    logits = logits - logits.max(axis=-1, keepdims=True)
+    np.exp(logits, out=logits)
+    logits /= logits.sum(axis=-1, keepdims=True)
+    return logits
+
+
+class MLPClassifier:
+    kind = "mlp"
+
+    def __init__(self, labels, mean, std, weights):
+        """
+        One-hidden-layer perceptron over HandFeatures pose vectors.
+
+        Args:
+            labels (list): Class names, one per output unit
+            mean: (D,) feature means used to standardise inputs
+            std: (D,) feature standard deviations used to standardise inputs
+            weights (tuple): (w1 (D, H), b1 (H,), w2 (H, C), b2 (C,)) float32 arrays
+        """
+        self.labels = list(labels)
+        self.mean = np.asarray(mean, dtype=np.float32)
+        self.scale = 1.0 / np.maximum(np.asarray(std, dtype=np.float32), 1e-6)
+        self.w1, self.b1, self.w2, self.b2 = (np.asarray(w, dtype=np.float32) for w in weights)
+
+    @classmethod
+    def train(cls, X, y, labels, hidden=32, epochs=400, learning_rate=0.01, weight_decay=1e-4, seed=0):
+        """
+        Fit the network with full-batch Adam on softmax cross-entropy.
+
+        Args:
+            X: (N, D) pose vectors
+            y: (N,) integer class indices into `labels`
+            labels (list): Class names
+            hidden (int): Hidden layer width
+            epochs (int): Number of gradient steps
+            learning_rate (float): Adam step size
+            weight_decay (float): L2 penalty on the weight matrices
+            seed (int): Seed for the weight initialisation
+
+        Returns:
+            MLPClassifier: The trained model
+        """
+        X = np.asarray(X, dtype=np.float32)
+        y = np.asarray(y)
+        mean, std = X.mean(axis=0), X.std(axis=0)
+        Z = (X - mean) / np.maximum(std, 1e-6)
+        n, d = Z.shape
+        classes = len(labels)
+        targets = np.eye(classes, dtype=np.float32)[y]
+
+        rng = np.random.default_rng(seed)
+        params = [
+            rng.normal(0, np.sqrt(2.0 / d), (d, hidden)).astype(np.float32),
+            np.zeros(hidden, dtype=np.float32),
+            rng.normal(0, np.sqrt(1.0 / hidden), (hidden, classes)).astype(np.float32),
+            np.zeros(classes, dtype=np.float32),
+        ]
+        moments = [np.zeros_like(p) for p in params]
+        velocities = [np.zeros_like(p) for p in params]
+        beta1, beta2 = 0.9, 0.999
+
+        for step in range(1, epochs + 1):
+            w1, b1, w2, b2 = params
+            pre = Z @ w1 + b1
+            h = np.maximum(pre, 0)
+            error = (_softmax(h @ w2 + b2) - targets) / n
+
+            grad_w2 = h.T @ error + weight_decay * w2
+            grad_h = error @ w2.T
+            grad_h[pre <= 0] = 0
+            grad_w1 = Z.T @ grad_h + weight_decay * w1
+            grads = [grad_w1, grad_h.sum(axis=0), grad_w2, error.sum(axis=0)]
+
+            for p, g, m, v in zip(params, grads, moments, velocities):
+                m *= beta1
+                m += (1 - beta1) * g
+                v *= beta2
+                v += (1 - beta2) * g * g
+                p -= learning_rate * (m / (1 - beta1 ** step)) / (np.sqrt(v / (1 - beta2 ** step)) + 1e-8)
+
+        return cls(labels, mean, std, params)
+
+    def predict_proba(self, x):
+        """
+        Return class probabilities for one pose vector.
+
+        Args:
+            x: (D,) pose vector, see HandFeatures.pose_vector
+
+        Returns:
+            (C,) float32 probabilities, ordered like `labels`
+        """
+        h = (x - self.mean) * self.scale @ self.w1 + self.b1
+        np.maximum(h, 0, out=h)
+        return _softmax(h @ self.w2 + self.b2)
+
+    def arrays(self):
+        """Return the arrays that describe the model, for `save_classifier`."""
+        return {"mean": self.mean, "std": 1.0 / self.scale,
+                "w1": self.w1, "b1": self.b1, "w2": self.w2, "b2": self.b2}
+
+    @classmethod
+    def from_arrays(cls, labels, arrays):
+        return cls(labels, arrays["mean"], arrays["std"],
+                   (arrays["w1"], arrays["b1"], arrays["w2"], arrays["b2"]))
+
+
+class KNNClassifier:
+    kind = "knn"
+
+    def __init__(self, labels, mean, std, points, targets, k=5):
+        """
+        k-nearest-neighbour vote over standardised HandFeatures pose vectors.
+
+        Args:
+            labels (list): Class names
+            mean: (D,) feature means used to standardise inputs
+            std: (D,) feature standard deviations used to standardise inputs
+            points: (N, D) standardised training vectors
+            targets: (N,) integer class indices into `labels`
+            k (int): Number of neighbours that vote
+        """
+        self.labels = list(labels)
+        self.mean = np.asarray(mean, dtype=np.float32)
+        self.scale = 1.0 / np.maximum(np.asarray(std, dtype=np.float32), 1e-6)
+        self.points = np.asarray(points, dtype=np.float32)
+        self.targets = np.asarray(targets, dtype=np.int64)
+        self.k = min(int(k), len(self.points))
+        # |p|^2 is constant per point, so each query is one matrix-vector product
+        self.norms = np.einsum("ij,ij->i", self.points, self.points)
+
+    @classmethod
+    def train(cls, X, y, labels, k=5, max_points=2000, seed=0):
+        """
+        Store (a random subset of) the training vectors.
+
+        Args:
+            X: (N, D) pose vectors
+            y: (N,) integer class indices into `labels`
+            labels (list): Class names
+            k (int): Number of neighbours that vote
+            max_points (int): Training vectors kept, which bounds the per-frame cost
+            seed (int): Seed for the subset
+
+        Returns:
+            KNNClassifier: The model
+        """
+        X = np.asarray(X, dtype=np.float32)
+        y = np.asarray(y)
+        mean, std = X.mean(axis=0), X.std(axis=0)
+        if len(X) > max_points:
+            keep = np.random.default_rng(seed).choice(len(X), max_points, replace=False)
+            X, y = X[keep], y[keep]
+        return cls(labels, mean, std, (X - mean) / np.maximum(std, 1e-6), y, k)
+
+    def predict_proba(self, x):
+        """
+        Return the neighbours' vote share per class for one pose vector.
+
+        Args:
+            x: (D,) pose vector, see HandFeatures.pose_vector
+
+        Returns:
+            (C,) float32 probabilities, ordered like `labels`
+        """
+        z = (x - self.mean) * self.scale
+        distances = self.norms - 2 * (self.points @ z)
+        nearest = np.argpartition(distances, self.k - 1)[:self.k]
+        votes = np.bincount(self.targets[nearest], minlength=len(self.labels))
+        return votes.astype(np.float32) / self.k
+
+    def arrays(self):
+        """Return the arrays that describe the model, for `save_classifier`."""
+        return {"mean": self.mean, "std": 1.0 / self.scale, "points": self.points,
+                "targets": self.targets, "k": np.array(self.k)}
+
+    @classmethod
+    def from_arrays(cls, labels, arrays):
+        return cls(labels, arrays["mean"], arrays["std"], arrays["points"], arrays["targets"],
+                   int(arrays["k"]))
+
+
+CLASSIFIERS = {
+    "mlp": MLPClassifier,
+    "knn": KNNClassifier,
+}
+
+
+def save_classifier(model, path):
+    """Write a trained classifier to a NumPy .npz weights file."""
+    np.savez(path, kind=np.array(model.kind), labels=np.array(model.labels), **model.arrays())
+
+
+def load_classifier(path):
+    """
+    Load a classifier written by `save_classifier`.
+
+    Args:
+        path (str): .npz weights file
+
+    Returns:
+        MLPClassifier or KNNClassifier
+    """
+    with np.load(path, allow_pickle=False) as data:
+        kind = str(data["kind"])
+        if kind not in CLASSIFIERS:
+            raise ValueError(f"Unknown classifier kind {kind!r} in {path}")
+        arrays = {name: data[name] for name in data.files}
+    return CLASSIFIERS[kind].from_arrays([str(label) for label in arrays["labels"]], arrays)
+
+
+class ClassifierEngine:
+    def __init__(self, model, rules=None, window=5, min_confidence=0.6, cooldown=0.5):
+        """
+        Gesture engine that recognises poses with a trained classifier.
+
+        Drop-in replacement for GestureEngine (see GestureDetector's `engine`):
+        gestures are reported by the names the classifier was trained with,
+        so they dispatch like their rule-based counterparts. Class
+        probabilities are averaged over the last `window` frames with a hand,
+        and a pose is current once its mean probability reaches
+        `min_confidence`. A pose fires once when it becomes current, not
+        again while it is held. Motion gestures (swipes, flicks,
+        circles) are left to `rules`.
+
+        Args:
+            model: MLPClassifier or KNNClassifier
+            rules (list): GestureRules evaluated alongside the classifier,
+                defaults to the motion gestures of default_gesture_rules()
+            window (int): Frames the class probabilities are averaged over
+            min_confidence (float): Mean probability a pose needs to be recognised
+            cooldown (float): Minimum seconds between two firings of the same pose
+        """
+        self.model = model
+        if rules is None:
+            rules = [rule for rule in default_gesture_rules() if rule.name in MOTION_GESTURES]
+        self.rules = GestureEngine(rules)
+        self.window = window
+        self.min_confidence = min_confidence
+        self.cooldown = cooldown
+
+        # Ring of recent class probabilities, and the pose vector, reused every frame
+        self.history = np.zeros((window, len(model.labels)), dtype=np.float32)
+        self.history_index = 0
+        self.history_count = 0
+        self.pose = np.zeros(len(POSE_INDICES), dtype=np.float32)
+        self.label = None
+        self.last_fired = {}
+        self.active = set()
+
+    def evaluate(self, features, now=None):
+        """
+        Classify the current frame and evaluate the motion rules.
+
+        Args:
+            features: HandFeatures of the current frame
+            now (float): Current time in seconds
+
+        Returns:
+            list: Names of the gestures that fired
+        """
+        fired = self.rules.evaluate(features, now)
+        if not features.valid:
+            self.history_count = 0
+            self.label = None
+            self.active = set()
+            return fired
+        if now is None:
+            now = time.time()
+
+        self.history[self.history_index] = self.model.predict_proba(features.pose_vector(out=self.pose))
+        self.history_index = (self.history_index + 1) % self.window
+        self.history_count = min(self.history_count + 1, self.window)
+        mean = self.history[:self.history_count].mean(axis=0)
+        top = int(mean.argmax())
+        label = self.model.labels[top]
+        if mean[top] < self.min_confidence or label == BACKGROUND:
+            label = None
+
+        if label is not None and label != self.label:
+            if now - self.last_fired.get(label, float("-inf")) >= self.cooldown:
+                self.last_fired[label] = now
+                fired.append(label)
+        self.label = label
+        self.active = self.rules.active | ({label} if label is not None else set())
+        return fired
+
+    @property
+    def held(self):
+        """Hold rules still firing from the previous frame; recognised poses fire once and are never held."""
+        return self.rules.held
+
+    def is_preempted(self, name):
+        """Return True if the classifier recognises a different pose than `name`, e.g. for clicks."""
+        if self.label is not None and self.label != name:
+            return True
+        return name in self.rules.priorities and self.rules.is_preempted(name)
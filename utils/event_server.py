@@ -0,0 +1,290 @@
+import asyncio
+import base64
+import hashlib
+import os
+import struct
+import sys
+import threading
+from collections import deque
+
+from utils.events import decode_events, encode_events, merge_event
+
+FRAME_LENGTH = struct.Struct("<I")
+WEBSOCKET_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+
+class _Client:
+    def __init__(self, server, writer, websocket):
+        """
+        One connected consumer and the events waiting to be written to it.
+
+        Events queued while a write is still draining merge like in
+        InputDispatcher (see merge_event) and go out together in the next
+        batch; a client more than `max_pending` events behind is dropped.
+        """
+        self.server = server
+        self.writer = writer
+        self.websocket = websocket
+        self.pending = deque()
+        self.ready = asyncio.Event()
+        self.closed = False
+        self.batches = 0
+        self.events = 0
+        self.merged = 0
+
+    def add(self, events):
+        if self.closed:
+            return
+        for event in events:
+            self.merged += merge_event(self.pending, event)
+        if len(self.pending) > self.server.max_pending:
+            print(f"Event client too slow, disconnecting ({len(self.pending)} events behind)", file=sys.stderr)
+            # Closing would wait to flush a buffer the client is not reading
+            self.close(abort=True)
+            return
+        self.ready.set()
+
+    async def write_loop(self):
+        tick = self.server.tick
+        loop = asyncio.get_running_loop()
+        try:
+            while not self.closed:
+                await self.ready.wait()
+                self.ready.clear()
+                if self.closed:
+                    break
+                batch = list(self.pending)
+                self.pending.clear()
+                payload = encode_events(batch)
+                if self.websocket:
+                    self.writer.write(_websocket_frame(payload))
+                else:
+                    self.writer.write(FRAME_LENGTH.pack(len(payload)) + payload)
+                self.batches += 1
+                self.events += len(batch)
+                # Blocks while the client's socket buffer is full; meanwhile new events merge in `pending`
+                start = loop.time()
+                await self.writer.drain()
+                if tick:
+                    await asyncio.sleep(max(tick - (loop.time() - start), 0.0))
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            self.close()
+
+    def close(self, abort=False):
+        if not self.closed:
+            self.closed = True
+            self.server.clients.discard(self)
+            self.ready.set()
+            if abort:
+                self.writer.transport.abort()
+            else:
+                self.writer.close()
+
+
+def _websocket_frame(payload, opcode=0x2):
+    """Frame a server-to-client (unmasked) WebSocket message."""
+    length = len(payload)
+    if length < 126:
+        header = struct.pack("!BB", 0x80 | opcode, length)
+    elif length < 1 << 16:
+        header = struct.pack("!BBH", 0x80 | opcode, 126, length)
+    else:
+        header = struct.pack("!BBQ", 0x80 | opcode, 127, length)
+    return header + payload
+
+
+async def _read_websocket_frame(reader):
+    """Read one client-to-server WebSocket frame; return (opcode, payload)."""
+    first, second = await reader.readexactly(2)
+    length = second & 0x7F
+    if length == 126:
+        length, = struct.unpack("!H", await reader.readexactly(2))
+    elif length == 127:
+        length, = struct.unpack("!Q", await reader.readexactly(8))
+    mask = await reader.readexactly(4) if second & 0x80 else None
+    payload = await reader.readexactly(length)
+    if mask is not None:
+        payload = bytes(byte ^ mask[i % 4] for i, byte in enumerate(payload))
+    return first & 0x0F, payload
+
+
+class EventServer:
+    def __init__(self, bus, unix_path=None, port=None, host="127.0.0.1", tick=0.0, max_pending=1024):
+        """
+        Publish an EventBus to local processes over a Unix socket and/or WebSocket.
+
+        Runs an asyncio loop on its own thread. Every event batch is encoded
+        with encode_events; on the Unix socket each batch is prefixed with
+        its byte length (uint32, little-endian), over WebSocket it is one
+        binary message. Events published while a client's previous batch
+        is still being written are merged (cursor moves keep the latest
+        position, scrolls are summed) and sent together, so a slow client
+        gets fewer, larger batches instead of slowing the tracking loop
+        down; one too far behind is disconnected.
+
+        Args:
+            bus (EventBus): Events to publish
+            unix_path (str): Unix socket path to listen on, None disables it
+            port (int): WebSocket port to listen on, None disables it
+            host (str): WebSocket interface, local only by default
+            tick (float): Minimum seconds between two batches to one client,
+                batching more cursor moves per write; 0 sends as soon as possible
+            max_pending (int): Unsent events after which a client is disconnected
+        """
+        self.bus = bus
+        self.unix_path = unix_path
+        self.port = port
+        self.host = host
+        self.tick = tick
+        self.max_pending = max_pending
+        self.clients = set()
+        self.handlers = set()
+        self.loop = None
+        self.thread = None
+        self.started = threading.Event()
+        self.error = None
+
+    def start(self):
+        """
+        Start serving on a background thread.
+
+        Raises:
+            OSError: If a listening socket cannot be opened
+        """
+        self.thread = threading.Thread(target=self._run, name="events", daemon=True)
+        self.thread.start()
+        self.started.wait()
+        if self.error is not None:
+            raise self.error
+
+    def _run(self):
+        self.loop = asyncio.new_event_loop()
+        try:
+            self.loop.run_until_complete(self._serve())
+        finally:
+            self.loop.close()
+
+    async def _serve(self):
+        self.stopping = asyncio.Event()
+        servers = []
+        try:
+            if self.unix_path is not None:
+                if os.path.exists(self.unix_path):
+                    os.unlink(self.unix_path)
+                servers.append(await asyncio.start_unix_server(self._handle_unix, self.unix_path))
+            if self.port is not None:
+                servers.append(await asyncio.start_server(self._handle_websocket, self.host, self.port))
+        except OSError as e:
+            self.error = e
+            self.started.set()
+            return
+        subscription = self.bus.subscribe_async(self.loop, self.max_pending)
+        self.started.set()
+
+        fan_out = asyncio.ensure_future(self._fan_out(subscription))
+        await self.stopping.wait()
+        self.bus.unsubscribe(subscription)
+        fan_out.cancel()
+        for server in servers:
+            server.close()
+        for client in list(self.clients):
+            client.close()
+        if self.handlers:
+            await asyncio.wait(self.handlers, timeout=1.0)
+        if self.unix_path is not None and os.path.exists(self.unix_path):
+            os.unlink(self.unix_path)
+
+    async def _fan_out(self, subscription):
+        while True:
+            await subscription.wait()
+            batch = subscription.take()
+            for client in list(self.clients):
+                client.add(batch)
+
+    async def _serve_client(self, client, reader):
+        handler = asyncio.current_task()
+        self.handlers.add(handler)
+        self.clients.add(client)
+        writing = asyncio.ensure_future(client.write_loop())
+        try:
+            if client.websocket:
+                while not client.closed:
+                    opcode, payload = await _read_websocket_frame(reader)
+                    if opcode == 0x8:
+                        client.writer.write(_websocket_frame(payload[:2], opcode=0x8))
+                        break
+                    if opcode == 0x9:
+                        client.writer.write(_websocket_frame(payload, opcode=0xA))
+            else:
+                # Nothing is expected from the client; reading notices when it goes away
+                while not client.closed and await reader.read(4096):
+                    pass
+        except (asyncio.IncompleteReadError, ConnectionError, OSError):
+            pass
+        finally:
+            self.clients.discard(client)
+            client.close()
+            await writing
+            self.handlers.discard(handler)
+
+    async def _handle_unix(self, reader, writer):
+        await self._serve_client(_Client(self, writer, websocket=False), reader)
+
+    async def _handle_websocket(self, reader, writer):
+        try:
+            request = await reader.readuntil(b"\r\n\r\n")
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+            writer.close()
+            return
+        headers = {}
+        for line in request.decode("latin-1").split("\r\n")[1:]:
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+        key = headers.get("sec-websocket-key")
+        if key is None or "websocket" not in headers.get("upgrade", "").lower():
+            writer.write(b"HTTP/1.1 400 Bad Request\r\nContent-Length: 0\r\n\r\n")
+            writer.close()
+            return
+        accept = base64.b64encode(hashlib.sha1((key + WEBSOCKET_GUID).encode()).digest()).decode()
+        writer.write(("HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                      f"Sec-WebSocket-Accept: {accept}\r\n\r\n").encode())
+        await self._serve_client(_Client(self, writer, websocket=True), reader)
+
+    def stop(self):
+        """Disconnect every client and stop the server thread."""
+        if self.loop is not None and self.thread.is_alive():
+            self.loop.call_soon_threadsafe(self.stopping.set)
+        if self.thread is not None:
+            self.thread.join(timeout=2.0)
+
+    def get_stats(self):
+        """Return the number of clients and, per client, batches and events sent."""
+        return {
+            "clients": len(self.clients),
+            "sent": [{"batches": client.batches, "events": client.events, "merged": client.merged,
+                      "pending": len(client.pending)} for client in list(self.clients)],
+        }
+
+
+async def read_unix_events(path):
+    """
+    Connect to an EventServer's Unix socket and yield its events.
+
+    Example:
+        async for event in read_unix_events("/tmp/virtual-mouse.sock"):
+            print(event.kind, event.timestamp)
+    """
+    reader, writer = await asyncio.open_unix_connection(path)
+    try:
+        while True:
+            try:
+                header = await reader.readexactly(FRAME_LENGTH.size)
+            except asyncio.IncompleteReadError:
+                return
+            length, = FRAME_LENGTH.unpack(header)
+            for event in decode_events(await reader.readexactly(length)):
+                yield event
+    finally:
+        writer.close()
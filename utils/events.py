@@ -0,0 +1,333 @@
+import asyncio
+import struct
+import threading
+from collections import deque
+
+EVENT_KINDS = ("cursor", "down", "up", "click", "right_click", "scroll", "gesture")
+KIND_CODES = {kind: code for code, kind in enumerate(EVENT_KINDS)}
+
+# Binary batch format, little-endian: a sequence of records, each a kind code
+# (uint8, index into EVENT_KINDS) and a timestamp (float64) followed by
+#     cursor                          x, y (float32, screen pixels)
+#     down, up, click, right_click    nothing
+#     scroll                          delta (int32, scroll clicks)
+#     gesture                         name length (uint8), name (UTF-8)
+HEADER = struct.Struct("<Bd")
+CURSOR = struct.Struct("<ff")
+SCROLL = struct.Struct("<i")
+NAME_LENGTH = struct.Struct("<B")
+
+
+class GestureEvent:
+    __slots__ = ("kind", "timestamp", "x", "y", "delta", "name")
+
+    def __init__(self, kind, timestamp, x=0.0, y=0.0, delta=0, name=None):
+        """
+        One event of the gesture stream.
+
+        Args:
+            kind (str): One of EVENT_KINDS
+            timestamp (float): Capture time of the frame the event came from
+            x (float): Cursor x in screen pixels ("cursor")
+            y (float): Cursor y in screen pixels ("cursor")
+            delta (int): Scroll clicks, positive scrolls up ("scroll")
+            name (str): Gesture name, e.g. "screenshot" ("gesture")
+        """
+        self.kind = kind
+        self.timestamp = timestamp
+        self.x = x
+        self.y = y
+        self.delta = delta
+        self.name = name
+
+    def __repr__(self):
+        if self.kind == "cursor":
+            detail = f" x={self.x:.1f} y={self.y:.1f}"
+        elif self.kind == "scroll":
+            detail = f" delta={self.delta}"
+        elif self.kind == "gesture":
+            detail = f" name={self.name!r}"
+        else:
+            detail = ""
+        return f"GestureEvent({self.kind} t={self.timestamp:.4f}{detail})"
+
+
+def merge_event(pending, event):
+    """
+    Append an event to a queue, merging it into the last one when possible.
+
+    Like InputDispatcher, consecutive cursor events keep only the latest
+    position and consecutive scrolls are summed; anything else is appended,
+    so a click still follows the position queued before it.
+
+    Returns:
+        bool: True if the event was merged instead of appended
+    """
+    if pending and pending[-1].kind == event.kind:
+        if event.kind == "cursor":
+            pending[-1] = event
+            return True
+        if event.kind == "scroll":
+            pending[-1] = GestureEvent("scroll", event.timestamp, delta=pending[-1].delta + event.delta)
+            return True
+    pending.append(event)
+    return False
+
+
+def encode_events(events):
+    """Encode a batch of events into the binary batch format."""
+    parts = []
+    for event in events:
+        parts.append(HEADER.pack(KIND_CODES[event.kind], event.timestamp))
+        if event.kind == "cursor":
+            parts.append(CURSOR.pack(event.x, event.y))
+        elif event.kind == "scroll":
+            parts.append(SCROLL.pack(event.delta))
+        elif event.kind == "gesture":
+            name = event.name.encode()[:255]
+            parts.append(NAME_LENGTH.pack(len(name)))
+            parts.append(name)
+    return b"".join(parts)
+
+
+def decode_events(data):
+    """Decode bytes from encode_events back into a list of GestureEvent."""
+    events = []
+    offset = 0
+    while offset < len(data):
+        code, timestamp = HEADER.unpack_from(data, offset)
+        offset += HEADER.size
+        kind = EVENT_KINDS[code]
+        event = GestureEvent(kind, timestamp)
+        if kind == "cursor":
+            event.x, event.y = CURSOR.unpack_from(data, offset)
+            offset += CURSOR.size
+        elif kind == "scroll":
+            event.delta, = SCROLL.unpack_from(data, offset)
+            offset += SCROLL.size
+        elif kind == "gesture":
+            length, = NAME_LENGTH.unpack_from(data, offset)
+            offset += NAME_LENGTH.size
+            event.name = bytes(data[offset:offset + length]).decode()
+            offset += length
+        events.append(event)
+    return events
+
+
+class EventQueue:
+    def __init__(self, max_pending=1024):
+        """
+        Subscription for threads: iterate over it to receive events.
+
+        Cursor moves and scrolls merge while the consumer is behind (see
+        merge_event); beyond `max_pending` queued events the oldest are
+        dropped, so a slow consumer never holds up the tracking loop.
+
+        Args:
+            max_pending (int): Events kept for a consumer that falls behind
+        """
+        self.max_pending = max_pending
+        self.pending = deque()
+        self.condition = threading.Condition()
+        self.closed = False
+        self.merged = 0
+        self.dropped = 0
+
+    def put(self, event):
+        with self.condition:
+            if merge_event(self.pending, event):
+                self.merged += 1
+            elif len(self.pending) > self.max_pending:
+                self.pending.popleft()
+                self.dropped += 1
+            self.condition.notify()
+
+    def get(self, timeout=None):
+        """Return the next event, or None on timeout or once closed and drained."""
+        with self.condition:
+            if not self.condition.wait_for(lambda: self.pending or self.closed, timeout):
+                return None
+            return self.pending.popleft() if self.pending else None
+
+    def __iter__(self):
+        while True:
+            event = self.get()
+            if event is None:
+                return
+            yield event
+
+    def close(self):
+        """End iteration once the queued events are consumed."""
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+
+class AsyncEventQueue:
+    def __init__(self, loop, max_pending=1024):
+        """
+        Subscription for asyncio: `async for event in queue`, or `take` whole batches.
+
+        Events are handed to the loop thread-safely and merged like in
+        EventQueue.
+
+        Args:
+            loop: Event loop the consumer runs on
+            max_pending (int): Events kept for a consumer that falls behind
+        """
+        self.loop = loop
+        self.max_pending = max_pending
+        self.pending = deque()
+        self.ready = asyncio.Event()
+        self.closed = False
+        self.merged = 0
+        self.dropped = 0
+
+    def put(self, event):
+        self.loop.call_soon_threadsafe(self._put, event)
+
+    def _put(self, event):
+        if merge_event(self.pending, event):
+            self.merged += 1
+        elif len(self.pending) > self.max_pending:
+            self.pending.popleft()
+            self.dropped += 1
+        self.ready.set()
+
+    async def wait(self):
+        """Wait until events are queued or the queue is closed."""
+        await self.ready.wait()
+
+    def take(self):
+        """Return every queued event as a list and empty the queue."""
+        batch = list(self.pending)
+        self.pending.clear()
+        if not self.closed:
+            self.ready.clear()
+        return batch
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        while not self.pending:
+            if self.closed:
+                raise StopAsyncIteration
+            self.ready.clear()
+            await self.ready.wait()
+        return self.pending.popleft()
+
+    def close(self):
+        self.loop.call_soon_threadsafe(self._close)
+
+    def _close(self):
+        self.closed = True
+        self.ready.set()
+
+
+class EventBus:
+    def __init__(self):
+        """Fan-out of gesture events from the tracking loop to any number of subscriptions."""
+        self.subscribers = ()
+        self.lock = threading.Lock()
+        self.published = 0
+
+    def subscribe(self, max_pending=1024):
+        """Return an EventQueue receiving every event published from now on."""
+        return self._add(EventQueue(max_pending))
+
+    def subscribe_async(self, loop=None, max_pending=1024):
+        """Return an AsyncEventQueue for `loop`, by default the running one."""
+        return self._add(AsyncEventQueue(loop or asyncio.get_running_loop(), max_pending))
+
+    def _add(self, queue):
+        with self.lock:
+            self.subscribers = self.subscribers + (queue,)
+        return queue
+
+    def unsubscribe(self, queue):
+        """Stop delivering to a subscription and close it."""
+        with self.lock:
+            self.subscribers = tuple(q for q in self.subscribers if q is not queue)
+        queue.close()
+
+    def publish(self, event):
+        """Deliver an event to every subscription; never blocks on consumers."""
+        self.published += 1
+        for queue in self.subscribers:
+            queue.put(event)
+
+    def close(self):
+        """Close every subscription."""
+        with self.lock:
+            subscribers, self.subscribers = self.subscribers, ()
+        for queue in subscribers:
+            queue.close()
+
+
+class EventBackend:
+    def __init__(self, bus, forward=None, clock=None, screen_size=(1920, 1080)):
+        """
+        Input backend that publishes cursor, button and scroll events.
+
+        Has the pyautogui input API, so VirtualMouse drives it like any other
+        backend. Calls are forwarded to `forward` as well when given, so the
+        OS still receives the input; without it, events are the only output.
+        Key presses are forwarded but not published: consumers get the
+        gesture that caused them instead.
+
+        Args:
+            bus (EventBus): Receives the events
+            forward: Input backend (or InputDispatcher) to pass calls on to, None sends no OS input
+            clock (callable): Returns the timestamp for new events, e.g. the
+                capture time of the frame being processed
+            screen_size (tuple): Size reported by `size()` without `forward`
+        """
+        self.bus = bus
+        self.forward = forward
+        self.clock = clock
+        self.screen_size = screen_size
+
+    def _publish(self, kind, **fields):
+        self.bus.publish(GestureEvent(kind, self.clock(), **fields))
+
+    def size(self):
+        return self.forward.size() if self.forward is not None else self.screen_size
+
+    def moveTo(self, x, y, *args, **kwargs):
+        self._publish("cursor", x=x, y=y)
+        if self.forward is not None:
+            self.forward.moveTo(x, y)
+
+    def click(self, *args, **kwargs):
+        self._publish("click")
+        if self.forward is not None:
+            self.forward.click()
+
+    def rightClick(self, *args, **kwargs):
+        self._publish("right_click")
+        if self.forward is not None:
+            self.forward.rightClick()
+
+    def mouseDown(self, *args, **kwargs):
+        self._publish("down")
+        if self.forward is not None:
+            self.forward.mouseDown()
+
+    def mouseUp(self, *args, **kwargs):
+        self._publish("up")
+        if self.forward is not None:
+            self.forward.mouseUp()
+
+    def scroll(self, clicks, *args, **kwargs):
+        self._publish("scroll", delta=int(clicks))
+        if self.forward is not None:
+            self.forward.scroll(clicks)
+
+    def press(self, key, *args, **kwargs):
+        if self.forward is not None:
+            self.forward.press(key)
+
+    def hotkey(self, *keys, **kwargs):
+        if self.forward is not None:
+            self.forward.hotkey(*keys)
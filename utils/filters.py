@@ -0,0 +1,213 @@
+import math
+import time
+
+
+class CursorFilter:
+    """
+    Base class for cursor smoothing filters.
+
+    Filters take one (x, y) sample at a time with its timestamp and return
+    the filtered position. Every implementation runs in O(1) per sample.
+    Parameters can be changed at runtime with `set_params`.
+    """
+
+    def filter(self, x, y, timestamp=None):
+        """
+        Filter one cursor sample.
+
+        Args:
+            x: Raw x coordinate
+            y: Raw y coordinate
+            timestamp (float): Sample time in seconds, defaults to time.monotonic()
+
+        Returns:
+            tuple: (filtered_x, filtered_y)
+        """
+        raise NotImplementedError
+
+    def reset(self):
+        """Forget all history, e.g. after the hand was lost."""
+        raise NotImplementedError
+
+    def set_params(self, **params):
+        """Update tunable parameters by name."""
+        for name, value in params.items():
+            if not hasattr(self, name):
+                raise ValueError(f"{type(self).__name__} has no parameter {name!r}")
+            setattr(self, name, value)
+
+
+class MovingAverageFilter(CursorFilter):
+    def __init__(self, window=5):
+        """
+        Average of the last `window` samples, kept as running sums.
+
+        Args:
+            window (int): Number of samples to average
+        """
+        self.window = window
+        self.reset()
+
+    def reset(self):
+        self.samples = []
+        self.index = 0
+        self.sum_x = self.sum_y = 0.0
+
+    def filter(self, x, y, timestamp=None):
+        if len(self.samples) < self.window:
+            self.samples.append((x, y))
+        else:
+            old_x, old_y = self.samples[self.index]
+            self.sum_x -= old_x
+            self.sum_y -= old_y
+            self.samples[self.index] = (x, y)
+            self.index = (self.index + 1) % self.window
+        self.sum_x += x
+        self.sum_y += y
+
+        n = len(self.samples)
+        return self.sum_x / n, self.sum_y / n
+
+    def set_params(self, **params):
+        super().set_params(**params)
+        self.reset()
+
+
+class OneEuroFilter(CursorFilter):
+    def __init__(self, min_cutoff=1.0, beta=0.01, d_cutoff=1.0):
+        """
+        One Euro filter (Casiez et al., 2012): an adaptive low-pass filter.
+
+        The cutoff frequency rises with speed, so slow movements are heavily
+        smoothed (low jitter) while fast movements pass through with little
+        lag.
+
+        Args:
+            min_cutoff (float): Cutoff frequency in Hz at zero speed; lower means smoother
+            beta (float): Cutoff increase per pixel/s of speed; higher means less lag
+            d_cutoff (float): Cutoff frequency in Hz for the speed estimate
+        """
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self.reset()
+
+    def reset(self):
+        self.prev_time = None
+        self.x = self.y = 0.0
+        self.dx = self.dy = 0.0
+
+    @staticmethod
+    def _alpha(cutoff, dt):
+        tau = 1.0 / (2 * math.pi * cutoff)
+        return 1.0 / (1.0 + tau / dt)
+
+    def filter(self, x, y, timestamp=None):
+        if timestamp is None:
+            timestamp = time.monotonic()
+        if self.prev_time is None:
+            self.prev_time = timestamp
+            self.x, self.y = x, y
+            return x, y
+
+        dt = timestamp - self.prev_time
+        if dt <= 0:
+            return self.x, self.y
+        self.prev_time = timestamp
+
+        # Smoothed speed drives the cutoff of the position filter
+        a_d = self._alpha(self.d_cutoff, dt)
+        self.dx += a_d * ((x - self.x) / dt - self.dx)
+        self.dy += a_d * ((y - self.y) / dt - self.dy)
+        cutoff = self.min_cutoff + self.beta * math.hypot(self.dx, self.dy)
+
+        a = self._alpha(cutoff, dt)
+        self.x += a * (x - self.x)
+        self.y += a * (y - self.y)
+        return self.x, self.y
+
+
+class KalmanFilter(CursorFilter):
+    def __init__(self, process_noise=3e7, measurement_noise=9.0):
+        """
+        Constant-velocity Kalman filter, run independently on x and y.
+
+        Each axis keeps a position/velocity state and a 2x2 covariance, updated
+        in closed form, so a sample costs a fixed handful of float operations.
+
+        Args:
+            process_noise (float): Acceleration variance in (pixels/s^2)^2;
+                higher follows direction changes faster
+            measurement_noise (float): Variance of the raw positions in pixels^2;
+                higher means smoother
+        """
+        self.process_noise = process_noise
+        self.measurement_noise = measurement_noise
+        self.reset()
+
+    def reset(self):
+        self.prev_time = None
+        self.axes = None
+
+    def _update_axis(self, state, z, dt):
+        p, v, p00, p01, p11 = state
+        q, r = self.process_noise, self.measurement_noise
+
+        # Predict with constant velocity and white-noise acceleration
+        p += v * dt
+        dt2 = dt * dt
+        p00 += dt * (2 * p01 + dt * p11) + q * dt2 * dt2 / 4
+        p01 += dt * p11 + q * dt2 * dt / 2
+        p11 += q * dt2
+
+        # Correct with the measured position
+        s = p00 + r
+        k0, k1 = p00 / s, p01 / s
+        residual = z - p
+        p += k0 * residual
+        v += k1 * residual
+        p11 -= k1 * p01
+        p01 -= k1 * p00
+        p00 -= k0 * p00
+        return [p, v, p00, p01, p11]
+
+    def filter(self, x, y, timestamp=None):
+        if timestamp is None:
+            timestamp = time.monotonic()
+        if self.axes is None:
+            self.prev_time = timestamp
+            r = self.measurement_noise
+            self.axes = [[x, 0.0, r, 0.0, 1e6], [y, 0.0, r, 0.0, 1e6]]
+            return x, y
+
+        dt = timestamp - self.prev_time
+        if dt <= 0:
+            return self.axes[0][0], self.axes[1][0]
+        self.prev_time = timestamp
+
+        self.axes[0] = self._update_axis(self.axes[0], x, dt)
+        self.axes[1] = self._update_axis(self.axes[1], y, dt)
+        return self.axes[0][0], self.axes[1][0]
+
+
+CURSOR_FILTERS = {
+    "moving_average": MovingAverageFilter,
+    "one_euro": OneEuroFilter,
+    "kalman": KalmanFilter,
+}
+
+
+def create_filter(name, **params):
+    """
+    Create a cursor filter by name.
+
+    Args:
+        name (str): One of CURSOR_FILTERS
+        **params: Constructor parameters for the filter
+
+    Returns:
+        CursorFilter: The new filter
+    """
+    if name not in CURSOR_FILTERS:
+        raise ValueError(f"Unknown cursor filter {name!r}, expected one of {sorted(CURSOR_FILTERS)}")
+    return CURSOR_FILTERS[name](**params)
@@ -0,0 +1,86 @@
+import threading
+from collections import deque
+
+import numpy as np
+
+
+class FramePool:
+    def __init__(self, count=8, dtype=np.uint8):
+        """
+        Free list of preallocated frame buffers reused across frames.
+
+        Each frame in flight through the pipeline holds one buffer from
+        `acquire` until the last stage that reads it passes it to `release`
+        (or a LatestQueue drops it, see its `on_drop`). A buffer is never
+        handed out twice while in use; when every buffer is taken, a new one
+        is allocated, so a slow consumer costs memory, not correctness.
+
+        Args:
+            count (int): Most buffers kept for reuse
+            dtype: Element type of the buffers
+        """
+        self.count = count
+        self.dtype = dtype
+        self.free = deque()
+        self.lock = threading.Lock()
+        self.allocated = 0
+        self.reused = 0
+
+    def acquire(self, shape):
+        """
+        Return a buffer of the given shape, reusing a released one when possible.
+
+        Args:
+            shape (tuple): Frame shape, e.g. (height, width, 3)
+
+        Returns:
+            Uninitialised C-contiguous array
+        """
+        shape = tuple(shape)
+        with self.lock:
+            while self.free:
+                buffer = self.free.pop()
+                if buffer.shape == shape:
+                    self.reused += 1
+                    return buffer
+                # Left over from before a resolution change
+            self.allocated += 1
+        return np.empty(shape, dtype=self.dtype)
+
+    def release(self, buffer):
+        """Return a buffer to the pool once nothing reads it any more."""
+        if buffer is None:
+            return
+        with self.lock:
+            if len(self.free) < self.count:
+                self.free.append(buffer)
+
+    def get_stats(self):
+        """Return how many buffers were allocated and how many acquisitions reused one."""
+        with self.lock:
+            return {"allocated": self.allocated, "reused": self.reused, "free": len(self.free)}
+
+
+class ScratchBuffer:
+    def __init__(self, dtype=np.uint8):
+        """
+        One growable buffer for intermediate images of varying shape.
+
+        `view` returns a C-contiguous array of the requested shape on top of
+        the same storage, which only grows when a larger image is asked for.
+        Suited to per-frame temporaries such as a resized region or its RGB
+        conversion, which change size with the region but are consumed
+        before the next frame.
+
+        Args:
+            dtype: Element type of the storage
+        """
+        self.dtype = dtype
+        self.storage = np.empty(0, dtype=dtype)
+
+    def view(self, shape):
+        """Return an uninitialised array of `shape` backed by the shared storage."""
+        size = int(np.prod(shape))
+        if size > self.storage.size:
+            self.storage = np.empty(size, dtype=self.dtype)
+        return self.storage[:size].reshape(shape)
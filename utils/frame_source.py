@@ -0,0 +1,490 @@
+import os
+import sys
+import threading
+import time
+
+import cv2
+import numpy as np
+
+IMAGE_EXTENSIONS = (".bmp", ".jpeg", ".jpg", ".png")
+
+
+def _fourcc_name(code):
+    """Decode a CAP_PROP_FOURCC value such as 1196444237.0 into 'MJPG'."""
+    code = int(code)
+    return "".join(chr((code >> 8 * i) & 0xFF) for i in range(4)).strip("\0") or None
+
+
+class FrameClock:
+    def __init__(self, fps, realtime):
+        """
+        Timestamps for sources that are not a live camera.
+
+        Args:
+            fps (float): Frame rate of the source
+            realtime (bool): Pace frames at `fps` and stamp them with
+                time.monotonic(), like a camera; otherwise frames come as fast
+                as they are read and are stamped index / fps, so replays are
+                reproducible
+        """
+        self.fps = fps
+        self.rate = fps
+        self.realtime = realtime
+        self.index = 0
+        self.next_time = None
+        # Interrupts the wait for the next frame when the rate changes
+        self.wake = threading.Event()
+
+    def set_rate(self, fps=None):
+        """Pace frames at `fps` instead of the source's frame rate; None restores it."""
+        self.rate = fps or self.fps
+        self.wake.set()
+
+    def tick(self):
+        """Wait for the next frame's slot when pacing and return its timestamp."""
+        index = self.index
+        self.index += 1
+        if not self.realtime:
+            return index / self.fps
+        now = time.monotonic()
+        if self.next_time is not None:
+            while now < self.next_time:
+                self.wake.wait(self.next_time - now)
+                if self.wake.is_set():
+                    # The rate changed: the slot is one new interval after the last frame
+                    self.wake.clear()
+                    self.next_time = self.last_time + 1.0 / self.rate
+                now = time.monotonic()
+        interval = 1.0 / self.rate
+        # Like a camera, frames missed while the reader was busy are not made up for
+        self.next_time = max((self.next_time or now) + interval, now)
+        self.last_time = now
+        return now
+
+
+def _into(image, frame):
+    """Copy `frame` into the caller's buffer when it has the same shape, else return `frame`."""
+    if image is not None and image.shape == frame.shape:
+        np.copyto(image, frame)
+        return image
+    return frame
+
+
+class CameraSource:
+    camera = True
+
+    def __init__(self, index=0, width=640, height=480, fps=30, fourcc="MJPG", buffer_size=1,
+                 threaded=True, driver_timestamps=True, api=None):
+        """
+        Live camera tuned for latency (V4L2 on Linux).
+
+        Asks the driver for MJPEG at the given size and rate (webcams often
+        default to YUYV, which USB bandwidth limits to low rates at larger
+        sizes) and for the smallest capture buffer, so a frame is never
+        served from a queue of stale ones. What the driver actually agreed
+        to is in `settings`.
+
+        With `threaded`, a grab thread reads the camera continuously into
+        three rotating buffers, and `read` returns the newest finished
+        frame without waiting for the next one, dropping any frame the
+        reader was too slow for.
+
+        Args:
+            index (int): Camera index
+            width (int): Requested frame width, None keeps the driver's
+            height (int): Requested frame height, None keeps the driver's
+            fps (float): Requested frame rate, None keeps the driver's
+            fourcc (str): Requested pixel format, None keeps the driver's
+            buffer_size (int): Driver-side frame buffers (CAP_PROP_BUFFERSIZE)
+            threaded (bool): Grab frames on a background thread
+            driver_timestamps (bool): Stamp frames with the driver's capture
+                time when it is on the time.monotonic() clock (V4L2 is),
+                instead of the time the frame reached user space
+            api (int): OpenCV capture backend, defaults to CAP_V4L2 on Linux
+
+        Raises:
+            RuntimeError: If the camera cannot be opened
+        """
+        if api is None:
+            api = cv2.CAP_V4L2 if sys.platform.startswith("linux") else cv2.CAP_ANY
+        self.cap = cv2.VideoCapture(index, api)
+        if not self.cap.isOpened() and api != cv2.CAP_ANY:
+            self.cap = cv2.VideoCapture(index)
+        if not self.cap.isOpened():
+            raise RuntimeError(f"Cannot open camera {index}")
+
+        # The pixel format goes first: V4L2 only offers the larger MJPEG modes once it is set
+        if fourcc:
+            self.cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*fourcc))
+        if width and height:
+            self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+            self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+        if fps:
+            self.cap.set(cv2.CAP_PROP_FPS, fps)
+        self.cap.set(cv2.CAP_PROP_BUFFERSIZE, buffer_size)
+        self._read_settings()
+        self.fps = self.settings["fps"] or fps or 30.0
+        self.driver_timestamps = driver_timestamps
+        self.pending_size = None
+        self.decode_interval = 0.0
+        self.last_decode = float("-inf")
+        self.buffer = None
+        self.grabbed = 0
+        self.read_count = 0
+        self.driver_stamped = 0
+
+        self.thread = None
+        if threaded:
+            # Triple buffering: the grab thread writes the buffer that is
+            # neither the newest finished frame nor the one lent to the reader
+            self.buffers = [None, None, None]
+            self.latest = None
+            self.reading = None
+            self.latest_time = 0.0
+            self.sequence = 0
+            self.read_sequence = 0
+            self.failed = False
+            self.running = True
+            self.condition = threading.Condition()
+            self.thread = threading.Thread(target=self._grab_loop, name="grab", daemon=True)
+            self.thread.start()
+
+    def _read_settings(self):
+        self.settings = {
+            "fourcc": _fourcc_name(self.cap.get(cv2.CAP_PROP_FOURCC)),
+            "width": int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+            "height": int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+            "fps": self.cap.get(cv2.CAP_PROP_FPS),
+            "buffer_size": int(self.cap.get(cv2.CAP_PROP_BUFFERSIZE)),
+        }
+
+    def set_resolution(self, width, height):
+        """
+        Ask the driver for another frame size, from any thread.
+
+        Applied by the thread that grabs, between two frames (V4L2 restarts
+        the stream for it, which drops a frame or two). The size the driver
+        agreed to ends up in `settings`.
+        """
+        self.pending_size = (width, height)
+
+    def _apply_size(self):
+        width, height = self.pending_size
+        self.pending_size = None
+        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+        self._read_settings()
+
+    def _timestamp(self):
+        now = time.monotonic()
+        if self.driver_timestamps:
+            captured = self.cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0
+            # Anything not on our clock (0, stream positions, other clocks) is ignored
+            if 0.0 <= now - captured < 1.0:
+                self.driver_stamped += 1
+                return captured
+        return now
+
+    def set_rate(self, fps=None):
+        """
+        Decode at most `fps` frames per second; None decodes every frame.
+
+        Frames in between are still dequeued from the driver, which is cheap,
+        so the next decoded frame is a fresh one rather than a stale buffer.
+        """
+        self.decode_interval = 1.0 / fps if fps else 0.0
+
+    def _due(self, timestamp):
+        if timestamp - self.last_decode < self.decode_interval:
+            return False
+        self.last_decode = timestamp
+        return True
+
+    def _grab_loop(self):
+        while self.running:
+            if self.pending_size is not None:
+                self._apply_size()
+            success = self.cap.grab()
+            timestamp = self._timestamp()
+            if success and not self._due(timestamp):
+                continue
+            with self.condition:
+                index = next(i for i in range(3) if i != self.latest and i != self.reading)
+            if success:
+                success, frame = self.cap.retrieve(self.buffers[index])
+            with self.condition:
+                if not success:
+                    self.failed = True
+                    self.condition.notify_all()
+                    return
+                self.buffers[index] = frame
+                self.latest = index
+                self.latest_time = timestamp
+                self.sequence += 1
+                self.grabbed += 1
+                self.condition.notify_all()
+
+    def read(self, image=None, timeout=2.0):
+        """
+        Return the newest frame and its capture timestamp.
+
+        Args:
+            image: Optional buffer to copy the frame into, used if its shape matches
+            timeout (float): Seconds to wait for a frame newer than the last one read
+
+        Returns:
+            (timestamp, frame), or None if the camera stopped delivering. The
+            frame is `image` when usable, otherwise a buffer of the source
+            that stays valid until the next `read`
+        """
+        if self.thread is None:
+            if self.pending_size is not None:
+                self._apply_size()
+            while True:
+                if not self.cap.grab():
+                    return None
+                timestamp = self._timestamp()
+                if self._due(timestamp):
+                    break
+            success, frame = self.cap.retrieve(image if image is not None else self.buffer)
+            if not success:
+                return None
+            if image is None:
+                self.buffer = frame
+            self.grabbed += 1
+            self.read_count += 1
+            return timestamp, frame
+
+        with self.condition:
+            if not self.condition.wait_for(lambda: self.sequence > self.read_sequence or self.failed,
+                                           timeout):
+                return None
+            if self.sequence == self.read_sequence:
+                return None
+            self.reading = self.latest
+            self.read_sequence = self.sequence
+            timestamp = self.latest_time
+        self.read_count += 1
+        return timestamp, _into(image, self.buffers[self.reading])
+
+    def release(self):
+        """Stop the grab thread and close the camera."""
+        if self.thread is not None:
+            self.running = False
+            self.thread.join(timeout=1.0)
+        self.cap.release()
+
+    def get_stats(self):
+        """Return the negotiated settings plus grabbed, read and skipped frame counts."""
+        stats = dict(self.settings)
+        stats.update({
+            "grabbed": self.grabbed,
+            "read": self.read_count,
+            "skipped": self.grabbed - self.read_count,
+            "driver_timestamps": self.driver_stamped,
+        })
+        return stats
+
+
+class VideoFileSource:
+    camera = False
+
+    def __init__(self, path, realtime=False, loop=False):
+        """
+        Frames of a video file.
+
+        Args:
+            path (str): Video file
+            realtime (bool): Pace frames at the video's frame rate (see FrameClock)
+            loop (bool): Start over at the end instead of ending
+
+        Raises:
+            RuntimeError: If the file cannot be opened
+        """
+        self.path = path
+        self.cap = cv2.VideoCapture(path)
+        if not self.cap.isOpened():
+            raise RuntimeError(f"Cannot open video {path!r}")
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS) or 30.0
+        self.loop = loop
+        self.clock = FrameClock(self.fps, realtime)
+        self.buffer = None
+
+    def read(self, image=None):
+        """Return (timestamp, frame) for the next frame, or None at the end; see CameraSource.read."""
+        target = image if image is not None else self.buffer
+        success, frame = self.cap.read(image=target)
+        if not success and self.loop:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            success, frame = self.cap.read(image=target)
+        if not success:
+            return None
+        if image is None:
+            self.buffer = frame
+        return self.clock.tick(), frame
+
+    def set_rate(self, fps=None):
+        """Pace frames at `fps`, None restores the video's rate; see FrameClock."""
+        self.clock.set_rate(fps)
+
+    def release(self):
+        self.cap.release()
+
+    def get_stats(self):
+        return {"path": self.path, "fps": self.fps, "read": self.clock.index}
+
+
+class ImageDirectorySource:
+    camera = False
+
+    def __init__(self, directory, fps=30.0, realtime=False, loop=False):
+        """
+        Frames from the image files of a directory, in file name order.
+
+        Args:
+            directory (str): Directory of .png, .jpg or .bmp files
+            fps (float): Frame rate the images are timestamped (and paced) at
+            realtime (bool): Pace frames at `fps` (see FrameClock)
+            loop (bool): Start over after the last image instead of ending
+
+        Raises:
+            RuntimeError: If the directory holds no images
+        """
+        self.paths = sorted(os.path.join(directory, name) for name in os.listdir(directory)
+                            if name.lower().endswith(IMAGE_EXTENSIONS))
+        if not self.paths:
+            raise RuntimeError(f"No images in {directory!r}")
+        self.fps = fps
+        self.loop = loop
+        self.clock = FrameClock(fps, realtime)
+        self.index = 0
+
+    def read(self, image=None):
+        """Return (timestamp, frame) for the next image, or None after the last; see CameraSource.read."""
+        while True:
+            if self.index == len(self.paths):
+                if not self.loop:
+                    return None
+                self.index = 0
+            path = self.paths[self.index]
+            self.index += 1
+            frame = cv2.imread(path, cv2.IMREAD_COLOR)
+            if frame is not None:
+                return self.clock.tick(), _into(image, frame)
+            print(f"Skipping unreadable image {path}", file=sys.stderr)
+
+    def set_rate(self, fps=None):
+        """Pace frames at `fps`, None restores the configured rate; see FrameClock."""
+        self.clock.set_rate(fps)
+
+    def release(self):
+        pass
+
+    def get_stats(self):
+        return {"images": len(self.paths), "fps": self.fps, "read": self.clock.index}
+
+
+class SyntheticSource:
+    camera = False
+
+    def __init__(self, width=640, height=480, fps=30.0, frames=None, realtime=True, seed=0):
+        """
+        Generated frames, for running the pipeline without a camera.
+
+        Cycles through a few smooth random images with a bright square
+        moving across them, so tracking and rendering do real work. Setting
+        `moving` to False freezes the scene on one still image.
+
+        Args:
+            width (int): Frame width
+            height (int): Frame height
+            fps (float): Frame rate
+            frames (int): Number of frames before the source ends, None never ends
+            realtime (bool): Pace frames at `fps` (see FrameClock)
+            seed (int): Seed of the background images
+        """
+        self.seed = seed
+        self._generate(width, height)
+        self.pending_size = None
+        self.fps = fps
+        self.frames = frames
+        self.clock = FrameClock(fps, realtime)
+        self.moving = True
+
+    def _generate(self, width, height):
+        rng = np.random.default_rng(self.seed)
+        small = rng.integers(0, 256, (8, height // 8 + 1, width // 8 + 1, 3), dtype=np.uint8)
+        self.backgrounds = [cv2.resize(frame, (width, height), interpolation=cv2.INTER_LINEAR) for frame in small]
+        self.buffer = np.empty((height, width, 3), dtype=np.uint8)
+
+    def set_resolution(self, width, height):
+        """Generate frames of another size from the next read on; see CameraSource.set_resolution."""
+        self.pending_size = (width, height)
+
+    def read(self, image=None):
+        """Return (timestamp, frame) for the next generated frame; see CameraSource.read."""
+        index = self.clock.index
+        if self.frames is not None and index >= self.frames:
+            return None
+        # Like a camera, the frame shows the scene at its timestamp, after the wait
+        timestamp = self.clock.tick()
+        if self.pending_size is not None:
+            self._generate(*self.pending_size)
+            self.pending_size = None
+        frame = image if image is not None and image.shape == self.buffer.shape else self.buffer
+        if not self.moving:
+            np.copyto(frame, self.backgrounds[0])
+            return timestamp, frame
+        np.copyto(frame, self.backgrounds[index % len(self.backgrounds)])
+        height, width = frame.shape[:2]
+        size = max(min(width, height) // 8, 1)
+        x = index * 4 % max(width - size, 1)
+        frame[height // 2 - size // 2:height // 2 + size // 2, x:x + size] = 255
+        return timestamp, frame
+
+    def set_rate(self, fps=None):
+        """Pace frames at `fps`, None restores the configured rate; see FrameClock."""
+        self.clock.set_rate(fps)
+
+    def release(self):
+        pass
+
+    def get_stats(self):
+        height, width = self.buffer.shape[:2]
+        return {"width": width, "height": height, "fps": self.fps, "read": self.clock.index}
+
+
+FRAME_SOURCES = {
+    "camera": CameraSource,
+    "video": VideoFileSource,
+    "images": ImageDirectorySource,
+    "synthetic": SyntheticSource,
+}
+
+
+def create_frame_source(spec, width=640, height=480, fps=30.0, fourcc="MJPG", realtime=True):
+    """
+    Open a frame source from a command-line style description.
+
+    Args:
+        spec: Camera index (int or digits), "synthetic", an image directory
+            or a video file path
+        width (int): Camera and synthetic frame width
+        height (int): Camera and synthetic frame height
+        fps (float): Camera, synthetic and image directory frame rate
+        fourcc (str): Camera pixel format
+        realtime (bool): Pace file, directory and synthetic frames like a
+            camera; False reads them as fast as possible with reproducible
+            timestamps
+
+    Returns:
+        One of FRAME_SOURCES
+    """
+    spec = str(spec)
+    if spec.isdigit():
+        return CameraSource(int(spec), width=width, height=height, fps=fps, fourcc=fourcc)
+    if spec == "synthetic":
+        return SyntheticSource(width, height, fps, realtime=realtime)
+    if os.path.isdir(spec):
+        return ImageDirectorySource(spec, fps=fps, realtime=realtime)
+    return VideoFileSource(spec, realtime=realtime)
@@ -1,283 +1,1153 @@
 import numpy as np
-import cv2
-import pyautogui
-from collections import deque
-import keyboard
+import heapq
+import math
+import operator
 import time
-import mediapipe as mp
 
-class GestureDetector:
-    def __init__(self, smoothing_factor=5):
+from utils.filters import OneEuroFilter, create_filter
+from utils.motion import LandmarkHistory, ValueHistory
+
+
+# MediaPipe landmark indices used by the feature vector
+WRIST, MIDDLE_MCP = 0, 9  # Their distance is the hand scale
+FINGER_TIPS = [4, 8, 12, 16, 20]  # Thumb, index, middle, ring, pinky
+FINGER_MCPS = [2, 5, 9, 13, 17]  # Base joint of each finger
+
+# (a, b, c) triplets; the angle is measured at b
+ANGLE_JOINTS = [
+    (4, 0, 8),     # Thumb - wrist - index (screenshot "L" shape)
+    (2, 3, 4),     # Thumb IP
+    (5, 6, 7),     # Index PIP
+    (9, 10, 11),   # Middle PIP
+    (13, 14, 15),  # Ring PIP
+    (17, 18, 19),  # Pinky PIP
+]
+
+
+def _build_difference_operator():
+    """
+    Build the matrix that maps (21, 3) landmarks to every difference vector
+    the features need, so one matmul replaces dozens of point lookups.
+
+    Rows: one zero row, the 10 fingertip pairs, base-minus-tip for each
+    finger, a-b and c-b for each joint in ANGLE_JOINTS, and finally the
+    fingertips themselves.
+    """
+    pairs = [(i, j) for i in range(5) for j in range(i + 1, 5)]
+    rows = [None]
+    rows += [(FINGER_TIPS[i], FINGER_TIPS[j]) for i, j in pairs]
+    rows += list(zip(FINGER_MCPS, FINGER_TIPS))
+    rows += [(a, b) for a, b, _ in ANGLE_JOINTS]
+    rows += [(c, b) for _, b, c in ANGLE_JOINTS]
+    rows += [(tip, None) for tip in FINGER_TIPS]
+
+    operator = np.zeros((len(rows), 21), dtype=np.float32)
+    for k, row in enumerate(rows):
+        if row is not None:
+            operator[k, row[0]] += 1
+            if row[1] is not None:
+                operator[k, row[1]] -= 1
+
+    # Row holding the distance between fingertips i and j (row 0 when i == j)
+    pair_rows = [[0] * 5 for _ in range(5)]
+    for k, (i, j) in enumerate(pairs, start=1):
+        pair_rows[i][j] = pair_rows[j][i] = k
+    return operator, pair_rows
+
+
+DIFFERENCE_OPERATOR, TIP_PAIR_ROWS = _build_difference_operator()
+_PAIR_ROWS = slice(1, 11)
+_RISE_ROWS = slice(11, 16)
+_JOINT_A_ROWS = slice(16, 16 + len(ANGLE_JOINTS))
+_JOINT_C_ROWS = slice(16 + len(ANGLE_JOINTS), 16 + 2 * len(ANGLE_JOINTS))
+_TIP_ROWS = slice(16 + 2 * len(ANGLE_JOINTS), 21 + 2 * len(ANGLE_JOINTS))
+
+# Layout of HandFeatures.vector: differences (rows x 3), lengths, angles
+_LENGTH_OFFSET = 3 * len(DIFFERENCE_OPERATOR)
+_ANGLE_OFFSET = _LENGTH_OFFSET + len(DIFFERENCE_OPERATOR)
+
+# Entries of HandFeatures.vector that describe the hand's pose: everything
+# but the fingertip positions, which depend on where the hand is in the frame
+POSE_INDICES = np.concatenate([
+    np.arange(3, 3 * _TIP_ROWS.start),
+    np.arange(_LENGTH_OFFSET + 1, _LENGTH_OFFSET + _TIP_ROWS.start),
+    np.arange(_ANGLE_OFFSET, _ANGLE_OFFSET + len(ANGLE_JOINTS)),
+])
+
+# Entries of HandFeatures.vector copied to HandFeatures.values for scalar
+# lookups: the fingertip distances (starting with the zero row), the base to
+# tip offset of each finger, the fingertip positions and the joint angles
+_SCALAR_INDICES = np.concatenate([
+    np.arange(_LENGTH_OFFSET, _LENGTH_OFFSET + _PAIR_ROWS.stop),
+    np.arange(3 * _RISE_ROWS.start, 3 * _RISE_ROWS.stop),
+    np.arange(3 * _TIP_ROWS.start, 3 * _TIP_ROWS.stop),
+    np.arange(_ANGLE_OFFSET, _ANGLE_OFFSET + len(ANGLE_JOINTS)),
+])
+_VALUE_RISES = _PAIR_ROWS.stop
+_VALUE_TIPS = _VALUE_RISES + 3 * (_RISE_ROWS.stop - _RISE_ROWS.start)
+_VALUE_ANGLES = _VALUE_TIPS + 3 * (_TIP_ROWS.stop - _TIP_ROWS.start)
+
+_TWO_PI = np.full(len(ANGLE_JOINTS), 2 * np.pi, dtype=np.float32)
+
+
+class HandFeatures:
+    def __init__(self):
         """
-        Initialize the gesture detector.
-        
+        Per-frame geometric features of one hand, computed once and shared.
+
+        Distances are measured in hand scales (the wrist to middle finger base
+        length) rather than pixels, so the same thresholds hold at any camera
+        resolution and distance from the camera. Fingertip positions stay in
+        the landmarks' units.
+
+        All arrays are views into one preallocated `vector` that `update`
+        overwrites in place, so computing features allocates no arrays per
+        frame. `values` holds the entries scalar lookups read (fingertip
+        distances, offsets and positions, joint angles) as a Python list,
+        converted once per frame so lookups by the gesture rules stay cheap.
+
+        Attributes:
+            vector: Flat float32 feature vector backing the views below
+            scale: Wrist to middle finger base distance in landmark units
+            tip_distances: (10,) pairwise fingertip distances in condensed
+                order (0-1, 0-2, ..., 3-4); use `tip_distance(i, j)` to look
+                up a single pair
+            tip_rise: (5,) height of each fingertip above its base joint, in hand scales
+            extended: (5,) True where a fingertip is above its base joint
+            angles: Joint angles in degrees, one per entry of ANGLE_JOINTS
+            tips: (5, 3) fingertip positions (not scaled)
+            valid: Whether the features describe a detected hand
+            history: LandmarkHistory the motion features read, or None
+        """
+        n = len(DIFFERENCE_OPERATOR)
+        self.vector = np.zeros(_ANGLE_OFFSET + len(ANGLE_JOINTS), dtype=np.float32)
+        self._scalars = np.zeros(len(_SCALAR_INDICES), dtype=np.float32)
+        self.values = self._scalars.tolist()
+        self.differences = self.vector[:_LENGTH_OFFSET].reshape(n, 3)
+        self.lengths = self.vector[_LENGTH_OFFSET:_ANGLE_OFFSET]
+        self.angles = self.vector[_ANGLE_OFFSET:]
+        self.directions = np.zeros(n, dtype=np.float32)
+        self.scale = 1.0
+        self.valid = False
+        self.history = None  # LandmarkHistory of the hand, set by GestureDetector
+
+        # Views into the buffers above, created once so update() only does math
+        self._dx = self.differences[:, 0]
+        self._dy = self.differences[:, 1]
+        self._relative = self.differences[:_TIP_ROWS.start]
+        self.tip_distances = self.lengths[_PAIR_ROWS]
+        self.tip_rise = self._dy[_RISE_ROWS]
+        self.tips = self.differences[_TIP_ROWS]
+        self._direction_a = self.directions[_JOINT_A_ROWS]
+        self._direction_c = self.directions[_JOINT_C_ROWS]
+        self._scratch = np.zeros(len(ANGLE_JOINTS), dtype=np.float32)
+
+    @property
+    def extended(self):
+        """(5,) True where a fingertip is above its base joint."""
+        return self.tip_rise > 0
+
+    def tip_distance(self, i, j):
+        """Return the distance between fingertips i and j (0 = thumb ... 4 = pinky), in hand scales."""
+        return self.values[TIP_PAIR_ROWS[i][j]]
+
+    def rise(self, finger):
+        """Return how far a fingertip is above its base joint, in hand scales."""
+        return self.values[_VALUE_RISES + 3 * finger + 1]
+
+    def is_extended(self, finger):
+        """Return True if a fingertip is above its base joint."""
+        return self.values[_VALUE_RISES + 3 * finger + 1] > 0
+
+    def tip_position(self, finger):
+        """Return the (x, y) position of a fingertip."""
+        offset = _VALUE_TIPS + 3 * finger
+        return self.values[offset], self.values[offset + 1]
+
+    def angle(self, joint):
+        """Return a joint angle in degrees, indexed like ANGLE_JOINTS."""
+        return self.values[_VALUE_ANGLES + joint]
+
+    def pose_vector(self, out=None):
+        """
+        Return the position-independent part of the feature vector.
+
         Args:
-            smoothing_factor (int): Number of frames to use for smoothing cursor movement
+            out: Optional float32 array of length len(POSE_INDICES) to fill
+
+        Returns:
+            Flat float32 array of scaled joint offsets, distances and angles
         """
-        self.smoothing_factor = smoothing_factor
-        self.prev_points = deque(maxlen=smoothing_factor)
-        self.screen_width, self.screen_height = pyautogui.size()
-        
-        # MediaPipe hand landmark indices
-        self.THUMB_TIP = 4
-        self.INDEX_FINGER_TIP = 8
-        self.MIDDLE_FINGER_TIP = 12
-        self.RING_FINGER_TIP = 16
-        self.PINKY_TIP = 20
-        self.WRIST = 0
-        
-        # Gesture cooldown timers
-        self.last_volume_change = 0
-        self.last_screenshot = 0
-        self.last_tab_switch = 0
-        self.last_mic_toggle = 0
-        self.cooldown = 0.5  # Cooldown time in seconds
-        self.prev_landmarks = None
-        self.prev_time = time.time()
-        self.last_gesture_time = 0
-        self.emoji_cooldown = 1.0  # Longer cooldown for emoji gestures
+        return np.take(self.vector, POSE_INDICES, out=out)
 
-    def calculate_distance(self, point1, point2):
-        """Calculate Euclidean distance between two points."""
-        return np.sqrt((point1[0] - point2[0])**2 + (point1[1] - point2[1])**2)
+    @property
+    def thumb_dx(self):
+        """Horizontal offset between the thumb tip and its base joint, in hand scales."""
+        return abs(self.values[_VALUE_RISES])
 
-    def calculate_angle(self, point1, point2, point3):
-        """Calculate angle between three points."""
-        a = np.array(point1)
-        b = np.array(point2)
-        c = np.array(point3)
-        
-        ba = a - b
-        bc = c - b
-        
-        cosine_angle = np.dot(ba, bc) / (np.linalg.norm(ba) * np.linalg.norm(bc))
-        angle = np.arccos(cosine_angle)
-        
-        return np.degrees(angle)
+    def update(self, landmarks):
+        """
+        Recompute every feature from a (21, 3) landmark array.
 
-    def is_click_gesture(self, landmarks):
+        Args:
+            landmarks: (21, 3) float32 landmark array (pixels or normalized
+                coordinates alike), or None if no hand
+
+        Returns:
+            HandFeatures: self, for chaining
         """
-        Detect if the thumb and index finger are touching (click gesture).
-        
+        if landmarks is None or len(landmarks) < 21:
+            self.valid = False
+            return self
+
+        scale = math.hypot(landmarks[MIDDLE_MCP, 0] - landmarks[WRIST, 0],
+                           landmarks[MIDDLE_MCP, 1] - landmarks[WRIST, 1])
+        if scale <= 0:
+            self.valid = False
+            return self
+        self.scale = scale
+
+        np.dot(DIFFERENCE_OPERATOR, landmarks, out=self.differences)
+        self._relative /= scale
+        np.hypot(self._dx, self._dy, out=self.lengths)
+
+        # Joint angle = difference between the directions of a-b and c-b
+        np.arctan2(self._dy, self._dx, out=self.directions)
+        np.subtract(self._direction_a, self._direction_c, out=self.angles)
+        np.abs(self.angles, out=self.angles)
+        np.subtract(_TWO_PI, self.angles, out=self._scratch)
+        np.minimum(self.angles, self._scratch, out=self.angles)
+        np.degrees(self.angles, out=self.angles)
+
+        self.vector.take(_SCALAR_INDICES, out=self._scalars)
+        self.values = self._scalars.tolist()
+        self.valid = True
+        return self
+
+
+class ClickStateMachine:
+    IDLE = "idle"
+    PRESSED = "pressed"
+    DRAGGING = "dragging"
+
+    def __init__(self, press_threshold=0.3, release_threshold=0.4, refractory=0.2, drag_delay=0.4):
+        """
+        Edge-triggered click detector with hysteresis.
+
+        A press starts when the pinch distance falls below `press_threshold`
+        and only ends once it rises above `release_threshold`, so jitter
+        around a single threshold cannot produce repeated clicks. Holding the
+        press for `drag_delay` seconds turns it into a drag. After a click or
+        drag ends, new presses are ignored for `refractory` seconds.
+
         Args:
-            landmarks: List of hand landmarks
-            
+            press_threshold (float): Distance below which a press starts, in hand scales
+            release_threshold (float): Distance above which a press ends, in hand scales
+            refractory (float): Seconds to ignore presses after an action
+            drag_delay (float): Hold time that starts a drag, None disables dragging
+        """
+        self.press_threshold = press_threshold
+        self.release_threshold = release_threshold
+        self.refractory = refractory
+        self.drag_delay = drag_delay
+        self.state = self.IDLE
+        self.press_time = 0
+        self.last_action_time = float("-inf")
+
+    def update(self, distance, now=None):
+        """
+        Feed the current pinch distance and return the resulting event.
+
+        Args:
+            distance (float): Current pinch distance, None if no hand is visible
+            now (float): Current time in seconds, defaults to time.time()
+
         Returns:
-            bool: True if click gesture is detected
+            str: "click", "down" (drag start), "up" (drag end) or None
         """
-        if len(landmarks) < 21:  # Need at least 21 landmarks for a complete hand
-            return False
-            
-        thumb_tip = landmarks[self.THUMB_TIP]
-        index_tip = landmarks[self.INDEX_FINGER_TIP]
-        
-        distance = self.calculate_distance(thumb_tip, index_tip)
-        return distance < 30  # Threshold for click detection
+        if now is None:
+            now = time.time()
+        released = distance is None or distance > self.release_threshold
 
-    def is_right_click_gesture(self, landmarks):
+        if self.state == self.IDLE:
+            if (distance is not None and distance < self.press_threshold
+                    and now - self.last_action_time >= self.refractory):
+                self.state = self.PRESSED
+                self.press_time = now
+            return None
+
+        if self.state == self.PRESSED:
+            if released:
+                self.state = self.IDLE
+                self.last_action_time = now
+                return "click"
+            if self.drag_delay is not None and now - self.press_time >= self.drag_delay:
+                self.state = self.DRAGGING
+                return "down"
+            return None
+
+        if released:
+            self.state = self.IDLE
+            self.last_action_time = now
+            return "up"
+        return None
+
+    def reset(self):
         """
-        Detect if thumb, index, and middle fingers form a circle (right-click gesture).
-        
+        Return to the idle state.
+
+        Returns:
+            str: "up" if a drag was in progress and must be released, else None
+        """
+        event = "up" if self.state == self.DRAGGING else None
+        self.state = self.IDLE
+        return event
+
+
+# Offsets into HandFeatures.values for the scalars the gesture rules read
+_THUMB_INDEX = TIP_PAIR_ROWS[0][1]
+_THUMB_MIDDLE = TIP_PAIR_ROWS[0][2]
+_INDEX_MIDDLE = TIP_PAIR_ROWS[1][2]
+_RISE = [_VALUE_RISES + 3 * finger + 1 for finger in range(5)]
+_THUMB_DX = _VALUE_RISES
+
+# Landmarks and windows (seconds) of the motion features; windows are in
+# time rather than frames so the gestures behave the same at any frame rate.
+# Speeds are only measured once the hand has been seen for a whole window,
+# as a fit over the first two or three frames of a reappearing hand is noise.
+_SWIPE_POINTS = [8, 12]  # Index and middle fingertips
+_SWIPE_WINDOW = 0.25
+_CIRCLE_WINDOW = 1.0
+_CIRCLE_MIN_RADIUS = 0.2  # Hand scales
+_FLICK_WINDOW = 0.15
+
+
+def _swipe_dx(features):
+    """Horizontal speed of the index/middle fingertips over the swipe window, in hand scales/s."""
+    if features.history is None or not features.history.covers(_SWIPE_WINDOW):
+        return None
+    velocity = features.history.velocity(_SWIPE_POINTS, _SWIPE_WINDOW)
+    return None if velocity is None else float(velocity[0])
+
+
+def _swipe_dy(features):
+    """Upward speed of the index/middle fingertips over the swipe window, in hand scales/s."""
+    if features.history is None or not features.history.covers(_SWIPE_WINDOW):
+        return None
+    velocity = features.history.velocity(_SWIPE_POINTS, _SWIPE_WINDOW)
+    return None if velocity is None else -float(velocity[1])
+
+
+def _circle(features):
+    """Angle the index fingertip turned over the circle window, in degrees (clockwise positive)."""
+    if features.history is None or not features.history.covers(_CIRCLE_WINDOW):
+        return None
+    sweep = features.history.sweep(FINGER_TIPS[1], _CIRCLE_WINDOW)
+    if sweep is None or sweep[1] < _CIRCLE_MIN_RADIUS:
+        return None
+    return sweep[0]
+
+
+def _flick_dx(features):
+    """Horizontal speed of the index fingertip relative to the wrist, in hand scales/s."""
+    if features.history is None or not features.history.covers(_FLICK_WINDOW):
+        return None
+    velocity = features.history.velocity(FINGER_TIPS[1], _FLICK_WINDOW, relative_to=WRIST)
+    return None if velocity is None else float(velocity[0])
+
+
+# Named scalar features gesture rules can refer to, computed once per frame.
+# Distances and movements are in hand scales, angles in degrees.
+GESTURE_FEATURES = {
+    "thumb_index": lambda f: f.values[_THUMB_INDEX],
+    "index_middle": lambda f: f.values[_INDEX_MIDDLE],
+    "pinch_spread": lambda f: max(f.values[_THUMB_INDEX], f.values[_THUMB_MIDDLE], f.values[_INDEX_MIDDLE]),
+    "thumb_rise": lambda f: f.values[_RISE[0]],
+    "thumb_dx": lambda f: abs(f.values[_THUMB_DX]),
+    "thumb_index_angle": lambda f: f.values[_VALUE_ANGLES],
+    "thumb_extended": lambda f: f.values[_RISE[0]] > 0,
+    "index_extended": lambda f: f.values[_RISE[1]] > 0,
+    "middle_extended": lambda f: f.values[_RISE[2]] > 0,
+    "ring_extended": lambda f: f.values[_RISE[3]] > 0,
+    "pinky_extended": lambda f: f.values[_RISE[4]] > 0,
+    "swipe_dx": _swipe_dx,
+    "swipe_dy": _swipe_dy,
+    "circle": _circle,
+    "flick_dx": _flick_dx,
+}
+
+_COMPARISONS = {
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "==": operator.eq,
+}
+
+
+class TwoHandFeatures:
+    def __init__(self):
+        """
+        Per-frame features relating two hands, computed from their HandFeatures.
+
+        The hands are ordered left to right in the image, so the angle of the
+        line between them does not depend on which hand was tracked first.
+
+        Distances are in hand scales, averaged over both hands.
+
+        Attributes:
+            distance: Distance between the two index fingertips
+            angle: Direction of the line from the left to the right index
+                fingertip, in degrees (clockwise on screen is positive)
+            thumbs_distance: Distance between the two thumb tips
+            pinches: (left, right) thumb-index distance of each hand
+            valid: Whether both hands were detected
+            history: ValueHistory of log distance and unwrapped angle the
+                spread and rotation features read, or None
+        """
+        self.distance = 0.0
+        self.angle = 0.0
+        self.thumbs_distance = 0.0
+        self.pinches = (0.0, 0.0)
+        self.valid = False
+        self.history = None  # Set by MultiHandGestureDetector
+
+    def update(self, left, right):
+        """
+        Recompute the features from two hands.
+
         Args:
-            landmarks: List of hand landmarks
-            
+            left: HandFeatures of one hand, or None
+            right: HandFeatures of the other hand, or None
+
         Returns:
-            bool: True if right-click gesture is detected
+            TwoHandFeatures: self, for chaining
+        """
+        if left is None or right is None or not left.valid or not right.valid:
+            self.valid = False
+            return self
+
+        (lx, ly), (rx, ry) = left.tip_position(1), right.tip_position(1)
+        if lx > rx:
+            left, right = right, left
+            (lx, ly), (rx, ry) = (rx, ry), (lx, ly)
+        (ltx, lty), (rtx, rty) = left.tip_position(0), right.tip_position(0)
+        scale = (left.scale + right.scale) / 2
+
+        self.distance = math.hypot(rx - lx, ry - ly) / scale
+        self.angle = math.degrees(math.atan2(ry - ly, rx - lx))
+        self.thumbs_distance = math.hypot(rtx - ltx, rty - lty) / scale
+        self.pinches = (left.tip_distance(0, 1), right.tip_distance(0, 1))
+        self.valid = True
+        return self
+
+
+# Window (seconds) of the two-hand motion features, and their columns in TwoHandFeatures.history
+_TWO_HAND_WINDOW = 0.25
+_LOG_DISTANCE, _UNWRAPPED_ANGLE = range(2)
+
+
+def _hands_spread(features):
+    """Relative rate the distance between the hands grows over the window, per second."""
+    if features.history is None or not features.history.covers(_TWO_HAND_WINDOW):
+        return None
+    return features.history.rate(_LOG_DISTANCE, _TWO_HAND_WINDOW)
+
+
+def _hands_rotation(features):
+    """Rotation speed of the line between the hands over the window, in degrees/s."""
+    if features.history is None or not features.history.covers(_TWO_HAND_WINDOW):
+        return None
+    return features.history.rate(_UNWRAPPED_ANGLE, _TWO_HAND_WINDOW)
+
+
+# Named scalar features two-hand gesture rules can refer to
+TWO_HAND_FEATURES = {
+    "hands_distance": lambda f: f.distance,
+    "hands_spread": _hands_spread,
+    "hands_rotation": _hands_rotation,
+    "thumbs_distance": lambda f: f.thumbs_distance,
+    "pinch_max": lambda f: max(f.pinches),
+    "pinch_min": lambda f: min(f.pinches),
+}
+
+# Features fitted over `features.history` rather than read off the current
+# frame, with the seconds of history each needs. They cost far more than the
+# pose features, so GestureEngine computes them only for rules whose other
+# conditions hold once the history covers the window.
+MOTION_FEATURES = {
+    "swipe_dx": _SWIPE_WINDOW,
+    "swipe_dy": _SWIPE_WINDOW,
+    "circle": _CIRCLE_WINDOW,
+    "flick_dx": _FLICK_WINDOW,
+    "hands_spread": _TWO_HAND_WINDOW,
+    "hands_rotation": _TWO_HAND_WINDOW,
+}
+
+
+class GestureRule:
+    def __init__(self, name, conditions, priority=0, cooldown=0.0, groups=(), hold=False, features=GESTURE_FEATURES):
+        """
+        Declarative description of one gesture.
+
+        Each condition is a tuple `(feature, op, threshold)` or
+        `(feature, op, threshold, release_threshold)`, where `feature` is a key
+        of `features` and `op` one of <, <=, >, >=, ==. While the rule is
+        active the release threshold (if given) is used instead, which gives
+        press/release hysteresis. A rule matches when all conditions hold.
+
+        Args:
+            name (str): Gesture name reported when the rule fires
+            conditions (list): Feature conditions that must all hold
+            priority (int): Higher priority rules win their groups first
+            cooldown (float): Minimum seconds between two firings
+            groups (tuple): Exclusivity groups; at most one rule fires per group
+            hold (bool): The gesture is held rather than performed, like a
+                pinch: without a cooldown it fires on every frame it holds,
+                and GestureEngine.held tells those frames from the first
+            features (dict): Feature registry the conditions refer to, e.g.
+                GESTURE_FEATURES or TWO_HAND_FEATURES
         """
-        if len(landmarks) < 21:
+        for condition in conditions:
+            if condition[0] not in features:
+                raise ValueError(f"Unknown gesture feature: {condition[0]}")
+            if condition[1] not in _COMPARISONS:
+                raise ValueError(f"Unknown comparison: {condition[1]}")
+
+        self.name = name
+        self.conditions = [
+            (c[0], _COMPARISONS[c[1]], c[2], c[3] if len(c) > 3 else c[2])
+            for c in conditions
+        ]
+        self.priority = priority
+        self.cooldown = cooldown
+        self.groups = tuple(groups)
+        self.hold = hold
+
+    def matches(self, values, active):
+        """Return True if every condition holds for the given feature values."""
+        return _conditions_hold(self.conditions, values, active)
+
+
+def _conditions_hold(conditions, values, active):
+    """Return True if every `(feature, compare, threshold, release_threshold)` condition holds."""
+    for feature, compare, threshold, release_threshold in conditions:
+        value = values[feature]
+        if value is None or not compare(value, release_threshold if active else threshold):
             return False
-            
-        thumb_tip = landmarks[self.THUMB_TIP]
-        index_tip = landmarks[self.INDEX_FINGER_TIP]
-        middle_tip = landmarks[self.MIDDLE_FINGER_TIP]
-        
-        # Check if all three fingers are close to each other
-        dist1 = self.calculate_distance(thumb_tip, index_tip)
-        dist2 = self.calculate_distance(thumb_tip, middle_tip)
-        dist3 = self.calculate_distance(index_tip, middle_tip)
-        
-        return dist1 < 40 and dist2 < 40 and dist3 < 40
+    return True
+
 
-    def is_volume_gesture(self, landmarks):
+# Each comparison as one or two `sign * value < bound` tests; inclusive bounds
+# are moved to the next float up, so `value <= t` becomes `value < nextafter(t)`
+_BOUND_TESTS = {
+    operator.lt: [(1.0, False)],
+    operator.le: [(1.0, True)],
+    operator.gt: [(-1.0, False)],
+    operator.ge: [(-1.0, True)],
+    operator.eq: [(1.0, True), (-1.0, True)],
+}
+
+
+def _bound(sign, threshold, inclusive):
+    bound = sign * float(threshold)
+    return float(np.nextafter(bound, np.inf)) if inclusive else bound
+
+
+class _FeatureValues(dict):
+    """Feature values of one frame, each computed on first lookup."""
+
+    def __init__(self, extractors, features):
+        super().__init__()
+        self.extractors = extractors
+        self.features = features
+
+    def __missing__(self, name):
+        value = self[name] = self.extractors[name](self.features)
+        return value
+
+
+class GestureEngine:
+    def __init__(self, rules, features=GESTURE_FEATURES, motion_features=MOTION_FEATURES):
         """
-        Detect volume up/down gesture using thumb pointing up/down.
-        
+        Evaluate a set of GestureRules in one pass over shared features.
+
+        Rules are checked in priority order. A matching rule claims all of its
+        exclusivity groups, so lower priority rules sharing a group cannot fire
+        in the same frame. A rule that matches while still cooling down keeps
+        its groups claimed but is not reported, so holding a gesture does not
+        let an overlapping one fire in its place.
+
+        The pose conditions of all rules are precompiled into threshold arrays
+        and checked together in one vectorized comparison per frame, along
+        with whether the history covers the window of each rule's motion
+        features. Only the rules that pass and whose groups are still free
+        then look at their motion features, which are computed on first use,
+        so the history fits run for at most the few rules that could fire.
+
         Args:
-            landmarks: List of hand landmarks
-            
+            rules (list): GestureRule instances
+            features (dict): Feature registry the rules were built against
+            motion_features (dict): Costly features fitted over
+                `features.history`, mapped to the seconds of history they need
+        """
+        self.rules = sorted(rules, key=lambda rule: -rule.priority)
+        self.features = {
+            name: features[name]
+            for name in sorted({c[0] for rule in self.rules for c in rule.conditions})
+        }
+        self.priorities = {rule.name: rule.priority for rule in self.rules}
+        self.groups = {rule.name: rule.groups for rule in self.rules}
+        self.active = set()
+        # Hold rules that fired this frame and were already active on the previous one
+        self.held = set()
+        self.group_owners = {}
+        self.last_fired = {}
+
+        # Pose features and the seconds of history are read into one array per
+        # frame; every condition compares the entry selected by `_columns`
+        # against a bound, motion features requiring history >= their window
+        pose_features = [name for name in self.features if name not in motion_features]
+        self._pose_extractors = [self.features[name] for name in pose_features]
+        span_column = len(pose_features)
+        columns, signs, press, release, starts = [], [], [], [], []
+        self._motion_conditions = []
+        for row, rule in enumerate(self.rules):
+            motion = [condition for condition in rule.conditions if condition[0] in motion_features]
+            tests = [
+                (pose_features.index(feature), compare, threshold, release_threshold)
+                for feature, compare, threshold, release_threshold in rule.conditions
+                if feature not in motion_features
+            ]
+            if motion:
+                window = max(motion_features[condition[0]] for condition in motion)
+                tests.append((span_column, operator.ge, window, window))
+            if not tests:
+                # Every rule needs one test of its own for the per-rule reduction
+                tests.append((span_column, operator.ge, -math.inf, -math.inf))
+            starts.append(len(columns))
+            for column, compare, threshold, release_threshold in tests:
+                for sign, inclusive in _BOUND_TESTS[compare]:
+                    columns.append(column)
+                    signs.append(sign)
+                    press.append(_bound(sign, threshold, inclusive))
+                    release.append(_bound(sign, release_threshold, inclusive))
+            self._motion_conditions.append(motion)
+        self._columns = np.array(columns, dtype=np.intp)
+        self._signs = np.array(signs)
+        self._press_bounds = np.array(press)
+        self._release_bounds = np.array(release)
+        self._starts = np.array(starts, dtype=np.intp)
+        # Each rule's tests are contiguous, so switching its thresholds is one slice assignment
+        self._segments = [slice(start, end) for start, end in zip(starts, starts[1:] + [len(columns)])]
+        self._bounds = self._press_bounds.copy()
+
+    def evaluate(self, features, now=None):
+        """
+        Evaluate all rules against the current frame.
+
+        Args:
+            features: HandFeatures (or TwoHandFeatures) of the current frame
+            now (float): Current time in seconds, defaults to time.time()
+
         Returns:
-            int: 1 for volume up, -1 for volume down, 0 for no change
+            list: Names of the gestures that fired, highest priority first
         """
-        if len(landmarks) < 21:
-            return 0
-            
-        current_time = time.time()
-        if current_time - self.last_volume_change < self.cooldown:
-            return 0
-            
-        thumb_tip = landmarks[self.THUMB_TIP]
-        thumb_mcp = landmarks[2]  # Thumb MCP joint
-        
-        # Check if thumb is pointing up or down
-        if thumb_tip[1] < thumb_mcp[1]:  # Thumb pointing up
-            self.last_volume_change = current_time
-            return 1
-        elif thumb_tip[1] > thumb_mcp[1]:  # Thumb pointing down
-            self.last_volume_change = current_time
-            return -1
-        return 0
-
-    def is_screenshot_gesture(self, landmarks):
-        """
-        Detect 'L' shape gesture for taking screenshot.
-        
+        if not features.valid:
+            self._set_active(set(), [])
+            self.held = set()
+            self.group_owners = {}
+            return []
+        if now is None:
+            now = time.time()
+
+        pose = [extract(features) for extract in self._pose_extractors]
+        pose.append(0.0 if features.history is None else features.history.span)
+        pose = np.array(pose, dtype=np.float64)
+        # A rule holds when all its `sign * value - bound` margins are negative. A
+        # None feature turns into NaN, which fails like None does.
+        margins = np.maximum.reduceat(pose[self._columns] * self._signs - self._bounds, self._starts)
+
+        values = None
+        owners = {}
+        active = set()
+        rows = []
+        fired = []
+        held = set()
+        for row, margin in enumerate(margins.tolist()):
+            if not margin < 0:
+                continue
+            rule = self.rules[row]
+            if owners and not owners.keys().isdisjoint(rule.groups):
+                continue
+            motion = self._motion_conditions[row]
+            if motion:
+                if values is None:
+                    values = _FeatureValues(self.features, features)
+                if not _conditions_hold(motion, values, rule.name in self.active):
+                    continue
+            active.add(rule.name)
+            rows.append(row)
+            for group in rule.groups:
+                owners[group] = rule.name
+            if now - self.last_fired.get(rule.name, -math.inf) >= rule.cooldown:
+                self.last_fired[rule.name] = now
+                fired.append(rule.name)
+                if rule.hold and rule.name in self.active:
+                    held.add(rule.name)
+        self._set_active(active, rows)
+        self.held = held
+        self.group_owners = owners
+        return fired
+
+    def _set_active(self, active, rows):
+        """Record the active rules and switch their conditions to the release thresholds."""
+        if active != self.active:
+            self._bounds[:] = self._press_bounds
+            for row in rows:
+                segment = self._segments[row]
+                self._bounds[segment] = self._release_bounds[segment]
+        self.active = active
+
+    def is_preempted(self, name):
+        """Return True if a higher priority rule claimed one of `name`'s groups this frame."""
+        priority = self.priorities[name]
+        return any(
+            self.priorities[self.group_owners[group]] > priority
+            for group in self.groups[name] if group in self.group_owners
+        )
+
+
+def default_gesture_rules(cooldown=0.5, emoji_cooldown=1.0):
+    """
+    Build the standard gesture set.
+
+    Pinch-like poses (right click, mic toggle, click) share the
+    "pinch" group so a single pinch can no longer trigger several of them;
+    the static poses share "pose" (thumbs up only shows when volume control
+    does not claim the thumb), the emoji poses share "emoji" and the swipes,
+    flicks and scrolling share "swipe". Motion gestures look at the last
+    fraction of a second of landmark history, not just the previous frame.
+
+    Args:
+        cooldown (float): Cooldown for one-shot action gestures
+        emoji_cooldown (float): Cooldown for emoji gestures
+
+    Returns:
+        list: GestureRule instances
+    """
+    fingers_curled = [
+        ("index_extended", "==", False),
+        ("middle_extended", "==", False),
+        ("ring_extended", "==", False),
+        ("pinky_extended", "==", False),
+    ]
+    return [
+        # Held gestures feeding the click state machines
+        GestureRule("right_click", [("pinch_spread", "<", 0.4, 0.5)], priority=100, groups=("pinch",), hold=True),
+        GestureRule("mic_toggle", [
+            ("thumb_index", "<", 0.2),
+            ("middle_extended", "==", True),
+            ("ring_extended", "==", True),
+            ("pinky_extended", "==", True),
+        ], priority=90, cooldown=cooldown, groups=("pinch",)),
+        GestureRule("click", [("thumb_index", "<", 0.3, 0.4)], priority=80, groups=("pinch",), hold=True),
+
+        # One-shot action gestures
+        GestureRule("screenshot", [
+            ("thumb_index_angle", ">=", 75),
+            ("thumb_index_angle", "<=", 105),
+        ], priority=70, cooldown=cooldown, groups=("pose",)),
+        GestureRule("volume_up", [("thumb_rise", ">", 0)] + fingers_curled,
+                    priority=60, cooldown=cooldown, groups=("pose",)),
+        GestureRule("volume_down", [("thumb_rise", "<", 0)] + fingers_curled,
+                    priority=60, cooldown=cooldown, groups=("pose",)),
+        # Cheap pose conditions come first so the motion features are only computed when needed
+        GestureRule("flick_right", [("index_extended", "==", True), ("flick_dx", ">", 7)],
+                    priority=55, cooldown=cooldown, groups=("swipe",)),
+        GestureRule("flick_left", [("index_extended", "==", True), ("flick_dx", "<", -7)],
+                    priority=55, cooldown=cooldown, groups=("swipe",)),
+        GestureRule("tab_next", [("swipe_dx", ">", 6)], priority=50, cooldown=cooldown, groups=("swipe",)),
+        GestureRule("tab_previous", [("swipe_dx", "<", -6)], priority=50, cooldown=cooldown, groups=("swipe",)),
+        GestureRule("scroll_up", [
+            ("index_extended", "==", True),
+            ("middle_extended", "==", True),
+            ("swipe_dy", ">", 2),
+        ], priority=40, cooldown=0.1, groups=("swipe",)),
+        GestureRule("scroll_down", [
+            ("index_extended", "==", True),
+            ("middle_extended", "==", True),
+            ("swipe_dy", "<", -2),
+        ], priority=40, cooldown=0.1, groups=("swipe",)),
+        GestureRule("circle_cw", [("index_extended", "==", True), ("circle", ">", 300)],
+                    priority=45, cooldown=2 * cooldown, groups=("circle",)),
+        GestureRule("circle_ccw", [("index_extended", "==", True), ("circle", "<", -300)],
+                    priority=45, cooldown=2 * cooldown, groups=("circle",)),
+
+        # Emoji gestures, most specific pose first (the heart needs both hands,
+        # see default_two_hand_rules)
+        GestureRule("victory", [
+            ("index_extended", "==", True),
+            ("middle_extended", "==", True),
+            ("index_middle", ">", 0.5),
+        ], priority=34, cooldown=emoji_cooldown, groups=("emoji",)),
+        GestureRule("rock", [
+            ("index_extended", "==", True),
+            ("pinky_extended", "==", True),
+        ], priority=33, cooldown=emoji_cooldown, groups=("emoji",)),
+        GestureRule("thumbs_up", [
+            ("thumb_extended", "==", True),
+            ("thumb_dx", "<", 0.2),
+        ], priority=32, cooldown=emoji_cooldown, groups=("pose", "emoji")),
+        GestureRule("smile", [
+            ("index_extended", "==", True),
+            ("middle_extended", "==", True),
+        ], priority=31, cooldown=emoji_cooldown, groups=("emoji",)),
+    ]
+
+
+def default_two_hand_rules(cooldown=0.5, emoji_cooldown=1.0):
+    """
+    Build the standard two-hand gesture set.
+
+    Pinching with both hands and moving them apart or together zooms; the
+    "two_hand_pinch" hold rule exists so the primary hand's pinch is not
+    taken as a click meanwhile. Turning the line between both hands rotates,
+    and touching index fingertips and thumbs (fingers open) forms a heart.
+
+    Args:
+        cooldown (float): Cooldown for rotate gestures; zoom repeats twice as fast
+        emoji_cooldown (float): Cooldown for the heart emoji
+
+    Returns:
+        list: GestureRule instances over TWO_HAND_FEATURES
+    """
+    def rule(*args, **kwargs):
+        return GestureRule(*args, features=TWO_HAND_FEATURES, **kwargs)
+
+    # Spread and rotation are rates (see _hands_spread), tuned as 0.05 and 5 degrees per frame at 30 fps
+    pinching = [("pinch_max", "<", 0.4, 0.5)]
+    return [
+        rule("heart", [
+            ("thumbs_distance", "<", 0.4),
+            ("hands_distance", "<", 0.4),
+            ("pinch_min", ">", 0.5),
+        ], priority=30, cooldown=emoji_cooldown, groups=("emoji",)),
+        rule("zoom_in", pinching + [("hands_spread", ">", 1.5)],
+             priority=20, cooldown=cooldown / 2, groups=("zoom",)),
+        rule("zoom_out", pinching + [("hands_spread", "<", -1.5)],
+             priority=20, cooldown=cooldown / 2, groups=("zoom",)),
+        rule("two_hand_pinch", pinching, priority=10, groups=("zoom",), hold=True),
+        rule("rotate_cw", [("hands_rotation", ">", 150)], priority=5, cooldown=cooldown, groups=("rotate",)),
+        rule("rotate_ccw", [("hands_rotation", "<", -150)], priority=5, cooldown=cooldown, groups=("rotate",)),
+    ]
+
+
+# Two-hand gestures during which pinches zoom instead of clicking
+PINCH_GESTURES = frozenset({"two_hand_pinch", "zoom_in", "zoom_out"})
+
+
+class MultiHandGestureDetector:
+    def __init__(self, screen_size=None, rules=None, two_hand_rules=None, engine_factory=None):
+        """
+        Keep one GestureDetector per tracked hand and evaluate two-hand gestures.
+
+        Every hand gets its own features, click state machines, cursor filter
+        and cooldowns, keyed by the tracker's track ID. A detector whose hand
+        disappears is released and handed to the next new hand, so a single
+        hand that drops out and comes back keeps its cooldowns exactly as with
+        one detector; its motion history starts over, since the hand may come
+        back anywhere. The primary hand (the one that
+        moves the cursor) stays primary while visible; otherwise the oldest
+        track takes over. Two-hand rules see the two oldest tracks, so the
+        per-frame cost is linear in the number of hands.
+
         Args:
-            landmarks: List of hand landmarks
-            
+            screen_size (tuple): (width, height) of the screen, queried from pyautogui if omitted
+            rules (list): Per-hand GestureRules, defaults to default_gesture_rules()
+            two_hand_rules (list): GestureRules over TWO_HAND_FEATURES,
+                defaults to default_two_hand_rules()
+            engine_factory: Callable returning a new per-hand gesture engine
+                (see GestureDetector's `engine`), used instead of `rules`
+        """
+        if screen_size is None:
+            import pyautogui
+            screen_size = pyautogui.size()
+        self.screen_size = tuple(screen_size)
+        self.rules = rules
+        self.engine_factory = engine_factory
+
+        self.detectors = {}  # Track ID -> GestureDetector
+        self.idle = []  # Released detectors, reused by new hands from the next frame on
+        self.lost = []
+        self.primary_id = None
+        self.primary = self._create_detector()
+        self.idle.append(self.primary)
+
+        if two_hand_rules is None:
+            two_hand_rules = default_two_hand_rules(self.primary.cooldown, self.primary.emoji_cooldown)
+        self.two_hand_engine = GestureEngine(two_hand_rules, TWO_HAND_FEATURES)
+        self.pair = None
+        self.two_hand_features = TwoHandFeatures()
+        # Distance and angle of the current pair over time, for the spread and rotation rates
+        self.two_hand_history = ValueHistory(2)
+        self.two_hand_features.history = self.two_hand_history
+
+    def _create_detector(self):
+        rules = None if self.rules is None else list(self.rules)
+        engine = None if self.engine_factory is None else self.engine_factory()
+        return GestureDetector(rules=rules, screen_size=self.screen_size, engine=engine)
+
+    def update(self, hands, now=None):
+        """
+        Assign a detector to every hand and compute its features.
+
+        Args:
+            hands (list): Hand objects of the current frame
+            now (float): Current time in seconds, defaults to time.time()
+
         Returns:
-            bool: True if screenshot gesture is detected
+            tracked: List of (hand, GestureDetector) in the order of `hands`
+            lost: Detectors whose hand disappeared this frame; their features
+                are already invalid, their click state is left for the caller
+                to release
         """
-        if len(landmarks) < 21:
-            return False
-            
-        current_time = time.time()
-        if current_time - self.last_screenshot < self.cooldown:
-            return False
-            
-        thumb_tip = landmarks[self.THUMB_TIP]
-        index_tip = landmarks[self.INDEX_FINGER_TIP]
-        wrist = landmarks[self.WRIST]
-        
-        # Calculate angle between thumb and index finger
-        angle = self.calculate_angle(thumb_tip, wrist, index_tip)
-        
-        # Check if angle is approximately 90 degrees (L shape)
-        if 75 <= angle <= 105:
-            self.last_screenshot = current_time
-            return True
-        return False
+        # Detectors lost last frame are free again now that the caller released them
+        self.idle.extend(self.lost)
+        ids = {hand.track_id for hand in hands}
+        self.lost = [self.detectors.pop(track_id) for track_id in list(self.detectors) if track_id not in ids]
+        for detector in self.lost:
+            detector.evaluate_gestures(detector.update_features(None), now)
+
+        tracked = []
+        for hand in hands:
+            detector = self.detectors.get(hand.track_id)
+            if detector is None:
+                detector = self.idle.pop() if self.idle else self._create_detector()
+                # Motion features must not fit a path from another track's last position
+                detector.history.clear()
+                self.detectors[hand.track_id] = detector
+            detector.update_features(hand.landmarks, now)
+            tracked.append((hand, detector))
+
+        if self.primary_id not in ids and ids:
+            self.primary_id = min(ids)
+            self.primary = self.detectors[self.primary_id]
+        return tracked, self.lost
 
-    def is_tab_switch_gesture(self, landmarks, prev_landmarks):
+    def evaluate_two_hand_gestures(self, now=None):
         """
-        Detect left/right swipe with two fingers for switching tabs.
-        
+        Evaluate the two-hand rules on the two oldest tracked hands.
+
+        Call after `update`.
+
         Args:
-            landmarks: Current hand landmarks
-            prev_landmarks: Previous frame's hand landmarks
-            
+            now (float): Current time in seconds, defaults to time.time()
+
         Returns:
-            int: 1 for next tab, -1 for previous tab, 0 for no switch
+            list: Names of the two-hand gestures that fired
         """
-        if len(landmarks) < 21 or len(prev_landmarks) < 21:
-            return 0
-            
-        current_time = time.time()
-        if current_time - self.last_tab_switch < self.cooldown:
-            return 0
-            
-        # Get index and middle finger tips
-        index_tip = landmarks[self.INDEX_FINGER_TIP]
-        middle_tip = landmarks[self.MIDDLE_FINGER_TIP]
-        prev_index_tip = prev_landmarks[self.INDEX_FINGER_TIP]
-        prev_middle_tip = prev_landmarks[self.MIDDLE_FINGER_TIP]
+        if now is None:
+            now = time.time()
+        pair = tuple(heapq.nsmallest(2, self.detectors))
+        features = self.two_hand_features
+        if len(pair) == 2:
+            features.update(self.detectors[pair[0]].features, self.detectors[pair[1]].features)
+        else:
+            features.valid = False
+        if pair != self.pair or not features.valid:
+            # Motion features only compare frames of the same two hands
+            self.two_hand_history.clear()
+            self.pair = pair
+        if features.valid:
+            angle = features.angle
+            last = self.two_hand_history.latest()
+            if last is not None:
+                # Unwrap modulo half a turn: when the hands pass vertical, which one is
+                # on the left swaps and the angle jumps by 180 degrees, but the line has not turned
+                angle = last[_UNWRAPPED_ANGLE] + (angle - last[_UNWRAPPED_ANGLE] + 90.0) % 180.0 - 90.0
+            self.two_hand_history.push(now, (math.log(max(features.distance, 1e-6)), angle))
+        return self.two_hand_engine.evaluate(features, now)
+
+    def clicks_suppressed(self):
+        """Return True while both hands pinch to zoom, so the pinches are not clicks."""
+        return not self.two_hand_engine.active.isdisjoint(PINCH_GESTURES)
+
+
+class GestureDetector:
+    def __init__(self, smoothing_factor=5, rules=None, cursor_filter=None, screen_size=None, engine=None):
+        """
+        Initialize the gesture detector.
         
-        # Calculate average horizontal movement
-        current_x = (index_tip[0] + middle_tip[0]) / 2
-        prev_x = (prev_index_tip[0] + prev_middle_tip[0]) / 2
+        Args:
+            smoothing_factor (int): Window of the moving-average cursor filter, if used
+            rules (list): GestureRules to evaluate, defaults to default_gesture_rules()
+            cursor_filter (CursorFilter): Cursor smoothing filter, defaults to a One Euro filter
+            screen_size (tuple): (width, height) of the screen, queried from pyautogui if omitted
+            engine: Object with GestureEngine's evaluate/is_preempted interface used
+                instead of an engine built from `rules`, e.g. a ClassifierEngine
+        """
+        self.smoothing_factor = smoothing_factor
+        self.cursor_filter = cursor_filter if cursor_filter is not None else OneEuroFilter()
+        if screen_size is None:
+            import pyautogui
+            screen_size = pyautogui.size()
+        self.screen_width, self.screen_height = screen_size
         
-        movement = current_x - prev_x
+        # MediaPipe hand landmark indices
+        self.THUMB_TIP = 4
+        self.INDEX_FINGER_TIP = 8
+        self.MIDDLE_FINGER_TIP = 12
+        self.RING_FINGER_TIP = 16
+        self.PINKY_TIP = 20
+        self.WRIST = 0
+
+        # Finger indices used by HandFeatures.tips and tip_distance()
+        self.THUMB, self.INDEX, self.MIDDLE, self.RING, self.PINKY = range(5)
         
-        if abs(movement) > 50:  # Threshold for tab switch
-            self.last_tab_switch = current_time
-            return 1 if movement > 0 else -1
-        return 0
+        # Gesture cooldowns, used to build the default rule set
+        self.cooldown = 0.5  # Cooldown time in seconds
+        self.emoji_cooldown = 1.0  # Longer cooldown for emoji gestures
+        if engine is None:
+            if rules is None:
+                rules = default_gesture_rules(self.cooldown, self.emoji_cooldown)
+            engine = GestureEngine(rules)
+        self.engine = engine
+
+        # Per-frame features, updated in place
+        self.features = HandFeatures()
 
-    def is_mic_toggle_gesture(self, landmarks):
+        # Recent landmarks for motion gestures (swipes, circles, flicks)
+        self.history = LandmarkHistory()
+        self.features.history = self.history
+
+        # Click state machines (press/release hysteresis, no blocking sleeps)
+        self.left_click = ClickStateMachine(press_threshold=0.3, release_threshold=0.4)
+        self.right_click = ClickStateMachine(press_threshold=0.4, release_threshold=0.5, drag_delay=None)
+
+    def update_features(self, landmarks, timestamp=None):
         """
-        Detect mic toggle gesture (pinch gesture with thumb and index finger).
-        
+        Compute the feature vector for the current frame.
+
+        The landmarks are appended to `history` for motion gestures. A frame
+        without a (valid) hand clears the history, so motion gestures never
+        fit a path across the gap to wherever the hand reappears.
+
         Args:
-            landmarks: List of hand landmarks
-            
+            landmarks: (21, 3) landmark array, or None if no hand is visible
+            timestamp (float): Capture time in seconds, defaults to time.monotonic()
+
         Returns:
-            bool: True if mic toggle gesture is detected
+            HandFeatures: Features of the current frame
         """
-        if len(landmarks) < 21:
-            return False
-            
-        current_time = time.time()
-        if current_time - self.last_mic_toggle < self.cooldown:
-            return False
-            
-        thumb_tip = landmarks[self.THUMB_TIP]
-        index_tip = landmarks[self.INDEX_FINGER_TIP]
-        
-        distance = self.calculate_distance(thumb_tip, index_tip)
-        
-        if distance < 20:  # Threshold for pinch gesture
-            self.last_mic_toggle = current_time
-            return True
-        return False
+        features = self.features.update(landmarks)
+        if features.valid:
+            self.history.push(time.monotonic() if timestamp is None else timestamp, landmarks, features.scale)
+        else:
+            self.history.clear()
+        return features
 
-    def is_scroll_gesture(self, landmarks, prev_landmarks):
+    def evaluate_gestures(self, features, now=None):
         """
-        Detect upward/downward swiping motion for scrolling using index and middle fingers.
-        
+        Evaluate every gesture rule against the current frame in one pass.
+
         Args:
-            landmarks: Current hand landmarks
-            prev_landmarks: Previous frame's hand landmarks
-            
+            features: HandFeatures of the current frame
+            now (float): Current time in seconds, defaults to time.time()
+
         Returns:
-            int: 1 for scroll up, -1 for scroll down, 0 for no scroll
+            list: Names of the gestures that fired, at most one per exclusivity group
         """
-        if len(landmarks) < 21 or len(prev_landmarks) < 21:
-            return 0
-            
-        # Get index and middle finger tips
-        index_tip = landmarks[self.INDEX_FINGER_TIP]
-        middle_tip = landmarks[self.MIDDLE_FINGER_TIP]
-        prev_index_tip = prev_landmarks[self.INDEX_FINGER_TIP]
-        prev_middle_tip = prev_landmarks[self.MIDDLE_FINGER_TIP]
-        
-        # Calculate average vertical movement of both fingers
-        current_y = (index_tip[1] + middle_tip[1]) / 2
-        prev_y = (prev_index_tip[1] + prev_middle_tip[1]) / 2
-        
-        # Calculate vertical movement
-        movement = prev_y - current_y
-        
-        # Check if fingers are extended (not curled)
-        index_mcp = landmarks[5]  # Index finger MCP joint
-        middle_mcp = landmarks[9]  # Middle finger MCP joint
-        
-        # Calculate if fingers are extended
-        index_extended = index_tip[1] < index_mcp[1]
-        middle_extended = middle_tip[1] < middle_mcp[1]
-        
-        if abs(movement) > 30 and index_extended and middle_extended:  # Threshold for scroll detection
-            return 1 if movement > 0 else -1
-        return 0
+        return self.engine.evaluate(features, now)
+
+    def calculate_distance(self, point1, point2):
+        """Calculate Euclidean distance between two points."""
+        return math.hypot(point1[0] - point2[0], point1[1] - point2[1])
+
+    def calculate_angle(self, point1, point2, point3):
+        """Calculate angle between three points."""
+        bax, bay = point1[0] - point2[0], point1[1] - point2[1]
+        bcx, bcy = point3[0] - point2[0], point3[1] - point2[1]
+
+        norm = math.hypot(bax, bay) * math.hypot(bcx, bcy)
+        if norm == 0:
+            return 0.0
+        cosine_angle = max(-1.0, min(1.0, (bax * bcx + bay * bcy) / norm))
+
+        return math.degrees(math.acos(cosine_angle))
+
+    def right_click_distance(self, features):
+        """Return the widest gap between thumb, index and middle fingertips."""
+        return max(features.tip_distance(self.THUMB, self.INDEX),
+                   features.tip_distance(self.THUMB, self.MIDDLE),
+                   features.tip_distance(self.INDEX, self.MIDDLE))
+
+    def update_click_state(self, features, now=None):
+        """
+        Advance the left-click state machine with the current frame.
+
+        Call after `evaluate_gestures`: a press is cancelled without clicking
+        when a higher priority pinch gesture (right click, mic toggle) wins.
+
+        Args:
+            features: HandFeatures of the current frame
+            now (float): Current time in seconds, defaults to time.time()
+
+        Returns:
+            str: "click", "down", "up" or None
+        """
+        if not features.valid:
+            return self.left_click.update(None, now)
+        if self.engine.is_preempted("click"):
+            return self.left_click.reset()
+
+        return self.left_click.update(features.tip_distance(self.THUMB, self.INDEX), now)
+
+    def update_right_click_state(self, features, now=None):
+        """
+        Advance the right-click state machine with the current frame.
 
-    def smooth_cursor_movement(self, x, y):
+        Args:
+            features: HandFeatures of the current frame
+            now (float): Current time in seconds, defaults to time.time()
+
+        Returns:
+            str: "click" or None
+        """
+        if not features.valid:
+            return self.right_click.update(None, now)
+        if self.engine.is_preempted("right_click"):
+            return self.right_click.reset()
+
+        # The circle is only as tight as its widest gap
+        return self.right_click.update(self.right_click_distance(features), now)
+
+    def smooth_cursor_movement(self, x, y, timestamp=None):
         """
-        Apply smoothing to cursor movement using moving average.
+        Apply the cursor filter to a new cursor position.
         
         Args:
             x: Current x coordinate
             y: Current y coordinate
+            timestamp (float): Sample time in seconds, defaults to time.monotonic()
             
         Returns:
             tuple: (smoothed_x, smoothed_y)
         """
-        self.prev_points.append((x, y))
-        
-        if len(self.prev_points) < self.smoothing_factor:
-            return x, y
-            
-        avg_x = sum(p[0] for p in self.prev_points) / len(self.prev_points)
-        avg_y = sum(p[1] for p in self.prev_points) / len(self.prev_points)
-        
-        return int(avg_x), int(avg_y)
+        smoothed_x, smoothed_y = self.cursor_filter.filter(x, y, timestamp)
+        return int(smoothed_x), int(smoothed_y)
+
+    def set_cursor_filter(self, name, **params):
+        """
+        Switch the cursor filter at runtime.
+
+        Args:
+            name (str): "one_euro", "kalman" or "moving_average"
+            **params: Filter parameters, e.g. min_cutoff and beta for One Euro
+        """
+        if name == "moving_average":
+            params.setdefault("window", self.smoothing_factor)
+        self.cursor_filter = create_filter(name, **params)
 
     def map_to_screen_coordinates(self, x, y, frame_width, frame_height):
         """
@@ -295,84 +1165,3 @@ class GestureDetector:
         screen_x = int(np.interp(x, (0, frame_width), (0, self.screen_width)))
         screen_y = int(np.interp(y, (0, frame_height), (0, self.screen_height)))
         return screen_x, screen_y
-
-    def is_heart_emoji_gesture(self, landmarks):
-        """Detect heart emoji gesture (both hands forming a heart shape)."""
-        if not landmarks:
-            return False
-            
-        # Get thumb and index finger positions
-        thumb_tip = landmarks[4]
-        index_tip = landmarks[8]
-        
-        # Calculate distance between thumb and index
-        distance = np.sqrt((thumb_tip[0] - index_tip[0])**2 + (thumb_tip[1] - index_tip[1])**2)
-        
-        # Check if fingers are close enough to form a heart shape
-        return distance < 40
-
-    def is_smile_emoji_gesture(self, landmarks):
-        """Detect smile emoji gesture (index and middle fingers curved up)."""
-        if not landmarks:
-            return False
-            
-        # Get finger positions
-        index_tip = landmarks[8]
-        middle_tip = landmarks[12]
-        index_mcp = landmarks[5]
-        middle_mcp = landmarks[9]
-        
-        # Check if fingers are curved upward
-        index_curved = index_tip[1] < index_mcp[1]
-        middle_curved = middle_tip[1] < middle_mcp[1]
-        
-        return index_curved and middle_curved
-
-    def is_thumbs_up_emoji_gesture(self, landmarks):
-        """Detect thumbs up emoji gesture (thumb pointing up)."""
-        if not landmarks:
-            return False
-            
-        # Get thumb positions
-        thumb_tip = landmarks[4]
-        thumb_mcp = landmarks[2]
-        
-        # Check if thumb is pointing up
-        return thumb_tip[1] < thumb_mcp[1] and abs(thumb_tip[0] - thumb_mcp[0]) < 20
-
-    def is_rock_emoji_gesture(self, landmarks):
-        """Detect rock emoji gesture (index and pinky fingers extended)."""
-        if not landmarks:
-            return False
-            
-        # Get finger positions
-        index_tip = landmarks[8]
-        pinky_tip = landmarks[20]
-        index_mcp = landmarks[5]
-        pinky_mcp = landmarks[17]
-        
-        # Check if index and pinky are extended while others are curled
-        index_extended = index_tip[1] < index_mcp[1]
-        pinky_extended = pinky_tip[1] < pinky_mcp[1]
-        
-        return index_extended and pinky_extended
-
-    def is_victory_emoji_gesture(self, landmarks):
-        """Detect victory emoji gesture (index and middle fingers in V shape)."""
-        if not landmarks:
-            return False
-            
-        # Get finger positions
-        index_tip = landmarks[8]
-        middle_tip = landmarks[12]
-        index_mcp = landmarks[5]
-        middle_mcp = landmarks[9]
-        
-        # Check if index and middle fingers are extended in V shape
-        index_extended = index_tip[1] < index_mcp[1]
-        middle_extended = middle_tip[1] < middle_mcp[1]
-        
-        # Check if fingers are spread apart
-        finger_distance = np.sqrt((index_tip[0] - middle_tip[0])**2 + (index_tip[1] - middle_tip[1])**2)
-        
-        return index_extended and middle_extended and finger_distance > 50 
\ No newline at end of file
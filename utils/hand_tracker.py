@@ -1,9 +1,36 @@
 import cv2
-import mediapipe as mp
+import math
 import numpy as np
+import time
+
+from utils.frame_pool import ScratchBuffer
+
+# Handedness labels swap when landmarks are mirrored instead of the frame
+MIRRORED_HANDEDNESS = {"Left": "Right", "Right": "Left"}
+
+
+class Hand:
+    def __init__(self, landmarks, handedness=None, score=1.0, track_id=0):
+        """
+        One hand found in a frame.
+
+        Args:
+            landmarks: (21, 3) float32 array of x, y (pixels) and z (scaled like x)
+            handedness (str): "Left" or "Right" as classified by MediaPipe, None if unknown
+            score (float): Handedness classification confidence
+            track_id (int): Identifier that stays the same while the hand is tracked
+        """
+        self.landmarks = landmarks
+        self.handedness = handedness
+        self.score = score
+        self.track_id = track_id
+
 
 class HandTracker:
-    def __init__(self, mode=False, max_hands=1, detection_confidence=0.5, tracking_confidence=0.5):
+    def __init__(self, mode=False, max_hands=1, detection_confidence=0.5, tracking_confidence=0.5,
+                 buffer_count=4, roi_tracking=False, roi_padding=0.3, roi_size=256, roi_min_score=0.8,
+                 roi_rescan=10, inference_stride=1, frame_budget_ms=None, max_stride=4, max_predicted_speed=8.0,
+                 metrics=None, track_distance=1.0, mirror=False, model_complexity=1, landmark_pool=None):
         """
         Initialize the hand tracker with MediaPipe Hands.
         
@@ -12,50 +39,468 @@ class HandTracker:
             max_hands (int): Maximum number of hands to detect
             detection_confidence (float): Minimum confidence value for hand detection
             tracking_confidence (float): Minimum confidence value for hand tracking
+            buffer_count (int): Number of landmark buffers to rotate through
+                without `landmark_pool`
+            roi_tracking (bool): Once a hand is found, only search a padded region around it
+            roi_padding (float): Padding added on each side of the hand, relative to its size
+            roi_size (int): Longest side the region is downscaled to before inference
+            roi_min_score (float): Handedness score below which tracking falls back to a
+                full-frame search
+            roi_rescan (int): While fewer than `max_hands` hands are tracked, search
+                the full frame every this many inferences to find new ones
+            inference_stride (int): Run inference every N frames and extrapolate in between;
+                with `frame_budget_ms`, the smallest stride
+            frame_budget_ms (float): Target inference CPU time per frame; when set, the
+                stride adapts to the measured inference latency (from
+                `inference_stride` up to `max_stride`)
+            max_stride (int): Upper bound for the adaptive stride
+            max_predicted_speed (float): Hand speed in hand sizes/s above which every
+                frame is inferred, since extrapolating fast motion overshoots
+            metrics (MetricsRegistry): Receives per-stage timings (preprocess, model,
+                draw, predict) when set; None disables instrumentation
+            track_distance (float): Largest jump of a hand's centre between two
+                inferences, in hand sizes, that still keeps its track ID
+            mirror (bool): Report landmarks and handedness as if the frame had
+                been flipped horizontally, so callers without a preview can
+                skip cv2.flip; the frame itself is left as it is
+            model_complexity (int): MediaPipe hand landmark model, 0 (lite,
+                faster) or 1 (full); can be changed later with `configure`
+            landmark_pool (FramePool): Free list the landmark buffer of each
+                result is taken from instead of the ring, for callers that
+                read results on another thread. The buffer of the last call
+                is `buffer`; the caller hands it back with `release` once
+                it has read the landmarks, so a consumer that falls behind
+                never sees them overwritten
         """
         self.mode = mode
         self.max_hands = max_hands
         self.detection_confidence = detection_confidence
         self.tracking_confidence = tracking_confidence
 
+        # Imported here so merely importing this module stays cheap
+        import mediapipe as mp
+
         self.mp_hands = mp.solutions.hands
+        self.model_complexity = model_complexity
+        self.hands = None
+        self._load_model()
+        self.mp_draw = mp.solutions.drawing_utils
+
+        # Ring of preallocated (max_hands, 21, 3) landmark buffers reused across
+        # frames, enough for a caller reading the last few results on the
+        # same thread. Across threads, the pool ties reuse to the consumer.
+        self.landmark_buffers = np.zeros((buffer_count, max_hands, 21, 3), dtype=np.float32)
+        self.buffer_index = 0
+        self.landmark_pool = landmark_pool
+        self.buffer = None  # Buffer holding the landmarks of the last result, if any
+        self.landmarks = None
+        self.results = None
+        self.mirror = mirror
+        # Resized region and RGB conversion are written here instead of new arrays every frame
+        self.scratch = ScratchBuffer()
+
+        # Track IDs: hands are matched to the previous inference by centre distance
+        self.track_distance = track_distance
+        self.next_track_id = 0
+
+        # Region-of-interest tracking state
+        self.roi_tracking = roi_tracking
+        self.roi_padding = roi_padding
+        self.roi_size = roi_size
+        self.roi_min_score = roi_min_score
+        self.roi_rescan = roi_rescan
+        self.roi = None  # (x0, y0, x1, y1) in frame pixels, None means full-frame search
+        self.roi_hands = 0  # Hands the region was built around
+        self.roi_streak = 0  # Region searches since the last full-frame search
+        self.roi_frames = 0
+        self.full_frames = 0
+
+        # Frame skipping: constant-velocity extrapolation between inferences
+        self.inference_stride = inference_stride
+        self.frame_budget_ms = frame_budget_ms
+        self.max_stride = max_stride
+        self.max_predicted_speed = max_predicted_speed
+        self.stride = inference_stride
+        self.inference_ms = 0.0  # Moving average of inference latency
+        # Per-hand state of the last inference, indexed like last_hands
+        self.last_hands = []
+        self.last_real = np.zeros((max_hands, 21, 3), dtype=np.float32)
+        self.next_real = np.zeros((max_hands, 21, 3), dtype=np.float32)
+        self.last_real_time = 0.0
+        self.has_real = False
+        self.velocity = np.zeros((max_hands, 21, 3), dtype=np.float32)
+        self.skipped = 0
+        self.real_frames = 0
+        self.predicted_frames = 0
+
+        self.metrics = metrics
+        # Frame size the tracking state is in; a new size starts tracking over
+        self.frame_shape = None
+
+    def _load_model(self):
+        """Create the MediaPipe graph for the current `model_complexity`, closing the previous one."""
+        if self.hands is not None:
+            self.hands.close()
         self.hands = self.mp_hands.Hands(
             static_image_mode=self.mode,
             max_num_hands=self.max_hands,
+            model_complexity=self.model_complexity,
             min_detection_confidence=self.detection_confidence,
             min_tracking_confidence=self.tracking_confidence
         )
-        self.mp_draw = mp.solutions.drawing_utils
+        self.loaded_complexity = self.model_complexity
+
+    def configure(self, model_complexity=None, inference_stride=None):
+        """
+        Change the model and minimum stride, e.g. from a quality controller on another thread.
 
-    def find_hands(self, img, draw=True):
+        Takes effect on the next `find_all_hands` call, which reloads the
+        model if its complexity changed.
+
+        Args:
+            model_complexity (int): 0 or 1, None keeps the current model
+            inference_stride (int): Minimum stride, None keeps the current one
+        """
+        if model_complexity is not None:
+            self.model_complexity = model_complexity
+        if inference_stride is not None:
+            self.inference_stride = inference_stride
+            self.max_stride = max(self.max_stride, inference_stride)
+
+    def reset(self):
+        """Forget tracked hands, so the next frame is searched in full and gets new track IDs."""
+        self.roi = None
+        self.has_real = False
+        self.last_hands = []
+        self.skipped = 0
+
+    def find_all_hands(self, img, draw=True, timestamp=None):
+        """
+        Find every hand in the image, up to `max_hands`.
+
+        With `roi_tracking` enabled, once hands are found with confidence,
+        later frames only search a padded, downscaled region around them; a
+        full frame search is done again as soon as one is lost, and every
+        `roi_rescan` inferences while fewer than `max_hands` are tracked, so
+        a hand entering the frame is picked up. With a stride above 1, frames between inferences get landmarks
+        extrapolated from the last two inferred frames.
+
+        Args:
+            img: Input image
+            draw (bool): Whether to draw the hand landmarks
+            timestamp (float): Capture time in seconds, defaults to time.monotonic()
+
+        Returns:
+            img: Image with hand landmarks drawn
+            hands: List of Hand, oldest track first. Landmark arrays are
+                reused buffers; copy them to keep them beyond the next few
+                frames, or, with `landmark_pool`, until `buffer` is released.
+        """
+        now = time.monotonic() if timestamp is None else timestamp
+        self.buffer = None
+        if self.loaded_complexity != self.model_complexity:
+            self._load_model()
+        if img.shape != self.frame_shape:
+            # Regions, velocities and track positions are in the old frame's pixels
+            self.reset()
+            self.frame_shape = img.shape
+        if self.has_real and self.skipped < self.stride - 1:
+            start = time.monotonic()
+            hands = self._predict(now)
+            if draw:
+                for hand in hands:
+                    for x, y, _ in hand.landmarks:
+                        cv2.circle(img, (int(x), int(y)), 3, (255, 0, 255), cv2.FILLED)
+            if self.metrics is not None:
+                self.metrics.observe("predict", time.monotonic() - start)
+        else:
+            start = time.monotonic()
+            img, hands = self._detect(img, draw)
+            self._record_inference(hands, now, time.monotonic() - start)
+        if self.mirror:
+            self._mirror(hands, img.shape[1])
+        return img, hands
+
+    def _mirror(self, hands, width):
+        """Flip returned landmarks in place; the tracker's own state stays in frame coordinates."""
+        for hand in hands:
+            x = hand.landmarks[:, 0]
+            np.subtract(width, x, out=x)
+            hand.handedness = MIRRORED_HANDEDNESS.get(hand.handedness, hand.handedness)
+
+    def find_hands(self, img, draw=True, timestamp=None):
         """
         Find hands in the image and return the image with hand landmarks drawn.
-        
+
         Args:
             img: Input image
             draw (bool): Whether to draw the hand landmarks
-            
+            timestamp (float): Capture time in seconds, defaults to time.monotonic()
+
         Returns:
             img: Image with hand landmarks drawn
-            landmarks: List of hand landmarks
+            landmarks: (21, 3) float32 array of x, y (pixels) and z (scaled
+                like x) for the oldest tracked hand, or None if no hand was
+                found. The array is a reused buffer; copy it to keep it
+                beyond the next few frames.
+        """
+        img, hands = self.find_all_hands(img, draw, timestamp)
+        return img, hands[0].landmarks if hands else None
+
+    def warm_up(self, width=640, height=480):
         """
-        img_rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+        Run one inference on a blank frame.
+
+        The first `process` call initialises the MediaPipe graph, which
+        takes far longer than a regular frame; doing it during startup keeps
+        that delay away from the first real frame.
+
+        Args:
+            width (int): Width of the blank frame
+            height (int): Height of the blank frame
+        """
+        self.hands.process(np.zeros((height, width, 3), dtype=np.uint8))
+        self.results = None
+
+    def _detect(self, img, draw):
+        """Run inference on the frame, using the tracked region when available."""
+        rescan = self.roi_hands < self.max_hands and self.roi_streak >= self.roi_rescan
+        if self.roi is not None and not rescan:
+            hands = self._process_region(img, self.roi, draw, expected=self.roi_hands)
+            if hands:
+                self.roi_frames += 1
+                self.roi_streak += 1
+                return img, hands
+            # Lost, uncertain or joined by another hand in the region: fall back to a full-frame search
+            self.roi = None
+
+        h, w = img.shape[:2]
+        self.full_frames += 1
+        self.roi_streak = 0
+        return img, self._process_region(img, (0, 0, w, h), draw)
+
+    def _next_buffer(self):
+        """Return the next (max_hands, 21, 3) landmark buffer, from the pool or the ring."""
+        if self.landmark_pool is not None:
+            buffer = self.landmark_pool.acquire(self.landmark_buffers.shape[1:])
+        else:
+            buffer = self.landmark_buffers[self.buffer_index]
+            self.buffer_index = (self.buffer_index + 1) % len(self.landmark_buffers)
+        self.buffer = buffer
+        return buffer
+
+    def release(self, buffer):
+        """Hand a result's landmark buffer (see `buffer`) back to the pool once it was read."""
+        if self.landmark_pool is not None:
+            self.landmark_pool.release(buffer)
+
+    def _predict(self, now):
+        """Extrapolate every hand from the last inferred frame at constant velocity."""
+        buffer = self._next_buffer()
+        dt = now - self.last_real_time
+        hands = []
+        for i, last in enumerate(self.last_hands):
+            landmarks = buffer[i]
+            np.multiply(self.velocity[i], dt, out=landmarks)
+            landmarks += self.last_real[i]
+            hands.append(Hand(landmarks, last.handedness, last.score, last.track_id))
+
+        self.skipped += 1
+        self.predicted_frames += 1
+        self.landmarks = hands[0].landmarks
+        return hands
+
+    def _assign_tracks(self, hands):
+        """
+        Give each hand the track ID of the nearest hand of the previous inference.
+
+        Pairs are matched greedily, closest first, and only if the centre
+        moved less than `track_distance` hand sizes; unmatched hands start a
+        new track.
+        """
+        candidates = []
+        if self.has_real:
+            previous = [
+                (last.track_id, self.last_real[i, :, :2].mean(axis=0),
+                 float(np.ptp(self.last_real[i, :, :2], axis=0).max()))
+                for i, last in enumerate(self.last_hands)
+            ]
+            for i, hand in enumerate(hands):
+                center = hand.landmarks[:, :2].mean(axis=0)
+                for track_id, last_center, size in previous:
+                    distance = float(np.hypot(*(center - last_center)))
+                    if distance <= self.track_distance * size:
+                        candidates.append((distance, i, track_id))
+
+        assigned, taken = {}, set()
+        for _, i, track_id in sorted(candidates):
+            if i not in assigned and track_id not in taken:
+                assigned[i] = track_id
+                taken.add(track_id)
+        for i, hand in enumerate(hands):
+            if i in assigned:
+                hand.track_id = assigned[i]
+            else:
+                hand.track_id = self.next_track_id
+                self.next_track_id += 1
+
+    def _record_inference(self, hands, now, elapsed):
+        """Update velocities, latency average and stride after an inferred frame."""
+        self.real_frames += 1
+        self.skipped = 0
+        self.inference_ms += 0.2 * (elapsed * 1000.0 - self.inference_ms)
+
+        dt = now - self.last_real_time
+        previous = {last.track_id: i for i, last in enumerate(self.last_hands)}
+        last_hands = []
+        for i, hand in enumerate(hands):
+            j = previous.get(hand.track_id)
+            if j is not None and dt > 0:
+                np.subtract(hand.landmarks, self.last_real[j], out=self.velocity[i])
+                self.velocity[i] /= dt
+            else:
+                self.velocity[i].fill(0)
+            np.copyto(self.next_real[i], hand.landmarks)
+            last_hands.append(Hand(self.next_real[i], hand.handedness, hand.score, hand.track_id))
+
+        # next_real now holds this inference; swap so last_real always does
+        self.last_real, self.next_real = self.next_real, self.last_real
+        self.last_hands = last_hands
+        self.has_real = bool(hands)
+        self.last_real_time = now
+
+        if self.frame_budget_ms:
+            stride = math.ceil(self.inference_ms / self.frame_budget_ms)
+            self.stride = max(self.inference_stride, min(stride, self.max_stride))
+        else:
+            self.stride = self.inference_stride
+        # Speed relative to the hand's size, so the limit does not depend on resolution
+        speed = max((float(np.abs(self.velocity[i, :, :2]).max()) /
+                     max(float(np.ptp(self.last_real[i, :, :2], axis=0).max()), 1e-6)
+                     for i in range(len(hands))), default=0.0)
+        if speed > self.max_predicted_speed:
+            self.stride = 1
+
+    def get_stats(self):
+        """
+        Return region tracking and frame skipping counters.
+
+        Returns:
+            dict: ROI vs full-frame searches, inferred vs extrapolated frames,
+                the current stride and the average inference latency
+        """
+        total = self.real_frames + self.predicted_frames
+        return {
+            "roi_frames": self.roi_frames,
+            "full_frames": self.full_frames,
+            "real_frames": self.real_frames,
+            "predicted_frames": self.predicted_frames,
+            "predicted_ratio": self.predicted_frames / total if total else 0.0,
+            "stride": self.stride,
+            "inference_ms": self.inference_ms,
+            "model_complexity": self.loaded_complexity,
+            "hands": len(self.last_hands),
+        }
+
+    def _process_region(self, img, region, draw, expected=None):
+        """
+        Run inference on one region of the frame.
+
+        The region is downscaled so its longest side is at most `roi_size`
+        when it is smaller than the full frame. Landmarks are mapped back to
+        full-frame pixels.
+
+        Args:
+            img: Full input image
+            region: (x0, y0, x1, y1) pixel bounds to search
+            draw (bool): Whether to draw the hand landmarks
+            expected (int): Number of hands that must be found, if any
+
+        Returns:
+            hands: List of Hand with track IDs assigned, oldest track first;
+                empty if no confident hand (or not `expected` hands) was found
+        """
+        metrics = self.metrics
+        if metrics is not None:
+            start = time.monotonic()
+
+        x0, y0, x1, y1 = region
+        crop = img[y0:y1, x0:x1]
+        crop_h, crop_w = crop.shape[:2]
+        is_roi = (crop_w, crop_h) != img.shape[1::-1]
+
+        scale = self.roi_size / max(crop_w, crop_h)
+        if is_roi and scale < 1:
+            small_w, small_h = max(round(crop_w * scale), 1), max(round(crop_h * scale), 1)
+            small = cv2.resize(crop, (small_w, small_h), dst=self.scratch.view((small_h, small_w, 3)),
+                               interpolation=cv2.INTER_AREA)
+            img_rgb = cv2.cvtColor(small, cv2.COLOR_BGR2RGB, dst=small)
+        else:
+            img_rgb = cv2.cvtColor(crop, cv2.COLOR_BGR2RGB, dst=self.scratch.view(crop.shape))
+        if metrics is not None:
+            preprocessed = time.monotonic()
+            metrics.observe("preprocess", preprocessed - start)
+
         self.results = self.hands.process(img_rgb)
-        landmarks = []
-
-        if self.results.multi_hand_landmarks:
-            for hand_landmarks in self.results.multi_hand_landmarks:
-                if draw:
-                    self.mp_draw.draw_landmarks(
-                        img, hand_landmarks, self.mp_hands.HAND_CONNECTIONS)
-                
-                # Extract landmark positions
-                for lm in hand_landmarks.landmark:
-                    h, w, c = img.shape
-                    cx, cy = int(lm.x * w), int(lm.y * h)
-                    landmarks.append((cx, cy))
-
-        return img, landmarks
+        if metrics is not None:
+            metrics.observe("model", time.monotonic() - preprocessed)
+
+        multi_hand_landmarks = self.results.multi_hand_landmarks
+        multi_handedness = self.results.multi_handedness or []
+        if not multi_hand_landmarks or (expected is not None and len(multi_hand_landmarks) != expected):
+            self.landmarks = None
+            return []
+        if is_roi and any(h.classification[0].score < self.roi_min_score for h in multi_handedness):
+            self.landmarks = None
+            return []
+
+        if draw:
+            if metrics is not None:
+                draw_start = time.monotonic()
+            # The crop is a view, so drawing on it draws on the full frame
+            for hand_landmarks in multi_hand_landmarks:
+                self.mp_draw.draw_landmarks(
+                    crop, hand_landmarks, self.mp_hands.HAND_CONNECTIONS)
+            if metrics is not None:
+                metrics.observe("draw", time.monotonic() - draw_start)
+
+        buffer = self._next_buffer()
+        hands = []
+        for index, hand_landmarks in enumerate(multi_hand_landmarks):
+            landmarks = buffer[index]
+            # Extract normalized positions, then map to full-frame pixels in one step
+            for i, lm in enumerate(hand_landmarks.landmark):
+                landmarks[i] = (lm.x, lm.y, lm.z)
+            landmarks *= (crop_w, crop_h, crop_w)
+            landmarks += (x0, y0, 0)
+
+            if index < len(multi_handedness):
+                classification = multi_handedness[index].classification[0]
+                hands.append(Hand(landmarks, classification.label, classification.score))
+            else:
+                hands.append(Hand(landmarks))
+
+        self._assign_tracks(hands)
+        hands.sort(key=lambda hand: hand.track_id)
+        self.landmarks = hands[0].landmarks
+        if self.roi_tracking:
+            # One region around all hands; new hands are found by the periodic full-frame search
+            self.roi = self._region_around(buffer[:len(hands)].reshape(-1, 3), img.shape)
+            self.roi_hands = len(hands)
+        return hands
+
+    def _region_around(self, landmarks, shape):
+        """Return a padded square region around the landmarks, clipped to the frame."""
+        h, w = shape[:2]
+        (min_x, min_y), (max_x, max_y) = landmarks[:, :2].min(axis=0), landmarks[:, :2].max(axis=0)
+        size = max(max_x - min_x, max_y - min_y) * (1 + 2 * self.roi_padding)
+        cx, cy = (min_x + max_x) / 2, (min_y + max_y) / 2
+
+        x0, y0 = max(int(cx - size / 2), 0), max(int(cy - size / 2), 0)
+        x1, y1 = min(int(cx + size / 2), w), min(int(cy + size / 2), h)
+        if x1 - x0 < 2 or y1 - y0 < 2:
+            return None
+        return x0, y0, x1, y1
 
     def get_landmark_position(self, img, landmark_id):
         """
@@ -68,10 +513,7 @@ class HandTracker:
         Returns:
             tuple: (x, y) coordinates of the landmark
         """
-        if self.results.multi_hand_landmarks:
-            for hand_landmarks in self.results.multi_hand_landmarks:
-                h, w, c = img.shape
-                lm = hand_landmarks.landmark[landmark_id]
-                cx, cy = int(lm.x * w), int(lm.y * h)
-                return cx, cy
-        return None 
\ No newline at end of file
+        if self.landmarks is None:
+            return None
+        x, y = self.landmarks[landmark_id, :2]
+        return int(x), int(y)
@@ -0,0 +1,137 @@
+import time
+
+import cv2
+import numpy as np
+
+
+class MotionDetector:
+    def __init__(self, size=(64, 48), threshold=16, min_fraction=0.01):
+        """
+        Cheap motion check on a heavily downscaled grayscale frame.
+
+        Each frame is shrunk to `size` (area averaging also suppresses sensor
+        noise) and compared with the previous one checked; motion is a
+        large enough share of pixels changing by more than `threshold`
+        grey levels. Costs well under a millisecond, against tens of
+        milliseconds for hand tracking, and allocates nothing per frame.
+
+        Args:
+            size (tuple): (width, height) the frame is compared at
+            threshold (int): Grey-level change that counts a pixel as changed
+            min_fraction (float): Share of changed pixels that counts as motion
+        """
+        self.size = tuple(size)
+        self.threshold = threshold
+        self.min_fraction = min_fraction
+        width, height = self.size
+        self.small = np.empty((height, width, 3), dtype=np.uint8)
+        self.grays = [np.empty((height, width), dtype=np.uint8) for _ in range(2)]
+        self.diff = np.empty((height, width), dtype=np.uint8)
+        self.current = 0
+        self.has_reference = False
+        self.changed = 0.0
+
+    def reset(self):
+        """Forget the reference frame; the next update only stores a new one."""
+        self.has_reference = False
+
+    def update(self, frame):
+        """
+        Compare a frame with the previous one.
+
+        Args:
+            frame: BGR frame of any size
+
+        Returns:
+            bool: True if enough of the frame changed
+        """
+        cv2.resize(frame, self.size, dst=self.small, interpolation=cv2.INTER_AREA)
+        gray = self.grays[self.current]
+        cv2.cvtColor(self.small, cv2.COLOR_BGR2GRAY, dst=gray)
+        previous = self.grays[1 - self.current]
+        self.current = 1 - self.current
+        if not self.has_reference:
+            self.has_reference = True
+            self.changed = 0.0
+            return False
+
+        cv2.absdiff(gray, previous, dst=self.diff)
+        cv2.threshold(self.diff, self.threshold, 255, cv2.THRESH_BINARY, dst=self.diff)
+        self.changed = cv2.countNonZero(self.diff) / self.diff.size
+        return self.changed >= self.min_fraction
+
+
+class IdleMonitor:
+    def __init__(self, idle_after=30, idle_fps=5.0, detector=None, set_rate=None):
+        """
+        Low-power state for when no hand is in view.
+
+        After `idle_after` consecutive tracked frames without a hand, the
+        monitor goes idle: hand tracking is skipped, frames are only checked
+        for motion, and `set_rate(idle_fps)` asks the frame source to slow
+        down. The first frame with motion wakes it up, `set_rate(None)`
+        restores the full rate, and that same frame is tracked.
+
+        Args:
+            idle_after (int): Frames without a hand before going idle
+            idle_fps (float): Frame rate requested while idle
+            detector (MotionDetector): Motion check used while idle
+            set_rate (callable): Called with the frame rate to use, None for full rate
+        """
+        self.idle_after = idle_after
+        self.idle_fps = idle_fps
+        self.detector = detector or MotionDetector()
+        self.set_rate = set_rate
+        self.idle = False
+        self.empty_frames = 0
+        self.idle_frames = 0
+        self.sleeps = 0
+        self.wakeups = 0
+        self.last_wake = None
+
+    def should_track(self, frame):
+        """
+        Decide whether a frame needs hand tracking.
+
+        Args:
+            frame: BGR frame about to be tracked
+
+        Returns:
+            bool: False while idle and nothing moved since the previous frame
+        """
+        if not self.idle:
+            return True
+        if not self.detector.update(frame):
+            self.idle_frames += 1
+            return False
+        self.idle = False
+        self.empty_frames = 0
+        self.wakeups += 1
+        self.last_wake = time.monotonic()
+        if self.set_rate is not None:
+            self.set_rate(None)
+        return True
+
+    def observe(self, hands):
+        """Count a tracked frame, going idle after `idle_after` in a row without a hand."""
+        if hands:
+            self.empty_frames = 0
+            return
+        self.empty_frames += 1
+        if self.empty_frames >= self.idle_after and not self.idle:
+            self.idle = True
+            self.sleeps += 1
+            # The first idle frame becomes the reference for motion
+            self.detector.reset()
+            if self.set_rate is not None:
+                self.set_rate(self.idle_fps)
+
+    def get_stats(self):
+        """Return the current state and idle counters."""
+        return {
+            "idle": self.idle,
+            "idle_frames": self.idle_frames,
+            "sleeps": self.sleeps,
+            "wakeups": self.wakeups,
+            "motion": self.detector.changed,
+        }
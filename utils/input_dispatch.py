@@ -0,0 +1,364 @@
+import shutil
+import subprocess
+import sys
+import threading
+from collections import deque
+
+
+class PyAutoGUIBackend:
+    def __init__(self):
+        """
+        Input backend using pyautogui.
+
+        pyautogui's per-call PAUSE is disabled: the dispatcher thread already
+        keeps OS input off the frame thread, so the sleep only adds latency.
+        """
+        import pyautogui
+        pyautogui.FAILSAFE = False  # Disable fail-safe
+        pyautogui.PAUSE = 0
+        self.pyautogui = pyautogui
+
+    def size(self):
+        return self.pyautogui.size()
+
+    def moveTo(self, x, y):
+        self.pyautogui.moveTo(x, y)
+
+    def click(self):
+        self.pyautogui.click()
+
+    def rightClick(self):
+        self.pyautogui.rightClick()
+
+    def mouseDown(self):
+        self.pyautogui.mouseDown()
+
+    def mouseUp(self):
+        self.pyautogui.mouseUp()
+
+    def scroll(self, clicks):
+        self.pyautogui.scroll(clicks)
+
+    def press(self, key):
+        self.pyautogui.press(key)
+
+    def hotkey(self, *keys):
+        self.pyautogui.hotkey(*keys)
+
+
+class XdotoolBackend:
+    # pyautogui key names that xdotool spells differently
+    KEYS = {
+        "ctrl": "ctrl",
+        "shift": "shift",
+        "alt": "alt",
+        "win": "super",
+        "tab": "Tab",
+        "+": "plus",
+        "-": "minus",
+        "left": "Left",
+        "right": "Right",
+        "up": "Up",
+        "down": "Down",
+        "volumeup": "XF86AudioRaiseVolume",
+        "volumedown": "XF86AudioLowerVolume",
+        "volumemute": "XF86AudioMute",
+    }
+
+    def __init__(self, executable="xdotool"):
+        """
+        Input backend running the xdotool command line tool (Linux, X11).
+
+        Args:
+            executable (str): xdotool binary name or path
+
+        Raises:
+            RuntimeError: If xdotool is not installed
+        """
+        self.executable = shutil.which(executable)
+        if self.executable is None:
+            raise RuntimeError("xdotool not found; install it or use another input backend")
+
+    def _run(self, *args):
+        subprocess.run([self.executable, *args], check=True, stdout=subprocess.PIPE)
+
+    def key_name(self, key):
+        key = key.lower()
+        return self.KEYS.get(key, key.upper() if key.startswith("f") and key[1:].isdigit() else key)
+
+    def size(self):
+        output = subprocess.run([self.executable, "getdisplaygeometry"], check=True,
+                                stdout=subprocess.PIPE, text=True).stdout
+        width, height = output.split()
+        return int(width), int(height)
+
+    def moveTo(self, x, y):
+        self._run("mousemove", str(int(x)), str(int(y)))
+
+    def click(self):
+        self._run("click", "1")
+
+    def rightClick(self):
+        self._run("click", "3")
+
+    def mouseDown(self):
+        self._run("mousedown", "1")
+
+    def mouseUp(self):
+        self._run("mouseup", "1")
+
+    def scroll(self, clicks):
+        # X11 scrolls with buttons 4 (up) and 5 (down)
+        if clicks:
+            self._run("click", "--repeat", str(abs(int(clicks))), "4" if clicks > 0 else "5")
+
+    def press(self, key):
+        self._run("key", self.key_name(key))
+
+    def hotkey(self, *keys):
+        self._run("key", "+".join(self.key_name(key) for key in keys))
+
+
+class UinputBackend:
+    # pyautogui key names -> evdev key code names
+    KEYS = {
+        "ctrl": "KEY_LEFTCTRL",
+        "shift": "KEY_LEFTSHIFT",
+        "alt": "KEY_LEFTALT",
+        "win": "KEY_LEFTMETA",
+        # Unshifted key of each character, as in browser zoom shortcuts
+        "+": "KEY_EQUAL",
+        "-": "KEY_MINUS",
+        "left": "KEY_LEFT",
+        "right": "KEY_RIGHT",
+        "volumeup": "KEY_VOLUMEUP",
+        "volumedown": "KEY_VOLUMEDOWN",
+        "volumemute": "KEY_MUTE",
+    }
+
+    def __init__(self, screen_size):
+        """
+        Input backend writing events to a virtual /dev/uinput device (Linux).
+
+        Works under X11 and Wayland alike, without a subprocess per event.
+        Needs the optional `evdev` package and write access to /dev/uinput.
+
+        Args:
+            screen_size (tuple): (width, height) the absolute pointer axes map to
+
+        Raises:
+            RuntimeError: If evdev is missing or the device cannot be created
+        """
+        try:
+            from evdev import AbsInfo, UInput, ecodes
+        except ImportError as e:
+            raise RuntimeError("The uinput backend needs the 'evdev' package") from e
+
+        self.ecodes = ecodes
+        self.screen_size = tuple(screen_size)
+        width, height = self.screen_size
+        keys = [code for name, code in ecodes.ecodes.items() if name.startswith("KEY_")]
+        capabilities = {
+            ecodes.EV_KEY: sorted(set(keys)) + [ecodes.BTN_LEFT, ecodes.BTN_RIGHT],
+            ecodes.EV_ABS: [
+                (ecodes.ABS_X, AbsInfo(0, 0, width - 1, 0, 0, 0)),
+                (ecodes.ABS_Y, AbsInfo(0, 0, height - 1, 0, 0, 0)),
+            ],
+            ecodes.EV_REL: [ecodes.REL_WHEEL],
+        }
+        try:
+            self.device = UInput(capabilities, name="virtual-mouse")
+        except OSError as e:
+            raise RuntimeError(f"Cannot create a uinput device: {e}") from e
+
+    def _key_code(self, key):
+        key = key.lower()
+        return self.ecodes.ecodes[self.KEYS.get(key, "KEY_" + key.upper())]
+
+    def _emit(self, events):
+        for event_type, code, value in events:
+            self.device.write(event_type, code, value)
+        self.device.syn()
+
+    def size(self):
+        return self.screen_size
+
+    def moveTo(self, x, y):
+        ABS_X, ABS_Y, EV_ABS = self.ecodes.ABS_X, self.ecodes.ABS_Y, self.ecodes.EV_ABS
+        self._emit([(EV_ABS, ABS_X, int(x)), (EV_ABS, ABS_Y, int(y))])
+
+    def _button(self, button, values):
+        for value in values:
+            self._emit([(self.ecodes.EV_KEY, button, value)])
+
+    def click(self):
+        self._button(self.ecodes.BTN_LEFT, (1, 0))
+
+    def rightClick(self):
+        self._button(self.ecodes.BTN_RIGHT, (1, 0))
+
+    def mouseDown(self):
+        self._button(self.ecodes.BTN_LEFT, (1,))
+
+    def mouseUp(self):
+        self._button(self.ecodes.BTN_LEFT, (0,))
+
+    def scroll(self, clicks):
+        self._emit([(self.ecodes.EV_REL, self.ecodes.REL_WHEEL, int(clicks))])
+
+    def press(self, key):
+        self.hotkey(key)
+
+    def hotkey(self, *keys):
+        codes = [self._key_code(key) for key in keys]
+        EV_KEY = self.ecodes.EV_KEY
+        self._emit([(EV_KEY, code, 1) for code in codes])
+        self._emit([(EV_KEY, code, 0) for code in reversed(codes)])
+
+
+INPUT_BACKENDS = {
+    "pyautogui": PyAutoGUIBackend,
+    "xdotool": XdotoolBackend,
+    "uinput": UinputBackend,
+}
+
+
+def create_input_backend(name, **params):
+    """
+    Create an OS input backend by name.
+
+    Args:
+        name (str): One of INPUT_BACKENDS
+        **params: Constructor parameters for the backend
+
+    Returns:
+        The backend
+    """
+    if name not in INPUT_BACKENDS:
+        raise ValueError(f"Unknown input backend {name!r}, expected one of {sorted(INPUT_BACKENDS)}")
+    return INPUT_BACKENDS[name](**params)
+
+
+class InputDispatcher:
+    def __init__(self, backend):
+        """
+        Send input to a backend from a dedicated thread.
+
+        Calls have the pyautogui signature but only queue a command and
+        return immediately, so the frame loop never waits on the OS input
+        layer. Consecutive `moveTo` commands are merged into the latest
+        position and consecutive `scroll` commands into one summed delta;
+        everything else is sent in order, so a click still lands at the
+        position queued before it.
+
+        Args:
+            backend: Object with the pyautogui input API (see INPUT_BACKENDS,
+                or InputRecorder for tests)
+        """
+        self.backend = backend
+        self.commands = deque()
+        self.condition = threading.Condition()
+        self.busy = False
+        self.closed = False
+        self.sent = 0
+        self.merged_moves = 0
+        self.merged_scrolls = 0
+        self.errors = 0
+        self.thread = threading.Thread(target=self._run, name="input", daemon=True)
+        self.thread.start()
+
+    def size(self):
+        return self.backend.size()
+
+    def moveTo(self, x, y, *args, **kwargs):
+        with self.condition:
+            if self.commands and self.commands[-1][0] == "moveTo":
+                self.commands[-1] = ("moveTo", (x, y))
+                self.merged_moves += 1
+            else:
+                self.commands.append(("moveTo", (x, y)))
+            self.condition.notify_all()
+
+    def scroll(self, clicks, *args, **kwargs):
+        with self.condition:
+            if self.commands and self.commands[-1][0] == "scroll":
+                self.commands[-1] = ("scroll", (self.commands[-1][1][0] + clicks,))
+                self.merged_scrolls += 1
+            else:
+                self.commands.append(("scroll", (clicks,)))
+            self.condition.notify_all()
+
+    def _submit(self, name, *args):
+        with self.condition:
+            self.commands.append((name, args))
+            self.condition.notify_all()
+
+    def click(self, *args, **kwargs):
+        self._submit("click")
+
+    def rightClick(self, *args, **kwargs):
+        self._submit("rightClick")
+
+    def mouseDown(self, *args, **kwargs):
+        self._submit("mouseDown")
+
+    def mouseUp(self, *args, **kwargs):
+        self._submit("mouseUp")
+
+    def press(self, key, *args, **kwargs):
+        self._submit("press", key)
+
+    def hotkey(self, *keys, **kwargs):
+        self._submit("hotkey", *keys)
+
+    def _run(self):
+        while True:
+            with self.condition:
+                while not self.commands and not self.closed:
+                    self.condition.wait()
+                if not self.commands:
+                    return
+                name, args = self.commands.popleft()
+                self.busy = True
+
+            try:
+                getattr(self.backend, name)(*args)
+                self.sent += 1
+            except Exception as e:
+                self.errors += 1
+                print(f"Input backend error in {name}: {e}", file=sys.stderr)
+            finally:
+                with self.condition:
+                    self.busy = False
+                    self.condition.notify_all()
+
+    def flush(self, timeout=None):
+        """
+        Wait until every queued command has been sent.
+
+        Args:
+            timeout (float): Seconds to wait at most, None waits forever
+
+        Returns:
+            bool: True if the queue drained in time
+        """
+        with self.condition:
+            return self.condition.wait_for(lambda: not self.commands and not self.busy, timeout)
+
+    def close(self, timeout=1.0):
+        """Send the remaining commands, then stop the dispatcher thread."""
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+        self.thread.join(timeout)
+
+    def get_stats(self):
+        """Return dispatch counters."""
+        with self.condition:
+            return {
+                "pending": len(self.commands),
+                "sent": self.sent,
+                "merged_moves": self.merged_moves,
+                "merged_scrolls": self.merged_scrolls,
+                "errors": self.errors,
+            }
@@ -0,0 +1,242 @@
+import bisect
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Latency bucket upper bounds in seconds, from 50 us to 1 s
+DEFAULT_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.002, 0.004, 0.008, 0.016, 0.033, 0.066,
+                   0.133, 0.25, 0.5, 1.0)
+
+
+class Histogram:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        """
+        Fixed-bucket latency histogram.
+
+        Observing a value is a binary search and two additions, so it is
+        cheap enough for the per-frame hot path.
+
+        Args:
+            buckets (tuple): Sorted bucket upper bounds in seconds
+        """
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # Last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.last = 0.0
+        self.lock = threading.Lock()
+
+    def observe(self, value):
+        """Record one observation in seconds."""
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.sum += value
+            self.last = value
+
+    def percentile(self, q):
+        """
+        Estimate a percentile by interpolating linearly inside its bucket.
+
+        Args:
+            q (float): Percentile between 0 and 100
+
+        Returns:
+            float: Estimated value in seconds; capped at the last bucket bound
+        """
+        with self.lock:
+            counts, count = list(self.counts), self.count
+        if not count:
+            return 0.0
+        rank = q / 100.0 * count
+        seen = 0
+        lower = 0.0
+        for upper, bucket_count in zip(self.buckets, counts):
+            if bucket_count and seen + bucket_count >= rank:
+                return lower + (upper - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+            lower = upper
+        return self.buckets[-1]
+
+    def snapshot(self):
+        """Return count, sum and cumulative bucket counts."""
+        with self.lock:
+            counts, count, total = list(self.counts), self.count, self.sum
+        cumulative = []
+        running = 0
+        for bucket_count in counts:
+            running += bucket_count
+            cumulative.append(running)
+        return {"count": count, "sum": total, "cumulative": cumulative}
+
+
+class MetricsRegistry:
+    def __init__(self, buckets=DEFAULT_BUCKETS, prefix="virtual_mouse"):
+        """
+        Per-stage latency histograms, event counters and gauges.
+
+        Instrumented code holds either a registry or None and only pays for
+        timing when it holds a registry, so disabled metrics cost one `is
+        None` check per stage.
+
+        Args:
+            buckets (tuple): Histogram bucket upper bounds in seconds
+            prefix (str): Prefix for exported metric names
+        """
+        self.bucket_bounds = tuple(buckets)
+        self.prefix = prefix
+        self.histograms = {}
+        self.counters = {}
+        self.gauges = {}
+        self.lock = threading.Lock()
+
+    def observe(self, stage, seconds):
+        """Record the duration of one run of a stage."""
+        histogram = self.histograms.get(stage)
+        if histogram is None:
+            with self.lock:
+                histogram = self.histograms.setdefault(stage, Histogram(self.bucket_bounds))
+        histogram.observe(seconds)
+
+    def inc(self, name, amount=1):
+        """Increase a counter."""
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def set_counter(self, name, value):
+        """Set a counter maintained elsewhere, e.g. a queue's drop count."""
+        with self.lock:
+            self.counters[name] = value
+
+    def set_gauge(self, name, value):
+        """Set a value that can go down as well as up, e.g. the current quality level."""
+        with self.lock:
+            self.gauges[name] = value
+
+    def summary(self):
+        """
+        Return the current metrics as a plain dictionary.
+
+        Returns:
+            dict: Stage name -> count and p50/p95/p99/mean/last in milliseconds,
+                plus "counters" and "gauges" entries
+        """
+        stages = {}
+        for stage, histogram in list(self.histograms.items()):
+            count = histogram.count
+            stages[stage] = {
+                "count": count,
+                "p50_ms": histogram.percentile(50) * 1000.0,
+                "p95_ms": histogram.percentile(95) * 1000.0,
+                "p99_ms": histogram.percentile(99) * 1000.0,
+                "mean_ms": histogram.sum / count * 1000.0 if count else 0.0,
+                "last_ms": histogram.last * 1000.0,
+            }
+        with self.lock:
+            stages["counters"] = dict(self.counters)
+            stages["gauges"] = dict(self.gauges)
+        return stages
+
+    def log_line(self):
+        """Return the summary as a single-line JSON log record."""
+        return json.dumps({"time": time.time(), "metrics": self.summary()}, separators=(",", ":"))
+
+    def prometheus_text(self):
+        """Return all metrics in the Prometheus text exposition format."""
+        name = f"{self.prefix}_stage_seconds"
+        lines = [
+            f"# HELP {name} Per-stage processing latency.",
+            f"# TYPE {name} histogram",
+        ]
+        bounds = [repr(bound) for bound in self.bucket_bounds] + ["+Inf"]
+        for stage, histogram in sorted(self.histograms.items()):
+            snapshot = histogram.snapshot()
+            for bound, cumulative in zip(bounds, snapshot["cumulative"]):
+                lines.append(f'{name}_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+            lines.append(f'{name}_sum{{stage="{stage}"}} {snapshot["sum"]!r}')
+            lines.append(f'{name}_count{{stage="{stage}"}} {snapshot["count"]}')
+
+        with self.lock:
+            counters = sorted(self.counters.items())
+            gauges = sorted(self.gauges.items())
+        for counter, value in counters:
+            counter_name = f"{self.prefix}_{counter}_total"
+            lines.append(f"# TYPE {counter_name} counter")
+            lines.append(f"{counter_name} {value}")
+        for gauge, value in gauges:
+            gauge_name = f"{self.prefix}_{gauge}"
+            lines.append(f"# TYPE {gauge_name} gauge")
+            lines.append(f"{gauge_name} {value}")
+        return "\n".join(lines) + "\n"
+
+
+class MetricsServer:
+    def __init__(self, registry, host="127.0.0.1", port=9464):
+        """
+        Serve a registry at /metrics over HTTP from a daemon thread.
+
+        Args:
+            registry (MetricsRegistry): Metrics to export
+            host (str): Interface to bind; local only by default
+            port (int): TCP port, 0 picks a free one
+        """
+        self.registry = registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = registry.prometheus_text().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+        self.thread = threading.Thread(target=self.server.serve_forever, name="metrics", daemon=True)
+
+    def start(self):
+        """Start serving in the background."""
+        self.thread.start()
+
+    def stop(self):
+        """Stop serving and close the socket."""
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class TimedInput:
+    def __init__(self, backend, registry, stage="input"):
+        """
+        Wrap an input backend (e.g. pyautogui) so every call is timed.
+
+        Args:
+            backend: Object with the pyautogui input API
+            registry (MetricsRegistry): Receives the call durations
+            stage (str): Stage name the calls are recorded under
+        """
+        self.backend = backend
+        self.registry = registry
+        self.stage = stage
+
+    def __getattr__(self, name):
+        attr = getattr(self.backend, name)
+        if not callable(attr):
+            return attr
+
+        def timed(*args, **kwargs):
+            start = time.monotonic()
+            try:
+                return attr(*args, **kwargs)
+            finally:
+                self.registry.observe(self.stage, time.monotonic() - start)
+        return timed
@@ -0,0 +1,256 @@
+import math
+
+import numpy as np
+
+
+def _slope(times, values):
+    """Least-squares slope of `values` (N, ...) over `times` (N,), or None without two distinct times."""
+    n = len(times)
+    if n < 2:
+        return None
+    t = times - times[-1]
+    t_sum = t.sum()
+    denominator = n * (t @ t) - t_sum * t_sum
+    if denominator <= 0:
+        return None
+    return (n * (t @ values) - t_sum * values.sum(axis=0)) / denominator
+
+
+class LandmarkHistory:
+    def __init__(self, capacity=128):
+        """
+        Fixed-size ring buffer of timestamped hand landmarks.
+
+        Queries select the samples of the last few seconds rather than the
+        last few frames, and fit them in one vectorized step, so results do
+        not depend on the frame rate and each query costs the same on every
+        frame. The capacity bounds the longest window: 128 samples hold one
+        second at up to 128 fps.
+
+        Args:
+            capacity (int): Number of samples kept
+        """
+        self.capacity = capacity
+        # Every sample is written twice, at i and i + capacity, so the newest
+        # `capacity` samples are always one contiguous slice and windows are views
+        self.times = np.zeros(2 * capacity, dtype=np.float64)
+        self.landmarks = np.zeros((2 * capacity, 21, 3), dtype=np.float32)
+        # Both copies of each sample as one column, so push writes them in one assignment
+        self._time_pairs = self.times.reshape(2, capacity)
+        self._landmark_pairs = self.landmarks.reshape(2, capacity, 21, 3)
+        self.index = 0
+        self.count = 0
+        self.scale = 1.0  # Hand scale of the newest sample, the unit of every query
+        self.span = 0.0  # Seconds from the oldest to the newest sample
+        # Query results of the current frame; several features read the same path
+        self._results = {}
+
+    def __len__(self):
+        return self.count
+
+    def push(self, timestamp, landmarks, scale=1.0):
+        """
+        Append one frame, overwriting the oldest once the buffer is full.
+
+        Args:
+            timestamp (float): Capture time in seconds
+            landmarks: (21, 3) landmark array; copied into the buffer
+            scale (float): Hand scale of the frame (see HandFeatures.scale)
+        """
+        self._time_pairs[:, self.index] = timestamp
+        self._landmark_pairs[:, self.index] = landmarks
+        self.scale = scale
+        self.index = (self.index + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+        self.span = timestamp - float(self.times[self.index + self.capacity - self.count])
+        self._results.clear()
+
+    def clear(self):
+        """Forget every sample."""
+        self.count = 0
+        self.span = 0.0
+        self._results.clear()
+
+    def latest_time(self):
+        """Return the timestamp of the newest sample, or None if empty."""
+        return self.times[self.index + self.capacity - 1] if self.count else None
+
+    def covers(self, seconds):
+        """Return True if the samples reach back at least `seconds` from the newest one."""
+        return self.count > 0 and self.span >= seconds
+
+    def window(self, seconds):
+        """
+        Return the slice of the buffers holding the samples of the last `seconds`, oldest first.
+
+        Args:
+            seconds (float): Window length, measured back from the newest sample
+        """
+        end = self.index + self.capacity
+        times = self.times[end - self.count:end]
+        if not self.count:
+            return slice(end, end)
+        start = end - self.count + int(np.searchsorted(times, times[-1] - seconds))
+        return slice(start, end)
+
+    def track(self, points, seconds, relative_to=None):
+        """
+        Return the path of a landmark (or the mean of several) over a window.
+
+        Args:
+            points: Landmark index or list of indices to average
+            seconds (float): Window length
+            relative_to (int): Landmark subtracted from the path, e.g. the
+                wrist to see finger motion without hand motion
+
+        Returns:
+            times: (N,) sample times, oldest first
+            path: (N, 2) x, y positions in hand scales of the newest sample
+        """
+        key = ("track", points if isinstance(points, int) else tuple(points), seconds, relative_to)
+        cached = self._results.get(key)
+        if cached is not None:
+            return cached
+
+        window = self.window(seconds)
+        frames = self.landmarks[window]
+        if isinstance(points, int):
+            path = frames[:, points, :2].copy()
+        else:
+            path = frames[:, points[0], :2].copy()
+            for point in points[1:]:
+                path += frames[:, point, :2]
+            path /= len(points)
+        if relative_to is not None:
+            path -= frames[:, relative_to, :2]
+        path /= self.scale
+        cached = self._results[key] = (self.times[window], path)
+        return cached
+
+    def velocity(self, points, seconds=0.1, relative_to=None):
+        """
+        Return the (vx, vy) velocity in hand scales per second.
+
+        The velocity is the least-squares slope over the window, which is
+        less noisy than a difference of the last two frames.
+
+        Returns:
+            (2,) array, or None without two samples
+        """
+        key = ("velocity", points if isinstance(points, int) else tuple(points), seconds, relative_to)
+        if key in self._results:
+            return self._results[key]
+
+        times, path = self.track(points, seconds, relative_to)
+        velocity = _slope(times, path)
+        self._results[key] = velocity
+        return velocity
+
+    def acceleration(self, points, seconds=0.2, relative_to=None):
+        """
+        Return the (ax, ay) acceleration in hand scales per second squared.
+
+        Fits a parabola to the window by least squares.
+
+        Returns:
+            (2,) array, or None without three samples
+        """
+        times, path = self.track(points, seconds, relative_to)
+        if len(times) < 3:
+            return None
+        t = times - times[-1]
+        design = np.stack([np.ones_like(t), t, t * t], axis=1)
+        coefficients, _, rank, _ = np.linalg.lstsq(design, path, rcond=None)
+        if rank < 3:
+            return None
+        return 2 * coefficients[2]
+
+    def sweep(self, points, seconds):
+        """
+        Return how far a landmark turned around the centre of its path.
+
+        Args:
+            points: Landmark index or list of indices to average
+            seconds (float): Window length
+
+        Returns:
+            tuple: (signed angle in degrees, clockwise on screen positive;
+                mean radius in hand scales), or None without three samples
+        """
+        _, path = self.track(points, seconds)
+        n = len(path)
+        if n < 3:
+            return None
+        offsets = path - path.sum(axis=0) / n
+        before, after = offsets[:-1], offsets[1:]
+        # Signed angle between consecutive offsets from the centre: atan2(cross, dot)
+        cross = before[:, 0] * after[:, 1] - before[:, 1] * after[:, 0]
+        dot = np.einsum("ij,ij->i", before, after)
+        sweep = float(np.arctan2(cross, dot).sum())
+        radius = float(np.sqrt(np.einsum("ij,ij->i", offsets, offsets)).sum()) / n
+        return math.degrees(sweep), radius
+
+
+class ValueHistory:
+    def __init__(self, size, capacity=128):
+        """
+        Fixed-size ring buffer of timestamped feature vectors.
+
+        The scalar counterpart of LandmarkHistory, for features such as the
+        distance and angle between two hands whose rates of change should be
+        measured over time rather than between consecutive frames.
+
+        Args:
+            size (int): Number of values per sample
+            capacity (int): Number of samples kept
+        """
+        self.capacity = capacity
+        # Written twice like in LandmarkHistory, so windows are contiguous views
+        self.times = np.zeros(2 * capacity, dtype=np.float64)
+        self.values = np.zeros((2 * capacity, size), dtype=np.float64)
+        self._time_pairs = self.times.reshape(2, capacity)
+        self._value_pairs = self.values.reshape(2, capacity, size)
+        self.index = 0
+        self.count = 0
+        self.span = 0.0  # Seconds from the oldest to the newest sample
+
+    def __len__(self):
+        return self.count
+
+    def push(self, timestamp, values):
+        """Append one sample, overwriting the oldest once the buffer is full."""
+        self._time_pairs[:, self.index] = timestamp
+        self._value_pairs[:, self.index] = values
+        self.index = (self.index + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+        self.span = timestamp - float(self.times[self.index + self.capacity - self.count])
+
+    def clear(self):
+        """Forget every sample."""
+        self.count = 0
+        self.span = 0.0
+
+    def covers(self, seconds):
+        """Return True if the samples reach back at least `seconds` from the newest one."""
+        return self.count > 0 and self.span >= seconds
+
+    def latest(self):
+        """Return the newest sample's values, or None if empty."""
+        return self.values[self.index + self.capacity - 1] if self.count else None
+
+    def rate(self, column, seconds):
+        """
+        Return the rate of change of one value per second over the last `seconds`.
+
+        Like LandmarkHistory.velocity, the least-squares slope of the window.
+
+        Returns:
+            float, or None without two samples
+        """
+        end = self.index + self.capacity
+        times = self.times[end - self.count:end]
+        if not self.count:
+            return None
+        start = end - self.count + int(np.searchsorted(times, times[-1] - seconds))
+        slope = _slope(self.times[start:end], self.values[start:end, column])
+        return None if slope is None else float(slope)
@@ -0,0 +1,162 @@
+import numpy as np
+
+
+class Sprite:
+    def __init__(self, rgba, opacity_levels=16):
+        """
+        RGBA image prepared for fast alpha blending onto BGR frames.
+
+        The blend is computed in integer arithmetic as
+
+            out = (frame * (255 - alpha) + rgb * alpha + 127) // 255
+
+        so the premultiplied colour (`rgb * alpha + 127`) and the inverted
+        alpha are precomputed once as uint16 and every frame costs one
+        multiply, one add and one divide over the covered pixels, with no
+        float temporaries. Faded copies are cached per opacity level.
+
+        Args:
+            rgba: (H, W, 4) uint8 image; colour channels in the frame's channel order
+            opacity_levels (int): Number of cached opacity steps used for fading
+        """
+        rgba = np.asarray(rgba, dtype=np.uint8)
+        alpha = rgba[:, :, 3].astype(np.uint16)
+        self._init_layers(rgba[:, :, :3] * alpha[:, :, None], alpha, opacity_levels)
+
+    @classmethod
+    def from_premultiplied(cls, data, opacity_levels=16):
+        """
+        Build a sprite from the array returned by `premultiplied`.
+
+        Args:
+            data: (H, W, 4) uint16 array of premultiplied colour and alpha,
+                e.g. memory-mapped from a cache file
+            opacity_levels (int): Number of cached opacity steps used for fading
+
+        Returns:
+            Sprite: The sprite
+        """
+        sprite = cls.__new__(cls)
+        sprite._init_layers(data[:, :, :3], data[:, :, 3], opacity_levels)
+        return sprite
+
+    def _init_layers(self, premultiplied, alpha, opacity_levels):
+        self.height, self.width = alpha.shape[:2]
+        self.premultiplied_rgb = np.asarray(premultiplied, dtype=np.uint16)
+        self.alpha = np.asarray(alpha, dtype=np.uint16)
+        self.opacity_levels = opacity_levels
+        self.layers_cache = {}
+        self.buffer = np.empty((self.height, self.width, 3), dtype=np.uint16)
+
+    def premultiplied(self):
+        """Return the colour premultiplied by alpha and the alpha as one (H, W, 4) uint16 array."""
+        return np.dstack([self.premultiplied_rgb, self.alpha])
+
+    def layers(self, opacity=1.0):
+        """
+        Return the premultiplied colour and inverted alpha for an opacity.
+
+        Args:
+            opacity (float): Overall opacity between 0 and 1
+
+        Returns:
+            tuple: (premultiplied (H, W, 3) uint16, inverted alpha (H, W, 3) uint16)
+        """
+        levels = self.opacity_levels
+        level = min(max(int(round(opacity * levels)), 0), levels)
+        cached = self.layers_cache.get(level)
+        if cached is None:
+            # uint32 intermediates: premultiplied colour * level overflows uint16
+            alpha = (self.alpha.astype(np.uint32) * level + levels // 2) // levels
+            premultiplied = (self.premultiplied_rgb.astype(np.uint32) * level + levels // 2) // levels + 127
+            inverted = np.repeat((255 - alpha)[:, :, None], 3, axis=2)
+            cached = self.layers_cache[level] = (premultiplied.astype(np.uint16), inverted.astype(np.uint16))
+        return cached
+
+    def blend(self, frame, x, y, opacity=1.0):
+        """
+        Alpha-blend the sprite onto the frame in place.
+
+        Parts of the sprite outside the frame are clipped, so any position
+        (including negative ones) is valid.
+
+        Args:
+            frame: (H, W, 3) uint8 frame to draw on
+            x (int): Frame column of the sprite's left edge
+            y (int): Frame row of the sprite's top edge
+            opacity (float): Overall opacity between 0 and 1
+        """
+        frame_h, frame_w = frame.shape[:2]
+        x0, y0 = max(x, 0), max(y, 0)
+        x1, y1 = min(x + self.width, frame_w), min(y + self.height, frame_h)
+        if x0 >= x1 or y0 >= y1 or opacity <= 0:
+            return
+
+        premultiplied, inverted = self.layers(opacity)
+        sprite_region = (slice(y0 - y, y1 - y), slice(x0 - x, x1 - x))
+        roi = frame[y0:y1, x0:x1]
+        buffer = self.buffer[sprite_region]
+        np.multiply(roi, inverted[sprite_region], out=buffer)
+        buffer += premultiplied[sprite_region]
+        buffer //= 255
+        roi[...] = buffer
+
+
+class OverlayCompositor:
+    def __init__(self):
+        """Time-limited sprite overlays with optional fade-out, drawn in insertion order."""
+        self.overlays = []
+
+    def add(self, sprite, start, duration, position=None, fade=0.0):
+        """
+        Show a sprite for a while.
+
+        Args:
+            sprite (Sprite): Image to draw
+            start (float): Time in seconds the overlay appears
+            duration (float): Seconds the overlay stays visible
+            position (tuple): (x, y) of the top-left corner, None centres it in the frame
+            fade (float): Seconds at the end of `duration` over which it fades out
+        """
+        self.overlays.append((sprite, start, duration, position, fade))
+
+    def clear(self):
+        """Remove every overlay."""
+        self.overlays.clear()
+
+    def __len__(self):
+        return len(self.overlays)
+
+    def prune(self, now):
+        """Drop expired overlays without drawing, for when frames are not rendered here."""
+        self.overlays = [overlay for overlay in self.overlays if overlay[1] + overlay[2] > now]
+
+    def render(self, frame, now):
+        """
+        Draw every live overlay onto the frame and drop expired ones.
+
+        Args:
+            frame: (H, W, 3) uint8 frame to draw on
+            now (float): Current time in seconds, on the same clock as `start`
+        """
+        if not self.overlays:
+            return
+
+        frame_h, frame_w = frame.shape[:2]
+        live = []
+        for overlay in self.overlays:
+            sprite, start, duration, position, fade = overlay
+            remaining = start + duration - now
+            if remaining <= 0:
+                continue
+            live.append(overlay)
+            if now < start:
+                continue
+
+            if position is None:
+                x, y = (frame_w - sprite.width) // 2, (frame_h - sprite.height) // 2
+            else:
+                x, y = position
+            opacity = remaining / fade if 0 < remaining < fade else 1.0
+            sprite.blend(frame, x, y, opacity)
+        self.overlays = live
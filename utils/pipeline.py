@@ -0,0 +1,227 @@
+import threading
+import time
+from collections import deque
+
+
+class LatestQueue:
+    def __init__(self, maxsize=1, on_drop=None):
+        """
+        Bounded queue where the newest item always wins.
+
+        When the queue is full, putting a new item evicts the oldest one
+        instead of blocking the producer, so slow consumers only ever see
+        fresh frames.
+
+        Args:
+            maxsize (int): Maximum number of items held before dropping
+            on_drop (callable): Called with every evicted item, e.g. to return
+                its frame buffer to a FramePool
+        """
+        self.maxsize = maxsize
+        self.on_drop = on_drop
+        self.items = deque(maxlen=maxsize)
+        self.condition = threading.Condition()
+        self.dropped = 0
+        self.closed = False
+
+    def put(self, item):
+        """Add an item, dropping the oldest one if the queue is full."""
+        evicted = None
+        with self.condition:
+            if len(self.items) == self.maxsize:
+                self.dropped += 1
+                evicted = self.items[0]
+            self.items.append(item)
+            self.condition.notify()
+        if evicted is not None and self.on_drop is not None:
+            self.on_drop(evicted)
+
+    def get(self, timeout=None):
+        """
+        Remove and return the oldest item.
+
+        Args:
+            timeout (float): Seconds to wait for an item, None waits forever
+
+        Returns:
+            The item, or None if the queue timed out or was closed
+        """
+        with self.condition:
+            if not self.items and not self.closed:
+                self.condition.wait(timeout)
+            if not self.items:
+                return None
+            return self.items.popleft()
+
+    def qsize(self):
+        """Return the number of items currently waiting."""
+        with self.condition:
+            return len(self.items)
+
+    def close(self):
+        """Wake up any waiting consumer and stop accepting work."""
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+
+class StageStats:
+    def __init__(self, name, window=2.0):
+        """
+        Throughput and timing counters for one pipeline stage.
+
+        Args:
+            name (str): Stage name used in reports
+            window (float): Length in seconds of the throughput window
+        """
+        self.name = name
+        self.window = window
+        self.count = 0
+        self.busy_time = 0.0
+        self.last_duration = 0.0
+        self.timestamps = deque()
+        self.lock = threading.Lock()
+
+    def record(self, duration):
+        """Record one processed item that took `duration` seconds."""
+        now = time.monotonic()
+        with self.lock:
+            self.count += 1
+            self.busy_time += duration
+            self.last_duration = duration
+            self.timestamps.append(now)
+            while self.timestamps and now - self.timestamps[0] > self.window:
+                self.timestamps.popleft()
+
+    def throughput(self):
+        """Return items processed per second over the recent window."""
+        with self.lock:
+            if len(self.timestamps) < 2:
+                return 0.0
+            span = self.timestamps[-1] - self.timestamps[0]
+            return (len(self.timestamps) - 1) / span if span > 0 else 0.0
+
+    def snapshot(self):
+        """Return the counters as a plain dictionary."""
+        fps = self.throughput()
+        with self.lock:
+            avg = self.busy_time / self.count if self.count else 0.0
+            return {
+                "count": self.count,
+                "fps": fps,
+                "avg_ms": avg * 1000.0,
+                "last_ms": self.last_duration * 1000.0,
+            }
+
+
+class PipelineStage(threading.Thread):
+    def __init__(self, name, func, input_queue=None, output_queue=None, stop_event=None):
+        """
+        Worker thread running one step of the frame pipeline.
+
+        A stage without an input queue is a source: `func` is called with no
+        arguments and must return the next item, or None to stop the pipeline.
+        Otherwise `func` is called with each item taken from `input_queue`.
+        Results that are not None are pushed to `output_queue`.
+
+        Args:
+            name (str): Stage name
+            func (callable): Work function for this stage
+            input_queue (LatestQueue): Queue to read items from
+            output_queue (LatestQueue): Queue to publish results to
+            stop_event (threading.Event): Shared event signalling shutdown
+        """
+        super().__init__(name=name, daemon=True)
+        self.func = func
+        self.input_queue = input_queue
+        self.output_queue = output_queue
+        self.stop_event = stop_event or threading.Event()
+        self.stats = StageStats(name)
+
+    def run(self):
+        try:
+            while not self.stop_event.is_set():
+                if self.input_queue is None:
+                    start = time.monotonic()
+                    result = self.func()
+                    if result is None:
+                        break
+                else:
+                    item = self.input_queue.get(timeout=0.1)
+                    if item is None:
+                        continue
+                    start = time.monotonic()
+                    result = self.func(item)
+                self.stats.record(time.monotonic() - start)
+                if result is not None and self.output_queue is not None:
+                    self.output_queue.put(result)
+        finally:
+            self.stop_event.set()
+            if self.output_queue is not None:
+                self.output_queue.close()
+
+
+class FramePipeline:
+    def __init__(self, capture, inference, queue_size=1, on_drop=None):
+        """
+        Capture -> inference pipeline feeding a consumer on the calling thread.
+
+        The capture and inference steps run on their own threads, joined by
+        latest-frame-wins queues. The consumer (actions and rendering) pulls
+        results with `get`, which keeps GUI calls such as `cv2.imshow` on the
+        main thread.
+
+        Args:
+            capture (callable): Returns the next frame, or None when exhausted
+            inference (callable): Maps a frame to a result for the consumer
+            queue_size (int): Capacity of each inter-stage queue
+            on_drop (callable): Called with every frame or result a queue drops
+        """
+        self.stop_event = threading.Event()
+        self.frame_queue = LatestQueue(queue_size, on_drop)
+        self.result_queue = LatestQueue(queue_size, on_drop)
+        self.capture_stage = PipelineStage(
+            "capture", capture, output_queue=self.frame_queue, stop_event=self.stop_event)
+        self.inference_stage = PipelineStage(
+            "inference", inference, self.frame_queue, self.result_queue, self.stop_event)
+        self.consumer_stats = StageStats("action")
+
+    def start(self):
+        """Start the capture and inference threads."""
+        self.capture_stage.start()
+        self.inference_stage.start()
+
+    def get(self, timeout=0.1):
+        """Return the next inference result, or None if none is ready yet."""
+        return self.result_queue.get(timeout=timeout)
+
+    def running(self):
+        """Return True while the pipeline has not been stopped."""
+        return not self.stop_event.is_set() or self.result_queue.qsize() > 0
+
+    def stop(self):
+        """Stop all stages and wait for the worker threads to exit."""
+        self.stop_event.set()
+        self.frame_queue.close()
+        self.result_queue.close()
+        for stage in (self.capture_stage, self.inference_stage):
+            if stage.is_alive():
+                stage.join(timeout=1.0)
+
+    def get_stats(self):
+        """
+        Return per-stage throughput and queue depth counters.
+
+        Returns:
+            dict: Stage name -> counters, plus queue depths and drop counts
+        """
+        stats = {
+            stage.stats.name: stage.stats.snapshot()
+            for stage in (self.capture_stage, self.inference_stage)
+        }
+        stats[self.consumer_stats.name] = self.consumer_stats.snapshot()
+        stats["queues"] = {
+            "frames": {"depth": self.frame_queue.qsize(), "dropped": self.frame_queue.dropped},
+            "results": {"depth": self.result_queue.qsize(), "dropped": self.result_queue.dropped},
+        }
+        return stats
@@ -0,0 +1,128 @@
+import threading
+
+import cv2
+import numpy as np
+
+from utils.overlay import OverlayCompositor
+
+# MediaPipe's hand skeleton as polylines through the landmark indices
+HAND_CHAINS = [[0, 1, 2, 3, 4], [0, 5, 6, 7, 8], [5, 9, 10, 11, 12], [9, 13, 14, 15, 16],
+               [13, 17, 18, 19, 20], [0, 17]]
+
+
+def draw_hand(img, points):
+    """Draw a hand skeleton from its (21, 2) int32 pixel landmarks."""
+    cv2.polylines(img, [points[chain] for chain in HAND_CHAINS], False, (224, 224, 224), 2)
+    for x, y in points:
+        cv2.circle(img, (int(x), int(y)), 3, (0, 0, 255), cv2.FILLED)
+
+
+class PreviewWindow:
+    def __init__(self, fps=10.0, name="Virtual Mouse", mirror=False, on_quit=None):
+        """
+        Preview window rendered on its own thread at a capped frame rate.
+
+        The tracking loop hands over a snapshot (a copy of the frame, the
+        landmarks, the emoji overlays and HUD text) whenever `due`, at most
+        `fps` times per second. Everything else, landmark drawing, blending,
+        text and the OpenCV window, happens on the preview thread, so it
+        never delays input.
+
+        Args:
+            fps (float): Maximum preview frame rate
+            name (str): Window title
+            mirror (bool): Flip the frame before drawing, for frames captured
+                unmirrored whose landmarks were mirrored by the tracker
+            on_quit (callable): Called from the preview thread when 'q' is pressed
+        """
+        self.interval = 1.0 / fps
+        self.name = name
+        self.mirror = mirror
+        self.on_quit = on_quit
+        self.condition = threading.Condition()
+        # The tracking loop copies into `back`, the preview thread draws on `front`
+        self.front = self.back = self.view = None
+        self.pending = None
+        self.last_submit = float("-inf")
+        self.compositor = OverlayCompositor()
+        self.submitted = 0
+        self.rendered = 0
+        self.running = False
+        self.thread = None
+
+    def start(self):
+        """Start the preview thread."""
+        self.running = True
+        self.thread = threading.Thread(target=self._render_loop, name="preview", daemon=True)
+        self.thread.start()
+
+    def set_fps(self, fps):
+        """Change the frame rate cap."""
+        self.interval = 1.0 / fps
+
+    def due(self, now):
+        """Return True once the capped frame rate allows the next snapshot."""
+        return now - self.last_submit >= self.interval
+
+    def submit(self, img, hands, now, overlays=(), lines=()):
+        """
+        Hand a snapshot to the preview thread, replacing one it has not drawn yet.
+
+        Args:
+            img: Frame, copied
+            hands (list): Hand list for the frame, landmarks in its pixel coordinates
+            now (float): Time of the frame, also used to fade overlays
+            overlays (list): Overlay entries to draw (see OverlayCompositor)
+            lines (list): HUD text lines
+        """
+        self.last_submit = now
+        with self.condition:
+            if self.back is None or self.back.shape != img.shape:
+                self.back = np.empty_like(img)
+            np.copyto(self.back, img)
+            landmarks = [hand.landmarks[:, :2].astype(np.int32) for hand in hands]
+            self.pending = (now, landmarks, list(overlays), list(lines))
+            self.submitted += 1
+            self.condition.notify()
+
+    def _render_loop(self):
+        while self.running:
+            with self.condition:
+                self.condition.wait_for(lambda: self.pending is not None or not self.running,
+                                        self.interval)
+                snapshot = self.pending
+                if snapshot is not None:
+                    self.front, self.back = self.back, self.front
+                    self.pending = None
+            if snapshot is not None:
+                self._render(self.front, *snapshot)
+            # Also keeps the window responsive while no frames arrive
+            if (cv2.waitKey(1) & 0xFF) == ord('q') and self.on_quit is not None:
+                self.on_quit()
+        cv2.destroyWindow(self.name)
+
+    def _render(self, img, now, landmarks, overlays, lines):
+        if self.mirror:
+            if self.view is None or self.view.shape != img.shape:
+                self.view = np.empty_like(img)
+            img = cv2.flip(img, 1, dst=self.view)
+        for points in landmarks:
+            draw_hand(img, points)
+        self.compositor.overlays = overlays
+        self.compositor.render(img, now)
+        for i, line in enumerate(lines):
+            cv2.putText(img, line, (10, 30 + i * 25), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
+        cv2.imshow(self.name, img)
+        self.rendered += 1
+
+    def stop(self):
+        """Stop the preview thread and close the window."""
+        self.running = False
+        with self.condition:
+            self.condition.notify()
+        if self.thread is not None:
+            self.thread.join(timeout=1.0)
+
+    def get_stats(self):
+        """Return how many snapshots were taken and rendered."""
+        return {"submitted": self.submitted, "rendered": self.rendered}
@@ -0,0 +1,171 @@
+import json
+import time
+
+import numpy as np
+
+# Capture sizes stepped down through, largest first
+RESOLUTIONS = [(1920, 1080), (1280, 720), (960, 540), (640, 480), (480, 360), (320, 240)]
+
+
+def _smaller_resolution(resolution):
+    """Return the next size in RESOLUTIONS below `resolution`, or None at the bottom."""
+    return next(((width, height) for width, height in RESOLUTIONS if width < resolution[0]), None)
+
+
+def build_levels(resolution=(640, 480), model_complexity=1, render_fps=None, can_resize=True, renders=True):
+    """
+    Build the ladder of quality levels, best first.
+
+    Each level changes one setting of the previous one, cheapest loss
+    first: rendering rate, then the lite landmark model, then capture
+    resolution, then the inference stride (extrapolated frames), then the
+    same again further down. Steps that would not change anything are left
+    out.
+
+    Args:
+        resolution (tuple): (width, height) captured at the top level
+        model_complexity (int): Landmark model at the top level
+        render_fps (float): Preview frame rate at the top level, None for every frame
+        can_resize (bool): Whether the frame source can change resolution
+        renders (bool): Whether frames are displayed at all; headless runs skip the rendering steps
+
+    Returns:
+        list: Dicts with resolution, model_complexity, inference_stride and render_fps
+    """
+    level = {
+        "resolution": tuple(resolution),
+        "model_complexity": model_complexity,
+        "inference_stride": 1,
+        "render_fps": render_fps,
+    }
+    top_fps = render_fps or 30.0
+    steps = [
+        ("render_fps", lambda current: top_fps / 2 if renders else None),
+        ("model_complexity", lambda current: 0),
+        ("resolution", lambda current: _smaller_resolution(current) if can_resize else None),
+        ("inference_stride", lambda current: 2),
+        ("render_fps", lambda current: top_fps / 4 if renders else None),
+        ("resolution", lambda current: _smaller_resolution(current) if can_resize else None),
+        ("inference_stride", lambda current: 3),
+    ]
+    levels = [level]
+    for name, step in steps:
+        value = step(level[name])
+        if value is None or value == level[name]:
+            continue
+        level = dict(level, **{name: value})
+        levels.append(level)
+    return levels
+
+
+class QualityController:
+    def __init__(self, levels, apply, budget_ms=16.0, window=30, upgrade_ratio=0.6, upgrade_windows=3,
+                 log=print):
+        """
+        Closed-loop quality control against a per-frame latency budget.
+
+        Latencies are collected in windows of `window` frames. When a
+        window's mean is over the budget, quality drops one level right
+        away; it goes back up one level only after `upgrade_windows` windows
+        in a row at or below `upgrade_ratio` of the budget. The mean rather
+        than a high percentile is used so that frames extrapolated between
+        inferences count for what they save. The gap between the two
+        thresholds, and the doubling of that wait whenever a level it just
+        upgraded to turns out to be too slow, keep it from oscillating
+        between two levels. The first window after every change is
+        discarded, since it still holds frames of the old level.
+
+        Args:
+            levels (list): Settings from best to cheapest (see build_levels)
+            apply (callable): Called with a level's settings to switch to it
+            budget_ms (float): Target latency per frame in milliseconds
+            window (int): Frames per evaluation
+            upgrade_ratio (float): Share of the budget a window has to stay under to upgrade
+            upgrade_windows (int): Good windows in a row needed to upgrade
+            log (callable): Receives one JSON line per change, None disables logging
+        """
+        self.levels = levels
+        self.apply = apply
+        self.budget = budget_ms / 1000.0
+        self.window = window
+        self.upgrade_ratio = upgrade_ratio
+        self.upgrade_windows = upgrade_windows
+        self.log = log
+        self.level = 0
+        self.samples = np.zeros(window)
+        self.count = 0
+        self.settling = True
+        self.good_windows = 0
+        # Good windows needed to upgrade from each level, doubled after a failed upgrade
+        self.upgrade_after = [upgrade_windows] * len(levels)
+        self.last_upgrade = None
+        self.changes = []
+
+    def observe(self, latency):
+        """
+        Record one frame's latency and change level at the end of a window.
+
+        Args:
+            latency (float): Seconds from capture to the frame being done
+
+        Returns:
+            dict: The new level's settings if it changed, else None
+        """
+        self.samples[self.count] = latency
+        self.count += 1
+        if self.count < self.window:
+            return None
+        self.count = 0
+        if self.settling:
+            self.settling = False
+            return None
+
+        mean = float(self.samples.mean())
+        if mean > self.budget:
+            self.good_windows = 0
+            if self.level + 1 < len(self.levels):
+                if self.last_upgrade == self.level:
+                    # The level just upgraded to was too slow: wait longer before trying it again
+                    self.upgrade_after[self.level] *= 2
+                self.last_upgrade = None
+                return self._change(self.level + 1, mean)
+            return None
+
+        self.last_upgrade = None
+        if mean <= self.budget * self.upgrade_ratio and self.level > 0:
+            self.good_windows += 1
+            if self.good_windows >= self.upgrade_after[self.level - 1]:
+                self.good_windows = 0
+                self.last_upgrade = self.level - 1
+                return self._change(self.level - 1, mean)
+        else:
+            self.good_windows = 0
+        return None
+
+    def _change(self, level, mean):
+        previous = self.level
+        self.level = level
+        self.settling = True
+        settings = self.levels[level]
+        self.apply(settings)
+        change = {
+            "time": time.time(),
+            "level": level,
+            "direction": "down" if level > previous else "up",
+            "mean_ms": round(mean * 1000.0, 2),
+            "budget_ms": self.budget * 1000.0,
+            "settings": settings,
+        }
+        self.changes.append(change)
+        if self.log is not None:
+            self.log(json.dumps({"quality": change}))
+        return settings
+
+    def get_stats(self):
+        """Return the current level, its settings and the number of changes."""
+        return {
+            "level": self.level,
+            "levels": len(self.levels),
+            "settings": self.levels[self.level],
+            "changes": len(self.changes),
+        }
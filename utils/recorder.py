@@ -0,0 +1,148 @@
+from collections import Counter
+
+import cv2
+import numpy as np
+
+
+class LandmarkRecorder:
+    def __init__(self, path, video_path=None, fps=30.0):
+        """
+        Record timestamped landmark streams, and optionally raw frames.
+
+        Landmarks are buffered in memory and written as one compressed NPZ
+        file on `close`, with these arrays:
+
+            timestamps  (N,) float64 capture times in seconds
+            landmarks   (N, 21, 3) float32 landmarks (zeros where no hand)
+            present     (N,) bool, True where a hand was detected
+            frame_size  (2,) int32 frame width and height
+
+        Args:
+            path (str): Output .npz path for the landmark log
+            video_path (str): Optional output video path for the raw frames
+            fps (float): Frame rate written into the video header
+        """
+        self.path = path
+        self.video_path = video_path
+        self.fps = fps
+        self.video = None
+        self.timestamps = []
+        self.landmarks = []
+        self.present = []
+        self.frame_size = (0, 0)
+
+    def write(self, timestamp, landmarks, frame=None, frame_size=None):
+        """
+        Append one frame to the log.
+
+        Args:
+            timestamp (float): Capture time in seconds
+            landmarks: (21, 3) landmark array, or None if no hand was detected
+            frame: Raw BGR frame to append to the video, if recording video
+            frame_size (tuple): (width, height) of the frame, taken from `frame` if omitted
+        """
+        if frame is not None:
+            frame_size = (frame.shape[1], frame.shape[0])
+            if self.video_path is not None:
+                if self.video is None:
+                    fourcc = cv2.VideoWriter_fourcc(*"mp4v")
+                    self.video = cv2.VideoWriter(self.video_path, fourcc, self.fps, frame_size)
+                self.video.write(frame)
+        if frame_size is not None:
+            self.frame_size = frame_size
+
+        self.timestamps.append(timestamp)
+        self.present.append(landmarks is not None)
+        self.landmarks.append(
+            np.array(landmarks, dtype=np.float32) if landmarks is not None
+            else np.zeros((21, 3), dtype=np.float32)
+        )
+
+    def close(self):
+        """Write the landmark log and finish the video file."""
+        if self.video is not None:
+            self.video.release()
+            self.video = None
+        np.savez_compressed(
+            self.path,
+            timestamps=np.array(self.timestamps, dtype=np.float64),
+            landmarks=np.array(self.landmarks, dtype=np.float32).reshape(-1, 21, 3),
+            present=np.array(self.present, dtype=bool),
+            frame_size=np.array(self.frame_size, dtype=np.int32),
+        )
+
+
+class LandmarkLog:
+    def __init__(self, path):
+        """
+        Read a landmark log written by LandmarkRecorder.
+
+        Args:
+            path (str): Path of the .npz log
+        """
+        with np.load(path) as log:
+            self.timestamps = log["timestamps"]
+            self.landmarks = log["landmarks"]
+            self.present = log["present"]
+            self.frame_size = tuple(int(v) for v in log["frame_size"])
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def __iter__(self):
+        """Yield (timestamp, landmarks or None) for every recorded frame."""
+        for timestamp, landmarks, present in zip(self.timestamps, self.landmarks, self.present):
+            yield float(timestamp), landmarks if present else None
+
+
+class InputRecorder:
+    def __init__(self, screen_size=(1920, 1080)):
+        """
+        Stand-in for pyautogui that records calls instead of touching the OS.
+
+        Used for headless replay, benchmarks and tests, where there is no
+        display to send input to. `calls` counts every call; `sequence` lists
+        the button, scroll and key calls in order (cursor moves, by far the
+        most frequent, are only counted) so tests can assert what a replay did.
+
+        Args:
+            screen_size (tuple): Size reported by `size()`
+        """
+        self.screen_size = screen_size
+        self.calls = Counter()
+        self.sequence = []
+        self.position = (0, 0)
+        self.FAILSAFE = False
+        self.PAUSE = 0
+
+    def size(self):
+        return self.screen_size
+
+    def moveTo(self, x, y, *args, **kwargs):
+        self.calls["moveTo"] += 1
+        self.position = (x, y)
+
+    def click(self, *args, **kwargs):
+        self._record("click")
+
+    def rightClick(self, *args, **kwargs):
+        self._record("rightClick")
+
+    def mouseDown(self, *args, **kwargs):
+        self._record("mouseDown")
+
+    def mouseUp(self, *args, **kwargs):
+        self._record("mouseUp")
+
+    def scroll(self, clicks, *args, **kwargs):
+        self._record("scroll")
+
+    def press(self, key, *args, **kwargs):
+        self._record(f"press:{key}")
+
+    def hotkey(self, *keys, **kwargs):
+        self._record("hotkey:" + "+".join(keys))
+
+    def _record(self, call):
+        self.calls[call] += 1
+        self.sequence.append(call)
@@ -0,0 +1,56 @@
+import threading
+import time
+from contextlib import contextmanager
+
+
+class StartupTimeline:
+    def __init__(self, origin=None):
+        """
+        Record when each startup phase ran, and on which thread.
+
+        Args:
+            origin (float): time.monotonic() value the timeline is measured from,
+                defaults to now
+        """
+        self.origin = time.monotonic() if origin is None else origin
+        self.phases = []  # (name, start, end, thread name), relative to origin
+        self.marks = {}
+        self.lock = threading.Lock()
+
+    def add(self, name, start, end):
+        """Record a phase from absolute time.monotonic() start and end values."""
+        with self.lock:
+            self.phases.append((name, start - self.origin, end - self.origin,
+                                threading.current_thread().name))
+
+    @contextmanager
+    def phase(self, name):
+        """Time the body of a `with` block as one phase."""
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.add(name, start, time.monotonic())
+
+    def timed(self, name, func, *args, **kwargs):
+        """Call `func` and record the call as one phase; handy with executor.submit."""
+        with self.phase(name):
+            return func(*args, **kwargs)
+
+    def mark(self, name):
+        """Record a one-off milestone (e.g. the first frame) the first time it is reached."""
+        with self.lock:
+            self.marks.setdefault(name, time.monotonic() - self.origin)
+
+    def report(self):
+        """Return the timeline as printable text, phases in start order, times in ms."""
+        with self.lock:
+            phases = sorted(self.phases, key=lambda phase: phase[1])
+            marks = sorted(self.marks.items(), key=lambda mark: mark[1])
+        lines = ["Startup timeline (ms):"]
+        for name, start, end, thread in phases:
+            lines.append(f"  {name:<14}{start * 1000:8.1f} -> {end * 1000:8.1f}"
+                         f"  ({(end - start) * 1000:7.1f})  {thread}")
+        for name, at in marks:
+            lines.append(f"  {name:<14}{at * 1000:8.1f}")
+        return "\n".join(lines)